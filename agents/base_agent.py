@@ -6,14 +6,15 @@ task reception, movement, and status reporting.
 """
 
 from mesa import Agent
-from typing import Optional, Tuple
-import sys
-import os
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from model.cell_state import Task, AgentStatus, StatusReport, Message
-from utils.message_bus import TOPIC_TASK_ASSIGNED, TOPIC_STATUS_UPDATE
+from model.cell_state import CellState, Task, AgentStatus, StatusReport, Message
+from utils.message_bus import (
+    TOPIC_TASK_COMPLETED,
+    TOPIC_STATUS_UPDATE,
+    TOPIC_ALERT_OBSTACLE
+)
 from utils.pathfinding import calculate_path
 
 
@@ -39,12 +40,27 @@ class WorkerAgent(Agent):
         
         self.agent_type = agent_type
         self.current_task: Optional[Task] = None
-        self.status = AgentStatus.IDLE
+        self._status = AgentStatus.IDLE
+        model.worker_status_counts[AgentStatus.IDLE] += 1
         self.target_position: Optional[Tuple[int, int]] = None
-        self.path: list = []
+        self.path: Deque[Tuple[int, int]] = deque()
         
-        # Subscribe to task assignments for this agent type
-        self.model.message_bus.subscribe(TOPIC_TASK_ASSIGNED, self.receive_task)
+        # Task handlers keyed by the target cell's state, registered by
+        # subclasses so execute_task dispatches with a single lookup
+        self.task_handlers: Dict[CellState, Callable[[Tuple[int, int]], None]] = {}
+    
+    @property
+    def status(self) -> AgentStatus:
+        """Current status of this agent."""
+        return self._status
+    
+    @status.setter
+    def status(self, status: AgentStatus):
+        """Change status, keeping the model's per-status worker counts current."""
+        counts = self.model.worker_status_counts
+        counts[self._status] -= 1
+        counts[status] += 1
+        self._status = status
     
     def step(self):
         """
@@ -59,20 +75,25 @@ class WorkerAgent(Agent):
         
         elif self.status == AgentStatus.MOVING:
             # ENHANCED: Move faster - take multiple steps if path is short
-            steps_to_take = min(3, len(self.path)) if self.path else 0
+            path = self.path
+            target = self.target_position
+            move_agent = self.model.grid.move_agent
+            steps_to_take = min(3, len(path))
             
+            reached = False
             for _ in range(steps_to_take):
-                if self.path:
-                    next_pos = self.path.pop(0)
-                    self.model.grid.move_agent(self, next_pos)
-                    
-                    # Check if reached target
-                    if self.pos == self.target_position:
-                        self.status = AgentStatus.WORKING
-                        break
+                next_pos = path.popleft()
+                # Skip the grid update when the path repeats our position
+                if next_pos != self.pos:
+                    move_agent(self, next_pos)
+                
+                # Check if reached target
+                if next_pos == target:
+                    reached = True
+                    break
             
             # If no path or reached destination
-            if not self.path or self.pos == self.target_position:
+            if reached or not path:
                 self.status = AgentStatus.WORKING
         
         elif self.status == AgentStatus.WORKING:
@@ -90,23 +111,26 @@ class WorkerAgent(Agent):
     
     def receive_task(self, message: Message):
         """
-        Receive and accept a task assignment from the master agent.
+        Receive and accept a task assignment delivered over the message bus.
         
         Args:
             message: Message containing task assignment
         """
-        # Only accept tasks for this agent type
-        payload = message.payload
-        worker_type = payload.get('worker_type')
+        self.accept_task(message.payload.get('task'))
+    
+    def accept_task(self, task: Optional[Task]):
+        """
+        Start working on a task if this agent is idle.
         
-        if worker_type != self.agent_type:
-            return
+        Called directly by the master agent when it assigns a task.
         
+        Args:
+            task: Task to accept
+        """
         # Only accept if currently idle
         if self.status != AgentStatus.IDLE:
             return
         
-        task = payload.get('task')
         if not task:
             return
         
@@ -127,21 +151,31 @@ class WorkerAgent(Agent):
             return
         
         # Calculate path from current position to target
-        self.path = calculate_path(
+        self.path = deque(calculate_path(
             self.pos,
             target_pos,
             self.model.width,
             self.model.height,
-            obstacles=set()  # Could add obstacle detection here
-        )
+            obstacles=self.model.obstacle_grid
+        ))
         
         if self.path:
             # Remove current position from path
-            if self.path and self.path[0] == self.pos:
-                self.path.pop(0)
+            if self.path[0] == self.pos:
+                self.path.popleft()
             self.status = AgentStatus.MOVING
         else:
             # No path found - report obstacle
+            self.model.message_bus.publish_payload(
+                TOPIC_ALERT_OBSTACLE,
+                sender_id=self.unique_id,
+                timestamp=self.model.step_count,
+                payload={
+                    'task_id': self.current_task.task_id if self.current_task else None,
+                    'cell_position': target_pos,
+                    'agent_type': self.agent_type
+                }
+            )
             self.status = AgentStatus.IDLE
             self.current_task = None
     
@@ -149,10 +183,22 @@ class WorkerAgent(Agent):
         """
         Execute the assigned task.
         
-        This method should be overridden by subclasses to implement
-        specialized task execution logic.
+        Dispatches on the target cell's state to the handler registered in
+        task_handlers; cells in any other state are left untouched.
+        
+        Returns:
+            True if a handler was run
         """
-        raise NotImplementedError("Subclasses must implement execute_task()")
+        if not self.current_task:
+            return False
+        
+        target_cell = self.current_task.target_cell
+        handler = self.task_handlers.get(self.model.get_cell_state(target_cell))
+        if handler is None:
+            return False
+        
+        handler(target_cell)
+        return True
     
     def report_status(self):
         """Send status update to master agent via message bus."""
@@ -168,8 +214,8 @@ class WorkerAgent(Agent):
             message=f"{self.agent_type} agent completed task"
         )
         
-        message = Message(
-            topic=TOPIC_STATUS_UPDATE,
+        self.model.message_bus.publish_payload(
+            TOPIC_STATUS_UPDATE,
             sender_id=self.unique_id,
             timestamp=self.model.step_count,
             payload={
@@ -178,5 +224,29 @@ class WorkerAgent(Agent):
                 'cell_position': self.current_task.target_cell
             }
         )
+    
+    def publish_task_completed(self, action: str, details: Optional[Dict] = None):
+        """
+        Publish completion of the current task.
         
-        self.model.message_bus.publish(TOPIC_STATUS_UPDATE, message)
+        The message is handed to the model, which publishes all of a step's
+        completions as one batch.
+        
+        Args:
+            action: Action performed on the target cell (e.g., "ploughed")
+            details: Extra payload entries for this action
+        """
+        payload = {
+            'task_id': self.current_task.task_id,
+            'cell_position': self.current_task.target_cell,
+            'action': action
+        }
+        if details:
+            payload.update(details)
+        
+        self.model.completed_task_messages.append(Message(
+            topic=TOPIC_TASK_COMPLETED,
+            sender_id=self.unique_id,
+            timestamp=self.model.step_count,
+            payload=payload
+        ))
@@ -6,23 +6,96 @@ assigns work to worker agents, and adapts plans based on feedback.
 """
 
 from mesa import Agent
-from queue import PriorityQueue
-from typing import Dict, Tuple
-import sys
-import os
+from typing import Dict, List, Set, Tuple
+from collections import defaultdict
+from types import MappingProxyType
+import heapq
+import numpy as np
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from model.cell_state import CellState, CellKnowledge, Task, TaskType, TaskStatus, Message
+from model.cell_state import (
+    CellState, CellKnowledge, Task, TaskType, TaskStatus, AgentStatus, Message, UNIT_SCALE
+)
 from utils.message_bus import (
     TOPIC_STATUS_UPDATE,
     TOPIC_ALERT_DISEASE,
     TOPIC_ALERT_OBSTACLE,
     TOPIC_TASK_COMPLETED,
-    TOPIC_TASK_ASSIGNED
+    TOPIC_TASK_ASSIGNED,
+    TOPIC_TASK_ASSIGNED_BATCH,
+    worker_topic
+)
+
+
+# Worker agent type responsible for each task type
+_TASK_TO_WORKER = MappingProxyType({
+    TaskType.PLOUGH: "ploughing",
+    TaskType.SOW: "sowing",
+    TaskType.WATER: "watering",
+    TaskType.HARVEST: "harvesting",
+    TaskType.MONITOR: "drone"
+})
+
+# Task types produced by plan_tasks, indexed by the codes computed per cell
+_PLANNED_TASK_TYPES = (TaskType.WATER, TaskType.HARVEST, TaskType.SOW, TaskType.PLOUGH)
+
+# Default (task code, priority) planned for each cell state; -1 means no task
+_TASK_PLAN = {
+    CellState.DISEASED: (0, 100),         # Highest: treat diseased crops with water
+    CellState.NEED_WATER: (0, 90),        # High: water crops that need it
+    CellState.READY_TO_HARVEST: (1, 80),  # Medium-high: harvest ready crops
+    CellState.SOWN: (0, 70),              # Medium: water newly sown seeds
+    CellState.PLOUGHED: (2, 60),          # Low-medium: sow seeds in ploughed soil
+    CellState.INITIAL: (3, 50),           # Low: plough initial soil
+}
+
+# Lookup tables indexed by CellState value
+_TASK_CODE_LUT = np.array(
+    [_TASK_PLAN.get(state, (-1, 0))[0] for state in CellState], dtype=np.int8
+)
+_PRIORITY_LUT = np.array(
+    [_TASK_PLAN.get(state, (-1, 0))[1] for state in CellState], dtype=np.int16
 )
 
 
+def _plan_kernel(
+    state: np.ndarray,
+    has_pending: np.ndarray,
+    task_code_lut: np.ndarray,
+    priority_lut: np.ndarray,
+    remaining: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Select the cells that should receive a new task.
+    
+    Makes a single sweep over the full grid to find candidate cells, then
+    works only on that compact candidate set to apply per-type limits.
+    
+    Args:
+        state: Cell state values indexed by flat cell id
+        has_pending: True for cells that already have a pending task
+        task_code_lut: Task code per state value (-1 = no task)
+        priority_lut: Priority per state value
+        remaining: Number of tasks still allowed per task code
+    
+    Returns:
+        Tuple of (cell ids, task codes, priorities) in cell order
+    """
+    task_codes = task_code_lut[state]
+    candidates = np.flatnonzero((task_codes >= 0) & ~has_pending)
+    codes = task_codes[candidates]
+    
+    # Keep only the first candidates of each type that fit under the limit
+    keep = np.zeros(candidates.shape, dtype=bool)
+    for code, limit in enumerate(remaining.tolist()):
+        if limit <= 0:
+            continue
+        type_mask = codes == code
+        keep |= type_mask & (np.cumsum(type_mask) <= limit)
+    
+    selected = candidates[keep]
+    return selected, codes[keep], priority_lut[state[selected]]
+
+
 class MasterAgent(Agent):
     """
     Master coordination agent that plans and assigns tasks to worker agents.
@@ -41,15 +114,32 @@ class MasterAgent(Agent):
         """
         super().__init__(unique_id, model)
         
-        # Global knowledge base mapping cell positions to knowledge
-        self.knowledge_base: Dict[Tuple[int, int], CellKnowledge] = {}
+        # Global knowledge base stored as struct-of-arrays indexed by flat
+        # cell id (y * width + x), mirroring the model's bulk cell arrays
+        self._width = self.model.width
+        num_cells = self._width * self.model.height
+        self.kb_state = np.empty(num_cells, dtype=np.uint8)
+        self.kb_water = np.empty(num_cells, dtype=np.uint8)  # fixed point, see UNIT_SCALE
+        self.kb_growth = np.empty(num_cells, dtype=np.uint8)
+        self.kb_disease = np.empty(num_cells, dtype=np.uint8)  # fixed point, see UNIT_SCALE
+        self.kb_last_updated = np.empty(num_cells, dtype=np.int32)
         
-        # Task queue with priority ordering
-        self.task_queue = PriorityQueue()
+        # Cells with at least one pending task, plus the task IDs scheduled
+        # for the (few) cells that have any, keyed by flat cell id
+        self.has_pending = np.zeros(num_cells, dtype=bool)
+        self.pending_by_cell: Dict[int, List[str]] = {}
+        
+        # Task queues with priority ordering, one heap of
+        # (-priority, counter, task) per worker type
+        self.task_queues: Dict[str, List[Tuple[int, int, Task]]] = defaultdict(list)
+        self.queued_task_count = 0  # Total tasks across all queues
         
         # Registry of worker agents by type
         self.worker_registry: Dict[str, Agent] = {}
         
+        # IDs of workers currently free to take a task, by worker type
+        self.idle_workers: Dict[str, Set[int]] = defaultdict(set)
+        
         # Track assigned tasks
         self.assigned_tasks: Dict[str, Task] = {}
         
@@ -67,19 +157,54 @@ class MasterAgent(Agent):
     
     def _initialize_knowledge_base(self):
         """Initialize knowledge base with current farm state."""
-        for x in range(self.model.width):
-            for y in range(self.model.height):
-                pos = (x, y)
-                attrs = self.model.get_cell_attributes(pos)
-                self.knowledge_base[pos] = CellKnowledge(
-                    position=pos,
-                    state=self.model.get_cell_state(pos),
-                    water_level=attrs.get('water_level', 0.0),
-                    growth_progress=attrs.get('growth_progress', 0),
-                    disease_probability=attrs.get('disease_probability', 0.0),
-                    last_updated=self.model.step_count,
-                    pending_tasks=[]
-                )
+        width = self._width
+        cell_ids = np.arange(width * self.model.height)
+        self.cell_positions: List[Tuple[int, int]] = list(
+            zip((cell_ids % width).tolist(), (cell_ids // width).tolist())
+        )
+        
+        model = self.model
+        np.copyto(self.kb_state, model.cell_state_arr)
+        np.copyto(self.kb_water, model.water_level_arr)
+        np.copyto(self.kb_growth, model.growth_progress_arr)
+        np.copyto(self.kb_disease, model.disease_probability_arr)
+        self.kb_last_updated.fill(model.step_count)
+    
+    def _idx(self, pos: Tuple[int, int]) -> int:
+        """Convert a grid position (x, y) to its flat cell id."""
+        return pos[1] * self._width + pos[0]
+    
+    def get_cell_knowledge(self, pos: Tuple[int, int]) -> CellKnowledge:
+        """
+        Build a snapshot of the knowledge held about a single cell.
+        
+        Args:
+            pos: Grid position (x, y)
+        
+        Returns:
+            CellKnowledge view of the knowledge base entry
+        """
+        idx = self._idx(pos)
+        return CellKnowledge(
+            position=pos,
+            state=CellState(int(self.kb_state[idx])),
+            water_level=int(self.kb_water[idx]) / UNIT_SCALE,
+            growth_progress=int(self.kb_growth[idx]),
+            disease_probability=int(self.kb_disease[idx]) / UNIT_SCALE,
+            last_updated=int(self.kb_last_updated[idx]),
+            pending_tasks=list(self.pending_by_cell.get(idx, []))
+        )
+    
+    def register_worker(self, worker_type: str, worker: Agent):
+        """
+        Register a worker agent and mark it as available for tasks.
+        
+        Args:
+            worker_type: Type/role of the worker
+            worker: Worker agent instance
+        """
+        self.worker_registry[worker_type] = worker
+        self.idle_workers[worker_type].add(worker.unique_id)
     
     def step(self):
         """
@@ -97,16 +222,23 @@ class MasterAgent(Agent):
         self.assign_pending_tasks()
     
     def update_knowledge(self):
-        """Update global knowledge base from current farm state."""
-        for pos, knowledge in self.knowledge_base.items():
-            current_state = self.model.get_cell_state(pos)
-            attrs = self.model.get_cell_attributes(pos)
-            
-            knowledge.state = current_state
-            knowledge.water_level = attrs.get('water_level', 0.0)
-            knowledge.growth_progress = attrs.get('growth_progress', 0)
-            knowledge.disease_probability = attrs.get('disease_probability', 0.0)
-            knowledge.last_updated = self.model.step_count
+        """
+        Update global knowledge base from current farm state.
+        
+        Only cells the model flagged as changed since the last update are
+        copied; the model's dirty flags are cleared afterwards.
+        """
+        model = self.model
+        idxs = np.flatnonzero(model.dirty_cells)
+        if not idxs.size:
+            return
+        model.dirty_cells[idxs] = False
+        
+        self.kb_state[idxs] = model.cell_state_arr[idxs]
+        self.kb_water[idxs] = model.water_level_arr[idxs]
+        self.kb_growth[idxs] = model.growth_progress_arr[idxs]
+        self.kb_disease[idxs] = model.disease_probability_arr[idxs]
+        self.kb_last_updated[idxs] = model.step_count
     
     def plan_tasks(self):
         """
@@ -116,6 +248,9 @@ class MasterAgent(Agent):
         SOWN > PLOUGHED > INITIAL
         
         Enhanced to be more aggressive in task generation and weather-aware.
+        
+        The best new task for each idle worker type is handed over directly
+        when it outranks that type's queue head, so it never enters the queue.
         """
         # Count current tasks by type to balance workload
         task_counts = {}
@@ -127,59 +262,58 @@ class MasterAgent(Agent):
         max_tasks_per_type = 10
         
         # Check weather conditions
-        rain_forecast = self.model.weather.get('rain_forecast_24h', False)
-        high_temp = self.model.weather.get('temperature', 25) > 32
+        rain_forecast = self.model.weather.rain_forecast_24h
+        high_temp = self.model.weather.temperature > 32
+        
+        state = self.kb_state
         
-        for pos, knowledge in self.knowledge_base.items():
-            # Skip if cell already has pending tasks
-            if knowledge.pending_tasks:
+        # Specialize the lookup tables for the current weather
+        task_code_lut = _TASK_CODE_LUT.copy()
+        priority_lut = _PRIORITY_LUT.copy()
+        if rain_forecast and not high_temp:
+            # WEATHER-AWARE: Skip watering, rain will handle it
+            task_code_lut[CellState.NEED_WATER.value] = -1
+        elif high_temp:
+            # Higher priority in heat
+            priority_lut[CellState.NEED_WATER.value] = 95
+        if rain_forecast:
+            # Lower priority for seeds, rain will help
+            priority_lut[CellState.SOWN.value] = 50
+        
+        remaining = np.array([
+            max_tasks_per_type - task_counts.get(task_type.value, 0)
+            for task_type in _PLANNED_TASK_TYPES
+        ])
+        idxs, task_codes, priorities = _plan_kernel(
+            state, self.has_pending, task_code_lut, priority_lut, remaining
+        )
+        
+        # Pick the top new task per idle worker type; ties go to the queue,
+        # whose entries are older, matching the heap's counter tie-break
+        direct: Dict[int, str] = {}
+        for code, task_type in enumerate(_PLANNED_TASK_TYPES):
+            worker_type = _TASK_TO_WORKER[task_type]
+            if not self.idle_workers.get(worker_type):
                 continue
-            
-            state = knowledge.state
-            task_type = None
-            priority = 0
-            
-            # Determine task type and priority based on cell state
-            if state == CellState.DISEASED:
-                # Highest priority: treat diseased crops with water
-                task_type = TaskType.WATER
-                priority = 100
-            elif state == CellState.NEED_WATER:
-                # High priority: water crops that need it
-                # WEATHER-AWARE: Skip if rain is coming, unless high temp stress
-                if rain_forecast and not high_temp:
-                    continue  # Skip watering, rain will handle it
-                task_type = TaskType.WATER
-                priority = 95 if high_temp else 90  # Higher priority in heat
-            elif state == CellState.READY_TO_HARVEST:
-                # Medium-high priority: harvest ready crops
-                task_type = TaskType.HARVEST
-                priority = 80
-            elif state == CellState.SOWN:
-                # Medium priority: water newly sown seeds
-                # WEATHER-AWARE: Reduce priority if rain is coming
-                if rain_forecast:
-                    priority = 50  # Lower priority, rain will help
-                else:
-                    priority = 70
-                task_type = TaskType.WATER
-            elif state == CellState.PLOUGHED:
-                # Low-medium priority: sow seeds in ploughed soil
-                task_type = TaskType.SOW
-                priority = 60
-            elif state == CellState.INITIAL:
-                # Low priority: plough initial soil
-                # ENHANCED: More aggressive ploughing
-                task_type = TaskType.PLOUGH
-                priority = 50
-            
-            # Create task if needed and not exceeding limits
-            if task_type:
-                task_type_str = task_type.value
-                current_count = task_counts.get(task_type_str, 0)
-                if current_count < max_tasks_per_type:
-                    self.create_task(task_type, pos, priority)
-                    task_counts[task_type_str] = current_count + 1
+            of_type = np.flatnonzero(task_codes == code)
+            if not of_type.size:
+                continue
+            best = int(of_type[np.argmax(priorities[of_type])])
+            queue = self.task_queues.get(worker_type)
+            if queue and -queue[0][0] >= priorities[best]:
+                continue
+            direct[best] = worker_type
+        
+        cell_positions = self.cell_positions
+        for i, (idx, code, priority) in enumerate(
+            zip(idxs.tolist(), task_codes.tolist(), priorities.tolist())
+        ):
+            worker_type = direct.get(i)
+            if worker_type is None:
+                self.create_task(_PLANNED_TASK_TYPES[code], cell_positions[idx], priority)
+            else:
+                task = self._new_task(_PLANNED_TASK_TYPES[code], cell_positions[idx], priority)
+                self.assign_task(worker_type, task)
     
     def create_task(self, task_type: TaskType, target_cell: Tuple[int, int], priority: int):
         """
@@ -190,6 +324,25 @@ class MasterAgent(Agent):
             target_cell: Grid position for task execution
             priority: Priority score (higher = more urgent)
         """
+        task = self._new_task(task_type, target_cell, priority)
+        
+        # Add to the worker type's priority queue (negative priority for max-heap behavior)
+        worker_type = _TASK_TO_WORKER.get(task_type, "")
+        heapq.heappush(self.task_queues[worker_type], (-priority, self.task_counter, task))
+        self.queued_task_count += 1
+    
+    def _new_task(self, task_type: TaskType, target_cell: Tuple[int, int], priority: int) -> Task:
+        """
+        Build a pending task and mark its cell as having a pending task.
+        
+        Args:
+            task_type: Type of task to create
+            target_cell: Grid position for task execution
+            priority: Priority score (higher = more urgent)
+        
+        Returns:
+            The new Task
+        """
         self.task_counter += 1
         task_id = f"task_{self.task_counter}"
         
@@ -202,40 +355,44 @@ class MasterAgent(Agent):
             created_at=self.model.step_count
         )
         
-        # Add to priority queue (negative priority for max-heap behavior)
-        self.task_queue.put((-priority, self.task_counter, task))
-        
         # Mark cell as having pending task
-        if target_cell in self.knowledge_base:
-            self.knowledge_base[target_cell].pending_tasks.append(task_id)
+        idx = self._idx(target_cell)
+        self.has_pending[idx] = True
+        self.pending_by_cell.setdefault(idx, []).append(task_id)
+        return task
     
     def assign_pending_tasks(self):
-        """Assign pending tasks to available workers."""
+        """
+        Assign pending tasks to available workers.
+        
+        Only queues of worker types with an idle worker are popped, so tasks
+        wait in their queue instead of being handed to a busy worker and lost.
+        Tasks are handed to the worker directly rather than over the bus.
+        """
         # ENHANCED: Process more tasks per step for faster execution
-        tasks_to_assign = min(20, self.task_queue.qsize())
-        
-        for _ in range(tasks_to_assign):
-            if self.task_queue.empty():
-                break
-            
-            _, _, task = self.task_queue.get()
-            
-            # Determine worker type needed for this task
-            worker_type = self._get_worker_type_for_task(task.task_type)
-            
-            if worker_type and worker_type in self.worker_registry:
-                self.assign_task(worker_type, task)
-    
-    def _get_worker_type_for_task(self, task_type: TaskType) -> str:
-        """Map task type to worker agent type."""
-        mapping = {
-            TaskType.PLOUGH: "ploughing",
-            TaskType.SOW: "sowing",
-            TaskType.WATER: "watering",
-            TaskType.HARVEST: "harvesting",
-            TaskType.MONITOR: "drone"
-        }
-        return mapping.get(task_type, "")
+        tasks_to_assign = 20
+        assignments: Dict[str, List[Task]] = {}
+        
+        for worker_type, idle in self.idle_workers.items():
+            queue = self.task_queues.get(worker_type)
+            while idle and queue and tasks_to_assign > 0:
+                _, _, task = heapq.heappop(queue)
+                self.queued_task_count -= 1
+                worker = self._mark_assigned(worker_type, task)
+                if worker:
+                    worker.accept_task(task)
+                    assignments.setdefault(worker_type, []).append(task)
+                    tasks_to_assign -= 1
+        
+        # Workers were dispatched directly; the batch topic is for observers
+        for worker_type, tasks in assignments.items():
+            topic = worker_topic(TOPIC_TASK_ASSIGNED_BATCH, worker_type)
+            self.model.message_bus.publish_payload(
+                topic,
+                sender_id=self.unique_id,
+                timestamp=self.model.step_count,
+                payload={'tasks': tasks}
+            )
     
     def assign_task(self, worker_type: str, task: Task):
         """
@@ -245,17 +402,15 @@ class MasterAgent(Agent):
             worker_type: Type of worker to assign task to
             task: Task object to assign
         """
-        worker = self.worker_registry.get(worker_type)
+        worker = self._mark_assigned(worker_type, task)
         if not worker:
             return
+        worker.accept_task(task)
         
-        task.status = TaskStatus.ASSIGNED
-        task.assigned_to = worker.unique_id
-        self.assigned_tasks[task.task_id] = task
-        
-        # Publish task assignment message
-        message = Message(
-            topic=TOPIC_TASK_ASSIGNED,
+        # Notify observers of the assignment on the worker type's topic
+        topic = worker_topic(TOPIC_TASK_ASSIGNED, worker_type)
+        self.model.message_bus.publish_payload(
+            topic,
             sender_id=self.unique_id,
             timestamp=self.model.step_count,
             payload={
@@ -263,7 +418,42 @@ class MasterAgent(Agent):
                 'worker_type': worker_type
             }
         )
-        self.model.message_bus.publish(TOPIC_TASK_ASSIGNED, message)
+    
+    def _mark_assigned(self, worker_type: str, task: Task):
+        """
+        Record a task as assigned to the registered worker of a type.
+        
+        Args:
+            worker_type: Type of worker to assign task to
+            task: Task object to assign
+        
+        Returns:
+            The registered worker of that type, or None if there is none
+        """
+        worker = self.worker_registry.get(worker_type)
+        if not worker:
+            return None
+        
+        task.status = TaskStatus.ASSIGNED
+        task.assigned_to = worker.unique_id
+        self.assigned_tasks[task.task_id] = task
+        self.idle_workers[worker_type].discard(worker.unique_id)
+        return worker
+    
+    def _clear_pending(self, task: Task):
+        """
+        Remove a task from its cell's pending list.
+        
+        Args:
+            task: Task that is no longer pending
+        """
+        idx = self._idx(task.target_cell)
+        cell_tasks = self.pending_by_cell.get(idx)
+        if cell_tasks and task.task_id in cell_tasks:
+            cell_tasks.remove(task.task_id)
+            if not cell_tasks:
+                del self.pending_by_cell[idx]
+                self.has_pending[idx] = False
     
     def handle_feedback(self, message: Message):
         """
@@ -284,10 +474,7 @@ class MasterAgent(Agent):
                 task.completed_at = self.model.step_count
                 
                 # Remove from pending tasks in knowledge base
-                if task.target_cell in self.knowledge_base:
-                    kb = self.knowledge_base[task.target_cell]
-                    if task_id in kb.pending_tasks:
-                        kb.pending_tasks.remove(task_id)
+                self._clear_pending(task)
                 
                 # Remove from assigned tasks
                 del self.assigned_tasks[task_id]
@@ -299,9 +486,20 @@ class MasterAgent(Agent):
                 self.create_task(TaskType.WATER, cell_pos, priority=95)
         
         elif topic == TOPIC_ALERT_OBSTACLE:
-            # Obstacle encountered - could implement rerouting logic here
-            pass
+            # Obstacle encountered - free the worker and let the cell be replanned
+            task = self.assigned_tasks.pop(payload.get('task_id'), None)
+            if task:
+                task.status = TaskStatus.FAILED
+                self._clear_pending(task)
+            agent_type = payload.get('agent_type')
+            if agent_type:
+                self.idle_workers[agent_type].add(message.sender_id)
         
         elif topic == TOPIC_STATUS_UPDATE:
-            # General status update from worker
-            pass
+            # General status update from worker - track availability
+            report = payload.get('status_report')
+            if report:
+                if report.status in (AgentStatus.IDLE, AgentStatus.COMPLETED):
+                    self.idle_workers[report.agent_type].add(report.agent_id)
+                else:
+                    self.idle_workers[report.agent_type].discard(report.agent_id)
@@ -5,15 +5,48 @@ This module contains all specialized worker agents including Ploughing, Sowing,
 Watering, Harvesting, and Drone Monitoring agents.
 """
 
-import sys
-import os
-import random
-
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
 
 from agents.base_agent import WorkerAgent
-from model.cell_state import CellState, Message
-from utils.message_bus import TOPIC_TASK_COMPLETED, TOPIC_ALERT_DISEASE
+from model.cell_state import CellState, UNIT_SCALE
+from utils.message_bus import TOPIC_ALERT_DISEASE
+
+
+# Whether the drone scans a cell for disease, indexed by CellState value
+_SCANNED_STATE_LUT = np.array(
+    [state in (CellState.GROWING, CellState.HEALTHY, CellState.SOWN) for state in CellState],
+    dtype=bool
+)
+
+
+def _disease_kernel(water_level: np.ndarray, growth_progress: np.ndarray,
+                    random_buf: np.ndarray) -> np.ndarray:
+    """
+    Compute disease probabilities for a batch of crop cells.
+    
+    Works in place on a single output buffer (and random_buf) so the scan
+    allocates no per-term temporaries.
+    
+    Args:
+        water_level: Water level of each cell
+        growth_progress: Growth progress (0-100) of each cell
+        random_buf: Uniform [0, 1) samples, one per cell; overwritten
+    
+    Returns:
+        Disease probability of each cell
+    """
+    # Base probability increases with low water and growth stage
+    # Disease should be rare - only 2-5% of crops get diseased
+    out = np.subtract(1.0, water_level, dtype=np.float64)
+    out *= 0.15  # Low water impact
+    out += 0.02  # Very low base (2%)
+    random_buf *= 0.1  # Small random factor
+    out += random_buf
+    
+    # Reuse the random buffer as scratch for the growth term
+    np.multiply(growth_progress, 0.001, out=random_buf)  # Low growth impact
+    out += random_buf
+    return out
 
 
 class PloughingAgent(WorkerAgent):
@@ -26,37 +59,22 @@ class PloughingAgent(WorkerAgent):
     def __init__(self, unique_id, model):
         """Initialize the ploughing agent."""
         super().__init__(unique_id, model, "ploughing")
+        
+        # Only cells in INITIAL state can be ploughed
+        self.task_handlers = {CellState.INITIAL: self._plough}
     
-    def execute_task(self):
+    def _plough(self, target_cell):
         """
-        Execute ploughing task at current position.
+        Plough a cell in INITIAL state.
         
-        Validates cell is in INITIAL state before ploughing and updates
-        cell state to PLOUGHED.
+        Args:
+            target_cell: Grid position of the cell
         """
-        if not self.current_task:
-            return
-        
-        target_cell = self.current_task.target_cell
-        current_state = self.model.get_cell_state(target_cell)
+        # Transition to PLOUGHED state
+        self.model.set_cell_state(target_cell, CellState.PLOUGHED)
         
-        # Validate cell is in correct state for ploughing
-        if current_state == CellState.INITIAL:
-            # Transition to PLOUGHED state
-            self.model.set_cell_state(target_cell, CellState.PLOUGHED)
-            
-            # Publish task completion message
-            message = Message(
-                topic=TOPIC_TASK_COMPLETED,
-                sender_id=self.unique_id,
-                timestamp=self.model.step_count,
-                payload={
-                    'task_id': self.current_task.task_id,
-                    'cell_position': target_cell,
-                    'action': 'ploughed'
-                }
-            )
-            self.model.message_bus.publish(TOPIC_TASK_COMPLETED, message)
+        # Publish task completion message
+        self.publish_task_completed('ploughed')
 
 
 class SowingAgent(WorkerAgent):
@@ -70,45 +88,32 @@ class SowingAgent(WorkerAgent):
     def __init__(self, unique_id, model):
         """Initialize the sowing agent."""
         super().__init__(unique_id, model, "sowing")
+        
+        # Only cells in PLOUGHED state can be sown
+        self.task_handlers = {CellState.PLOUGHED: self._sow}
     
-    def execute_task(self):
+    def _sow(self, target_cell):
         """
-        Execute sowing task at current position.
+        Sow a cell in PLOUGHED state and initialize its growth parameters.
         
-        Validates cell is in PLOUGHED state before sowing and updates
-        cell state to SOWN with initial growth parameters.
+        Args:
+            target_cell: Grid position of the cell
         """
-        if not self.current_task:
-            return
+        model = self.model
         
-        target_cell = self.current_task.target_cell
-        current_state = self.model.get_cell_state(target_cell)
+        # Transition to SOWN state
+        model.set_cell_state(target_cell, CellState.SOWN)
         
-        # Validate cell is in correct state for sowing
-        if current_state == CellState.PLOUGHED:
-            # Transition to SOWN state
-            self.model.set_cell_state(target_cell, CellState.SOWN)
-            
-            # Initialize growth parameters
-            self.model.update_cell_attributes(
-                target_cell,
-                growth_progress=0,
-                water_level=0.5,
-                disease_probability=0.0
-            )
-            
-            # Publish task completion message
-            message = Message(
-                topic=TOPIC_TASK_COMPLETED,
-                sender_id=self.unique_id,
-                timestamp=self.model.step_count,
-                payload={
-                    'task_id': self.current_task.task_id,
-                    'cell_position': target_cell,
-                    'action': 'sown'
-                }
-            )
-            self.model.message_bus.publish(TOPIC_TASK_COMPLETED, message)
+        # Initialize growth parameters
+        model.update_cell_attributes(
+            target_cell,
+            growth_progress=0,
+            water_level=0.5,
+            disease_probability=0.0
+        )
+        
+        # Publish task completion message
+        self.publish_task_completed('sown')
 
 
 class WateringAgent(WorkerAgent):
@@ -122,6 +127,13 @@ class WateringAgent(WorkerAgent):
     def __init__(self, unique_id, model):
         """Initialize the watering agent."""
         super().__init__(unique_id, model, "watering")
+        
+        # States that watering acts on; the model applies the transitions
+        self.task_handlers = {
+            CellState.SOWN: self._water,
+            CellState.NEED_WATER: self._water,
+            CellState.DISEASED: self._water,
+        }
     
     def execute_task(self):
         """
@@ -135,80 +147,26 @@ class WateringAgent(WorkerAgent):
         if not self.current_task:
             return
         
-        target_cell = self.current_task.target_cell
-        current_state = self.model.get_cell_state(target_cell)
-        attrs = self.model.get_cell_attributes(target_cell)
-        
         # Check weather - skip watering if rain is coming
-        if self.model.weather.get('rain_forecast_24h', False):
+        if self.model.weather.rain_forecast_24h:
             # Publish task completion with weather delay message
-            message = Message(
-                topic=TOPIC_TASK_COMPLETED,
-                sender_id=self.unique_id,
-                timestamp=self.model.step_count,
-                payload={
-                    'task_id': self.current_task.task_id,
-                    'cell_position': target_cell,
-                    'action': 'watering_delayed',
-                    'reason': 'rain_forecast'
-                }
-            )
-            self.model.message_bus.publish(TOPIC_TASK_COMPLETED, message)
+            self.publish_task_completed('watering_delayed', {'reason': 'rain_forecast'})
             return
         
         # Handle different cell states
-        if current_state == CellState.SOWN:
-            # Transition newly sown seeds to growing
-            self.model.set_cell_state(target_cell, CellState.GROWING)
-            new_water_level = min(1.0, attrs.get('water_level', 0.0) + 0.3)
-            self.model.update_cell_attributes(
-                target_cell,
-                water_level=new_water_level,
-                last_watered=self.model.step_count
-            )
-        
-        elif current_state == CellState.NEED_WATER:
-            # Water crops that need it
-            growth_progress = attrs.get('growth_progress', 0)
-            new_water_level = min(1.0, attrs.get('water_level', 0.0) + 0.3)
-            
-            # Transition based on growth progress
-            if growth_progress > 50 and new_water_level > 0.5:
-                self.model.set_cell_state(target_cell, CellState.HEALTHY)
-            else:
-                self.model.set_cell_state(target_cell, CellState.GROWING)
-            
-            self.model.update_cell_attributes(
-                target_cell,
-                water_level=new_water_level,
-                last_watered=self.model.step_count
-            )
-        
-        elif current_state == CellState.DISEASED:
-            # Water diseased crops (treatment)
-            new_water_level = min(1.0, attrs.get('water_level', 0.0) + 0.3)
-            self.model.update_cell_attributes(
-                target_cell,
-                water_level=new_water_level,
-                last_watered=self.model.step_count,
-                disease_probability=max(0.0, attrs.get('disease_probability', 0.0) - 0.2)
-            )
-            # Transition back to growing if water helps
-            if new_water_level > 0.6:
-                self.model.set_cell_state(target_cell, CellState.GROWING)
+        super().execute_task()
         
         # Publish task completion message
-        message = Message(
-            topic=TOPIC_TASK_COMPLETED,
-            sender_id=self.unique_id,
-            timestamp=self.model.step_count,
-            payload={
-                'task_id': self.current_task.task_id,
-                'cell_position': target_cell,
-                'action': 'watered'
-            }
-        )
-        self.model.message_bus.publish(TOPIC_TASK_COMPLETED, message)
+        self.publish_task_completed('watered')
+    
+    def _water(self, target_cell):
+        """
+        Water a cell through the model's batched watering update.
+        
+        Args:
+            target_cell: Grid position of the cell
+        """
+        self.model.water_cells([target_cell])
 
 
 class HarvestingAgent(WorkerAgent):
@@ -222,50 +180,36 @@ class HarvestingAgent(WorkerAgent):
     def __init__(self, unique_id, model):
         """Initialize the harvesting agent."""
         super().__init__(unique_id, model, "harvesting")
+        
+        # Only cells in READY_TO_HARVEST state can be harvested
+        self.task_handlers = {CellState.READY_TO_HARVEST: self._harvest}
     
-    def execute_task(self):
+    def _harvest(self, target_cell):
         """
-        Execute harvesting task at current position.
+        Collect a ready crop and reset the cell to its initial state.
         
-        Validates cell is ready for harvest, collects crop, and resets
-        cell to initial state.
+        Args:
+            target_cell: Grid position of the cell
         """
-        if not self.current_task:
-            return
+        model = self.model
         
-        target_cell = self.current_task.target_cell
-        current_state = self.model.get_cell_state(target_cell)
+        # Transition back to INITIAL state
+        model.set_cell_state(target_cell, CellState.INITIAL)
         
-        # Validate cell is ready for harvest
-        if current_state == CellState.READY_TO_HARVEST:
-            # Transition back to INITIAL state
-            self.model.set_cell_state(target_cell, CellState.INITIAL)
-            
-            # Reset cell attributes
-            self.model.update_cell_attributes(
-                target_cell,
-                water_level=0.0,
-                growth_progress=0,
-                disease_probability=0.0,
-                last_watered=0
-            )
-            
-            # Increment harvest counter
-            self.model.harvested_count += 1
-            
-            # Publish task completion message
-            message = Message(
-                topic=TOPIC_TASK_COMPLETED,
-                sender_id=self.unique_id,
-                timestamp=self.model.step_count,
-                payload={
-                    'task_id': self.current_task.task_id,
-                    'cell_position': target_cell,
-                    'action': 'harvested',
-                    'yield': 1
-                }
-            )
-            self.model.message_bus.publish(TOPIC_TASK_COMPLETED, message)
+        # Reset cell attributes
+        model.update_cell_attributes(
+            target_cell,
+            water_level=0.0,
+            growth_progress=0,
+            disease_probability=0.0,
+            last_watered=0
+        )
+        
+        # Increment harvest counter
+        model.harvested_count += 1
+        
+        # Publish task completion message
+        self.publish_task_completed('harvested', {'yield': 1})
 
 
 class DroneMonitoringAgent(WorkerAgent):
@@ -280,87 +224,90 @@ class DroneMonitoringAgent(WorkerAgent):
         """Initialize the drone monitoring agent."""
         super().__init__(unique_id, model, "drone")
         self.scan_interval = 15  # Scan every 15 steps (less frequent since disease is rare)
-        self.last_scan_step = 0
         self.scan_index = 0  # Track which cells have been scanned
-    
-    def step(self):
-        """
-        Execute monitoring cycle.
         
-        Overrides base step to implement periodic scanning behavior.
-        """
-        # Perform periodic scanning
-        if self.model.step_count - self.last_scan_step >= self.scan_interval:
-            self.scan_farm()
-            self.last_scan_step = self.model.step_count
+        # Vectorized generator for the scan's random factors, seeded from
+        # the model's RNG so reseeding the model reseeds the scan
+        self._rng = np.random.default_rng(self.random.getrandbits(64))
+        
+        # The model calls scan_farm on due steps, so the drone's own step
+        # does no per-tick interval check
+        model.register_periodic(self.scan_interval, self.scan_farm)
     
     def scan_farm(self):
         """
         Scan all grid cells for disease.
         
-        Calculates disease probability for each cell and transitions
-        cells to DISEASED state when probability exceeds threshold.
+        Walks the model's flat cell arrays one tile at a time so each tile's
+        inputs and temporaries stay cache-resident on large farms, skipping
+        tiles whose cells have not changed state since they last held no
+        crops. Transitions cells to DISEASED state when probability exceeds
+        threshold.
         """
-        for x in range(self.model.width):
-            for y in range(self.model.height):
-                cell_pos = (x, y)
-                self.scan_cell(cell_pos)
+        model = self.model
+        tile_cells = model.tile_cells
+        num_cells = model.cell_state_arr.size
+        for tile in np.flatnonzero(model.dirty_tiles).tolist():
+            start = tile * tile_cells
+            if not self._scan_block(start, min(start + tile_cells, num_cells)):
+                # Nothing to scan until a cell in the tile changes state again
+                model.dirty_tiles[tile] = False
     
-    def scan_cell(self, cell_pos):
+    def _scan_block(self, start: int, stop: int) -> bool:
         """
-        Scan a single cell for disease.
+        Scan one contiguous block of flat cell ids for disease.
         
         Args:
-            cell_pos: Grid position to scan
+            start: First flat cell id of the block
+            stop: Flat cell id one past the end of the block
+        
+        Returns:
+            True if the block held any crop cells to scan
         """
-        current_state = self.model.get_cell_state(cell_pos)
+        model = self.model
         
         # Only scan growing or healthy crops
-        if current_state not in [CellState.GROWING, CellState.HEALTHY, CellState.SOWN]:
-            return
+        idxs = np.flatnonzero(_SCANNED_STATE_LUT[model.cell_state_arr[start:stop]])
+        if not idxs.size:
+            return False
+        idxs += start
         
-        attrs = self.model.get_cell_attributes(cell_pos)
-        water_level = attrs.get('water_level', 0.5)
-        growth_progress = attrs.get('growth_progress', 0)
-        
-        # Calculate disease probability
-        # Base probability increases with low water and growth stage
-        # Disease should be rare - only 2-5% of crops get diseased
-        base_prob = 0.02  # Very low base (2%)
-        water_factor = (1.0 - water_level) * 0.15  # Low water impact
-        growth_factor = (growth_progress / 100.0) * 0.1  # Low growth impact
-        random_factor = random.random() * 0.1  # Small random factor
-        
-        disease_probability = base_prob + water_factor + growth_factor + random_factor
+        water_level = model.water_level_arr[idxs] * (1.0 / UNIT_SCALE)
+        disease_probability = _disease_kernel(
+            water_level, model.growth_progress_arr[idxs],
+            self._rng.random(idxs.size, dtype=np.float32)
+        )
         
         # Update disease probability in cell attributes
-        self.model.update_cell_attributes(
-            cell_pos,
-            disease_probability=disease_probability
-        )
+        model.update_disease_probabilities(idxs, disease_probability)
         
         # Transition to diseased if probability exceeds threshold
         # High threshold means disease is rare
-        if disease_probability > 0.85:  # Very high threshold - disease is rare
-            self.model.set_cell_state(cell_pos, CellState.DISEASED)
+        diseased = np.flatnonzero(disease_probability > 0.85)
+        for i in diseased.tolist():
+            idx = int(idxs[i])
+            cell_pos = (idx % model.width, idx // model.width)
+            model.set_cell_state(cell_pos, CellState.DISEASED)
             
             # Publish disease alert
-            message = Message(
-                topic=TOPIC_ALERT_DISEASE,
+            model.message_bus.publish_payload(
+                TOPIC_ALERT_DISEASE,
                 sender_id=self.unique_id,
-                timestamp=self.model.step_count,
+                timestamp=model.step_count,
                 payload={
                     'cell_position': cell_pos,
-                    'disease_probability': disease_probability,
-                    'water_level': water_level
+                    'disease_probability': float(disease_probability[i]),
+                    'water_level': float(water_level[i])
                 }
             )
-            self.model.message_bus.publish(TOPIC_ALERT_DISEASE, message)
+        
+        return True
     
     def execute_task(self):
         """
         Drone doesn't execute traditional tasks.
         
-        Monitoring is done in the step method instead.
+        Monitoring runs through scan_farm instead, which the model calls
+        every scan_interval steps via register_periodic.
         """
         pass
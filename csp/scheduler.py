@@ -2,18 +2,46 @@
 CSP-based task scheduler for FAI-Farm.
 
 Solves resource allocation and scheduling constraints using CSP techniques.
-Can integrate with OR-Tools CP-SAT solver for production use.
+Tasks are assigned greedily by priority. Schedulers created with
+use_cp_sat=True solve large batches with the OR-Tools CP-SAT solver
+instead, when it is installed.
 """
 
 from typing import List, Dict, Tuple, Optional, Set
 from dataclasses import dataclass
 from enum import Enum
-import sys
-import os
+import numpy as np
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model.cell_state import TaskType, _DATACLASS_OPTIONS
 
-from model.cell_state import TaskType
+try:
+    from ortools.sat.python import cp_model
+except ImportError:  # OR-Tools is optional
+    cp_model = None
+
+
+# Smallest task batch handed to CP-SAT; greedy is cheaper below this
+_CP_SAT_MIN_TASKS = 50
+
+# CP-SAT works in integers, so resource amounts are scaled by this factor
+_CP_SAT_RESOURCE_SCALE = 1000
+
+# Deterministic work budget for one CP-SAT solve; the best schedule found
+# so far is used when it runs out. Unlike a wall-clock limit this gives the
+# same answer on every run.
+_CP_SAT_DETERMINISTIC_TIME = 2.0
+
+# Fixed seed so CP-SAT explores the search space the same way on every run
+_CP_SAT_SEED = 0
+
+# Agent type that executes each task type
+_TASK_TO_AGENT = {
+    "PLOUGH": "ploughing",
+    "SOW": "sowing",
+    "WATER": "watering",
+    "HARVEST": "harvesting",
+    "MONITOR": "drone"
+}
 
 
 class ResourceType(Enum):
@@ -24,7 +52,11 @@ class ResourceType(Enum):
     TIME = "time"
 
 
-@dataclass
+# Position of each resource type in the scheduler's resource vectors
+_RESOURCE_INDEX = {resource_type: i for i, resource_type in enumerate(ResourceType)}
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class Resource:
     """Represents a constrained resource."""
     type: ResourceType
@@ -51,7 +83,7 @@ class Resource:
         self.available = min(self.max_capacity, self.available + amount)
 
 
-@dataclass
+@dataclass(frozen=True, **_DATACLASS_OPTIONS)
 class TaskAssignment:
     """Represents an assignment of a task to an agent at a time slot."""
     task_id: str
@@ -76,22 +108,41 @@ class CSPScheduler:
     - Priority-based assignment
     """
     
-    def __init__(self, time_horizon: int = 100):
+    def __init__(self, time_horizon: int = 100, use_cp_sat: bool = False):
         """
         Initialize the CSP scheduler.
         
         Args:
             time_horizon: Number of time slots to schedule over
+            use_cp_sat: Solve large task batches with OR-Tools CP-SAT when
+                it is installed, instead of greedy assignment
         """
         self.time_horizon = time_horizon
-        self.resources: Dict[ResourceType, Resource] = {}
+        self.use_cp_sat = use_cp_sat
         self.assignments: List[TaskAssignment] = []
-        self.agent_schedules: Dict[int, List[int]] = {}  # agent_id -> occupied time slots
+        self.agent_schedules: Dict[int, np.ndarray] = {}  # agent_id -> busy bitmap over time slots
+        self._first_free: Dict[int, int] = {}  # agent_id -> earliest unoccupied time slot
+        
+        # Available amount and capacity per resource, indexed by
+        # _RESOURCE_INDEX; NaN marks a resource that has not been added
+        self._available = np.full(len(ResourceType), np.nan)
+        self._capacity = np.full(len(ResourceType), np.nan)
         
         # Initialize default resources
-        self.resources[ResourceType.WATER] = Resource(ResourceType.WATER, 1000.0, 1000.0)
-        self.resources[ResourceType.FUEL] = Resource(ResourceType.FUEL, 500.0, 500.0)
-        self.resources[ResourceType.TOOLS] = Resource(ResourceType.TOOLS, 5.0, 5.0)
+        self.add_resource(ResourceType.WATER, 1000.0)
+        self.add_resource(ResourceType.FUEL, 500.0)
+        self.add_resource(ResourceType.TOOLS, 5.0)
+    
+    @property
+    def resources(self) -> Dict[ResourceType, Resource]:
+        """Snapshot of the defined resources as Resource records."""
+        return {
+            resource_type: Resource(
+                resource_type, float(self._available[i]), float(self._capacity[i])
+            )
+            for resource_type, i in _RESOURCE_INDEX.items()
+            if not np.isnan(self._capacity[i])
+        }
     
     def add_resource(self, resource_type: ResourceType, capacity: float):
         """
@@ -101,7 +152,9 @@ class CSPScheduler:
             resource_type: Type of resource
             capacity: Maximum capacity
         """
-        self.resources[resource_type] = Resource(resource_type, capacity, capacity)
+        i = _RESOURCE_INDEX[resource_type]
+        self._available[i] = capacity
+        self._capacity[i] = capacity
     
     def is_agent_available(self, agent_id: int, time_slot: int, duration: int) -> bool:
         """
@@ -115,13 +168,65 @@ class CSPScheduler:
         Returns:
             True if agent is available for entire duration
         """
-        if agent_id not in self.agent_schedules:
-            self.agent_schedules[agent_id] = []
+        busy = self.agent_schedules.get(agent_id)
+        return busy is None or not busy[time_slot:time_slot + duration].any()
+    
+    def find_first_slot(self, agent_id: int, duration: int) -> Optional[int]:
+        """
+        Find the earliest start slot where an agent is free for a duration.
+        
+        Args:
+            agent_id: Agent identifier
+            duration: Duration in time slots
+        
+        Returns:
+            Earliest feasible start slot within the horizon, or None
+        """
+        if duration <= 0:
+            return 0
+        if duration > self.time_horizon:
+            return None
+        
+        busy = self.agent_schedules.get(agent_id)
+        if busy is None:
+            # Agent has no bookings yet
+            return 0
         
-        occupied = set(self.agent_schedules[agent_id])
-        required = set(range(time_slot, time_slot + duration))
+        # No slot before the earliest free one can start a window
+        start = self._first_free.get(agent_id, 0)
+        busy = busy[start:self.time_horizon]
+        if busy.size < duration:
+            return None
+        if not busy[:duration].any():
+            # Common case: the earliest free slot opens a long enough gap
+            return start
         
-        return len(occupied.intersection(required)) == 0
+        # A start slot is feasible when its whole window is free
+        window_free = ~np.lib.stride_tricks.sliding_window_view(busy, duration).any(axis=1)
+        if not window_free.any():
+            return None
+        return start + int(np.argmax(window_free))
+    
+    def _busy_slots(self, agent_id: int, length: int = 0) -> np.ndarray:
+        """
+        Get an agent's busy bitmap, growing it to cover at least length slots.
+        
+        Args:
+            agent_id: Agent identifier
+            length: Minimum number of time slots the bitmap must cover
+        
+        Returns:
+            Boolean array with True for occupied time slots
+        """
+        size = max(self.time_horizon, length)
+        busy = self.agent_schedules.get(agent_id)
+        if busy is None:
+            busy = np.zeros(size, dtype=bool)
+            self.agent_schedules[agent_id] = busy
+        elif busy.size < size:
+            busy = np.concatenate([busy, np.zeros(size - busy.size, dtype=bool)])
+            self.agent_schedules[agent_id] = busy
+        return busy
     
     def check_resource_availability(
         self, 
@@ -136,12 +241,32 @@ class CSPScheduler:
         Returns:
             True if all resources available
         """
-        for resource_type, amount in requirements.items():
-            if resource_type not in self.resources:
-                return False
-            if self.resources[resource_type].available < amount:
-                return False
-        return True
+        return self._has_resources(*self._requirement_vectors(requirements))
+    
+    def _requirement_vectors(
+        self,
+        requirements: Dict[ResourceType, float]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Convert resource requirements to parallel index and amount vectors.
+        
+        Args:
+            requirements: Resource requirements
+        
+        Returns:
+            Tuple of (resource indices, required amounts)
+        """
+        count = len(requirements)
+        indices = np.fromiter(
+            (_RESOURCE_INDEX[resource_type] for resource_type in requirements),
+            dtype=np.intp, count=count
+        )
+        amounts = np.fromiter(requirements.values(), dtype=np.float64, count=count)
+        return indices, amounts
+    
+    def _has_resources(self, indices: np.ndarray, amounts: np.ndarray) -> bool:
+        """Check required amounts against availability (undefined resources fail)."""
+        return bool((self._available[indices] >= amounts).all())
     
     def assign_task(
         self,
@@ -175,7 +300,8 @@ class CSPScheduler:
             return False
         
         # Check resource availability
-        if not self.check_resource_availability(resource_requirements):
+        indices, amounts = self._requirement_vectors(resource_requirements)
+        if not self._has_resources(indices, amounts):
             return False
         
         # Create assignment
@@ -191,13 +317,21 @@ class CSPScheduler:
         )
         
         # Reserve agent time slots
-        if agent_id not in self.agent_schedules:
-            self.agent_schedules[agent_id] = []
-        self.agent_schedules[agent_id].extend(range(time_slot, time_slot + duration))
+        end = time_slot + duration
+        busy = self._busy_slots(agent_id, end)
+        busy[time_slot:end] = True
+        
+        # Advance the earliest free slot past the reservation and any
+        # bookings directly behind it
+        first_free = self._first_free.get(agent_id, 0)
+        if time_slot <= first_free < end:
+            free_after = np.flatnonzero(~busy[end:])
+            self._first_free[agent_id] = (
+                end + int(free_after[0]) if free_after.size else busy.size
+            )
         
         # Consume resources
-        for resource_type, amount in resource_requirements.items():
-            self.resources[resource_type].consume(amount)
+        self._available[indices] -= amounts
         
         # Add assignment
         self.assignments.append(assignment)
@@ -223,6 +357,14 @@ class CSPScheduler:
         # Sort tasks by priority (highest first)
         sorted_tasks = sorted(tasks, key=lambda t: t.get('priority', 0), reverse=True)
         
+        if (
+            self.use_cp_sat and cp_model is not None
+            and len(sorted_tasks) >= _CP_SAT_MIN_TASKS
+        ):
+            solved = self._schedule_with_cp_sat(sorted_tasks, agents)
+            if solved is not None:
+                return solved
+        
         successful_assignments = []
         
         for task in sorted_tasks:
@@ -234,45 +376,156 @@ class CSPScheduler:
             resources = task.get('resources', {})
             
             # Determine agent type needed
-            agent_type = self._get_agent_type_for_task(task_type)
+            agent_type = _TASK_TO_AGENT.get(task_type, "")
             
-            if agent_type not in agents:
+            agent_ids = agents.get(agent_type)
+            if not agent_ids:
                 continue
             
-            # Try to assign to any available agent of the correct type
-            assigned = False
-            for agent_id in agents[agent_type]:
-                # Try different time slots
-                for time_slot in range(self.time_horizon - duration + 1):
-                    if self.assign_task(
-                        task_id=task_id,
-                        agent_id=agent_id,
-                        agent_type=agent_type,
-                        time_slot=time_slot,
-                        duration=duration,
-                        target_cell=target_cell,
-                        resource_requirements=resources,
-                        priority=priority
-                    ):
-                        successful_assignments.append(self.assignments[-1])
-                        assigned = True
-                        break
+            # Assign to the first agent of the correct type with a free window
+            for agent_id in agent_ids:
+                time_slot = self.find_first_slot(agent_id, duration)
+                if time_slot is None:
+                    continue
+                
+                if self.assign_task(
+                    task_id=task_id,
+                    agent_id=agent_id,
+                    agent_type=agent_type,
+                    time_slot=time_slot,
+                    duration=duration,
+                    target_cell=target_cell,
+                    resource_requirements=resources,
+                    priority=priority
+                ):
+                    successful_assignments.append(self.assignments[-1])
                 
-                if assigned:
-                    break
+                # A failure here means resources are short, which no other
+                # agent or time slot can fix
+                break
         
         return successful_assignments
     
-    def _get_agent_type_for_task(self, task_type: str) -> str:
-        """Map task type to agent type."""
-        mapping = {
-            "PLOUGH": "ploughing",
-            "SOW": "sowing",
-            "WATER": "watering",
-            "HARVEST": "harvesting",
-            "MONITOR": "drone"
-        }
-        return mapping.get(task_type, "")
+    def _schedule_with_cp_sat(
+        self,
+        sorted_tasks: List[Dict],
+        agents: Dict[str, List[int]]
+    ) -> Optional[List[TaskAssignment]]:
+        """
+        Schedule tasks with the OR-Tools CP-SAT solver.
+        
+        Each task gets an optional interval per eligible agent, at most one
+        of which is chosen. Intervals on the same agent may not overlap each
+        other or the agent's existing bookings, and total resource use may not
+        exceed what is available. Priority levels are solved
+        lexicographically, highest first: each solve maximizes the number of
+        tasks scheduled at one level while keeping the counts already fixed
+        for higher levels, so a higher-priority task is never dropped in
+        favour of lower-priority ones.
+        
+        Args:
+            sorted_tasks: Task dictionaries sorted by priority (highest first)
+            agents: Dictionary mapping agent_type to list of agent_ids
+        
+        Returns:
+            List of successful task assignments, or None if no solution was found
+        """
+        model = cp_model.CpModel()
+        horizon = self.time_horizon
+        agent_intervals: Dict[int, list] = {}
+        resource_terms: Dict[int, list] = {}
+        choices = []  # (task, agent_type, [(agent_id, chosen, start)])
+        by_priority: Dict[int, list] = {}  # priority -> assignment variables
+        
+        for n, task in enumerate(sorted_tasks):
+            agent_type = _TASK_TO_AGENT.get(task['task_type'], "")
+            agent_ids = agents.get(agent_type)
+            duration = task.get('duration', 1)
+            if not agent_ids or duration > horizon:
+                continue
+            
+            # Tasks needing a resource that was never added cannot run
+            indices, amounts = self._requirement_vectors(task.get('resources', {}))
+            if np.isnan(self._capacity[indices]).any():
+                continue
+            
+            options = []
+            for agent_id in agent_ids:
+                chosen = model.NewBoolVar(f"x_{n}_{agent_id}")
+                start = model.NewIntVar(0, horizon - duration, f"s_{n}_{agent_id}")
+                interval = model.NewOptionalFixedSizeIntervalVar(
+                    start, duration, chosen, f"i_{n}_{agent_id}"
+                )
+                agent_intervals.setdefault(agent_id, []).append(interval)
+                options.append((agent_id, chosen, start))
+            
+            assigned = [chosen for _, chosen, _ in options]
+            model.AddAtMostOne(assigned)
+            
+            for i, amount in zip(indices.tolist(), amounts.tolist()):
+                scaled = round(amount * _CP_SAT_RESOURCE_SCALE)
+                resource_terms.setdefault(i, []).extend(scaled * x for x in assigned)
+            
+            by_priority.setdefault(task.get('priority', 50), []).extend(assigned)
+            choices.append((task, agent_type, options))
+        
+        if not choices:
+            return []
+        
+        # Agents cannot overlap themselves or their existing bookings
+        for agent_id, intervals in agent_intervals.items():
+            busy = self.agent_schedules.get(agent_id)
+            if busy is not None:
+                # Start and end slots of each run of booked slots
+                padded = np.concatenate(([0], busy[:horizon].view(np.int8), [0]))
+                edges = np.flatnonzero(np.diff(padded))
+                for start, end in zip(edges[::2].tolist(), edges[1::2].tolist()):
+                    intervals.append(
+                        model.NewFixedSizeIntervalVar(start, end - start, f"busy_{agent_id}_{start}")
+                    )
+            model.AddNoOverlap(intervals)
+        
+        # Consumable resources are limited by what remains available
+        for i, terms in resource_terms.items():
+            capacity = round(self._available[i] * _CP_SAT_RESOURCE_SCALE)
+            model.Add(sum(terms) <= capacity)
+        
+        solver = cp_model.CpSolver()
+        solver.parameters.num_search_workers = 1
+        solver.parameters.random_seed = _CP_SAT_SEED
+        solver.parameters.max_deterministic_time = _CP_SAT_DETERMINISTIC_TIME
+        # A single worker only bounds the objective by the at-most-one
+        # constraints with the full LP relaxation
+        solver.parameters.linearization_level = 2
+        
+        for priority in sorted(by_priority, reverse=True):
+            level = sum(by_priority[priority])
+            model.Maximize(level)
+            status = solver.Solve(model)
+            if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                return None
+            # Later levels may not schedule fewer tasks at this one
+            model.Add(level >= round(solver.ObjectiveValue()))
+        
+        successful_assignments = []
+        for task, agent_type, options in choices:
+            for agent_id, chosen, start in options:
+                if not solver.Value(chosen):
+                    continue
+                if self.assign_task(
+                    task_id=task['task_id'],
+                    agent_id=agent_id,
+                    agent_type=agent_type,
+                    time_slot=solver.Value(start),
+                    duration=task.get('duration', 1),
+                    target_cell=task['target_cell'],
+                    resource_requirements=task.get('resources', {}),
+                    priority=task.get('priority', 50)
+                ):
+                    successful_assignments.append(self.assignments[-1])
+                break
+        
+        return successful_assignments
     
     def get_schedule_metrics(self) -> Dict:
         """
@@ -292,15 +545,17 @@ class CSPScheduler:
         makespan = max(a.time_slot + a.duration for a in self.assignments)
         
         # Calculate resource utilization
-        resource_util = {}
-        for res_type, resource in self.resources.items():
-            utilization = (resource.max_capacity - resource.available) / resource.max_capacity
-            resource_util[res_type.value] = utilization
+        utilization = (self._capacity - self._available) / self._capacity
+        resource_util = {
+            res_type.value: float(utilization[i])
+            for res_type, i in _RESOURCE_INDEX.items()
+            if not np.isnan(self._capacity[i])
+        }
         
         # Calculate agent utilization
         agent_util = {}
-        for agent_id, slots in self.agent_schedules.items():
-            utilization = len(set(slots)) / self.time_horizon
+        for agent_id, busy in self.agent_schedules.items():
+            utilization = int(busy.sum()) / self.time_horizon
             agent_util[agent_id] = utilization
         
         return {
@@ -314,10 +569,10 @@ class CSPScheduler:
         """Reset the scheduler to initial state."""
         self.assignments = []
         self.agent_schedules = {}
+        self._first_free = {}
         
         # Replenish all resources
-        for resource in self.resources.values():
-            resource.available = resource.max_capacity
+        np.copyto(self._available, self._capacity)
     
     def export_schedule(self, filename: str):
         """
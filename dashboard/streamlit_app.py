@@ -6,18 +6,30 @@ the farm simulation with real-time metrics and visualizations.
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
+import plotly.io as pio
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import gzip
+import io
 import sys
 import os
-import time
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from model.farm_model import FarmModel
-from model.cell_state import CellState
+from model.cell_state import AgentStatus, CellState
+
+
+# Serialize figures with orjson when it is installed; Plotly's default
+# JSON encoder is pure Python
+try:
+    import orjson
+    pio.json.config.default_engine = "orjson"
+except ImportError:
+    pass
 
 
 # Page configuration
@@ -39,6 +51,44 @@ COLORS = {
     'card': '#FFFFFF'
 }
 
+# Columns of the agent status table
+AGENT_TABLE_COLUMNS = ['Agent', 'Type', 'Position', 'Status', 'Tasks Assigned', 'Current Task']
+
+# Seconds between progress refreshes while steps run in the background
+STEP_POLL_INTERVAL = 0.2
+
+# Metrics recorded per step; the history buffer stores one contiguous
+# array per metric, indexed by recorded step
+METRIC_COLUMNS = ['step', 'ploughed', 'sown', 'growing', 'healthy', 'diseased', 'ready', 'harvested']
+
+# Initial number of rows allocated for the metrics history buffer
+METRICS_INITIAL_ROWS = 1024
+
+# Most steps kept in the metrics history; older rows are dropped so a
+# long-lived session's memory stays bounded
+METRICS_MAX_ROWS = 10000
+
+# Rows converted and written per batch when exporting the metrics CSV
+CSV_EXPORT_CHUNK_ROWS = 10000
+
+# Most points plotted per metrics trace; longer histories are downsampled
+MAX_CHART_POINTS = 2000
+
+# Grid cell RGB color lookup table, indexed by CellState value
+CELL_STATE_RGB = np.array([
+    [0xE8, 0xE8, 0xE8],  # INITIAL
+    [0x8B, 0x45, 0x13],  # PLOUGHED
+    [0xD2, 0xB4, 0x8C],  # SOWN
+    [0x90, 0xEE, 0x90],  # GROWING
+    [0xFF, 0xD7, 0x00],  # NEED_WATER
+    [0x22, 0x8B, 0x22],  # HEALTHY
+    [0xDC, 0x14, 0x3C],  # DISEASED
+    [0xFF, 0xA5, 0x00]   # READY_TO_HARVEST
+], dtype=np.uint8)
+
+# Grid cell hover labels, indexed by CellState value
+CELL_STATE_NAMES = np.array([state.name for state in CellState])
+
 # Custom CSS for professional styling
 st.markdown("""
 <style>
@@ -110,6 +160,159 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+# Static text of the methodology and feature expanders, built once at import
+METHODOLOGY_WEATHER = """
+Initial Values (at start):
+  Temperature: 25.0°C
+  Humidity: 60.0%
+  Rain Forecast: False (No rain)
+  Wind Speed: 10.0 km/h
+
+Update Frequency: Every 5 simulation steps
+
+Temperature Update:
+  New = Current + random(-2, +2)°C
+  Range: 20-35°C
+  
+Humidity Update:
+  New = Current + random(-5, +5)%
+  Range: 40-90%
+  
+Rain Forecast:
+  Probability: 10% chance per update
+  Random check each update
+  
+Wind Speed Update:
+  New = Current + random(-3, +3) km/h
+  Range: 5-40 km/h
+"""
+
+METHODOLOGY_WATER_STRESS = """
+Condition: water_level < 0.3 (30%)
+
+For each crop cell:
+  IF water_level < 0.3:
+    Count as water-stressed
+    
+Percentage = (water_stressed / total_crops) × 100
+"""
+
+METHODOLOGY_TEMPERATURE_STRESS = """
+Condition: temperature > 32°C AND water_level < 0.5
+
+For each crop cell:
+  IF temperature > 32 AND water_level < 0.5:
+    Count as temperature-stressed
+    
+Percentage = (temp_stressed / total_crops) × 100
+"""
+
+METHODOLOGY_HEALTH_SCORE = """
+Formula: ((total_crops - stressed_crops) / total_crops) × 100
+
+Where:
+  stressed_crops = water_stressed + temperature_stressed
+  
+Interpretation:
+  80-100% = Excellent
+  60-79%  = Fair
+  40-59%  = Poor
+  <40%    = Critical
+"""
+
+METHODOLOGY_YIELD_FACTORS = """
+Healthy Crops:  1.0 yield per cell (100%)
+Growing Crops:  0.7 yield per cell (70%)
+Diseased Crops: 0.3 yield per cell (30%)
+Ready Crops:    1.0 yield per cell (100%)
+"""
+
+ABOUT_CSP_SCHEDULER = """
+Resource Management:
+- Water: 1000L capacity
+- Fuel: 500L capacity
+- Tools: 5 units available
+
+Constraint Types:
+- Agent availability (prevents double-booking)
+- Resource capacity limits
+- Task time windows
+- Task precedence relationships
+- Priority-based allocation
+"""
+
+ABOUT_PDDL_PLANNER = """
+Available Actions:
+1. move(agent, from_location, to_location)
+2. plough(agent, plot)
+3. sow(agent, plot, crop_type)
+4. water(agent, plot)
+5. scan(drone, plot)
+6. harvest(agent, plot)
+
+Planning Domain:
+- Preconditions and effects defined
+- Goal-oriented task generation
+- Optimal action sequencing
+"""
+
+ABOUT_RULE_ENGINE = """
+Sample Production Rules:
+
+Disease Detection:
+- IF humidity > 80% AND leaf_spots_present 
+  THEN diagnose_leaf_spot_disease
+  
+Resource Management:
+- IF water_level < 0.3 AND crop_growing 
+  THEN schedule_watering_task
+  
+Harvest Readiness:
+- IF growth_percentage >= 100% 
+  THEN mark_ready_for_harvest
+  
+Health Monitoring:
+- IF temperature > 35 AND humidity < 40
+  THEN increase_irrigation_frequency
+"""
+
+
+# Automated recommendation rules as (condition, message) pairs; conditions
+# take (stress, weather, yield_pred) and messages are formatted with them
+# only when the rule fires
+RECOMMENDATION_RULES = [
+    (lambda stress, weather, yield_pred: stress['water_stress_percentage'] > 30,
+     "**High water stress detected** - Increase irrigation frequency"),
+    (lambda stress, weather, yield_pred: stress['temperature_stress_percentage'] > 20,
+     "**Temperature stress alert** - Consider shade nets or cooling measures"),
+    (lambda stress, weather, yield_pred: weather.rain_forecast_24h,
+     "**Rain forecasted** - Irrigation automatically delayed to conserve water"),
+    (lambda stress, weather, yield_pred: weather.temperature > 32,
+     "**High temperature warning** - Monitor crops closely for heat stress"),
+    (lambda stress, weather, yield_pred: yield_pred['at_risk_crops'] > 5,
+     "**Disease alert** - {yield_pred[at_risk_crops]} crops at risk, apply treatment"),
+]
+
+
+def get_recommendations(stress, weather, yield_pred):
+    """
+    Evaluate the recommendation rules.
+    
+    Args:
+        stress: Stress indicators from the model
+        weather: Current weather
+        yield_pred: Yield prediction from the model
+    
+    Returns:
+        Messages of the rules that fired, in rule order
+    """
+    return [
+        message.format(stress=stress, weather=weather, yield_pred=yield_pred)
+        for condition, message in RECOMMENDATION_RULES
+        if condition(stress, weather, yield_pred)
+    ]
+
+
 def initialize_session_state():
     """Initialize Streamlit session state variables."""
     if 'model' not in st.session_state:
@@ -118,8 +321,20 @@ def initialize_session_state():
         st.session_state.running = False
     if 'step_count' not in st.session_state:
         st.session_state.step_count = 0
-    if 'metrics_history' not in st.session_state:
-        st.session_state.metrics_history = []
+    if 'metrics_arr' not in st.session_state:
+        reset_metrics_history()
+    if 'step_executor' not in st.session_state:
+        # Single worker so step batches on one model never overlap
+        st.session_state.step_executor = ThreadPoolExecutor(max_workers=1)
+        st.session_state.step_job = None
+
+
+def reset_metrics_history():
+    """Clear the metrics history buffer."""
+    st.session_state.metrics_arr = np.zeros((len(METRIC_COLUMNS), METRICS_INITIAL_ROWS), dtype=np.int32)
+    st.session_state.metrics_len = 0
+    st.session_state.metrics_fig = None
+    st.session_state.metrics_fig_len = 0
 
 
 def create_model(width, height):
@@ -127,46 +342,139 @@ def create_model(width, height):
     return FarmModel(width=width, height=height, num_workers=6)
 
 
+def get_metrics_row(model):
+    """Extract current metrics from the model in METRIC_COLUMNS order."""
+    counts = model.count_all_states().tolist()
+    return (
+        model.step_count,
+        counts[CellState.PLOUGHED.value],
+        counts[CellState.SOWN.value],
+        counts[CellState.GROWING.value],
+        counts[CellState.HEALTHY.value],
+        counts[CellState.DISEASED.value],
+        counts[CellState.READY_TO_HARVEST.value],
+        model.harvested_count
+    )
+
+
 def get_current_metrics(model):
     """Extract current metrics from the model."""
-    return {
-        'step': model.step_count,
-        'ploughed': model.count_cells_by_state(CellState.PLOUGHED),
-        'sown': model.count_cells_by_state(CellState.SOWN),
-        'growing': model.count_cells_by_state(CellState.GROWING),
-        'healthy': model.count_cells_by_state(CellState.HEALTHY),
-        'diseased': model.count_cells_by_state(CellState.DISEASED),
-        'ready': model.count_cells_by_state(CellState.READY_TO_HARVEST),
-        'harvested': model.harvested_count
-    }
+    return dict(zip(METRIC_COLUMNS, get_metrics_row(model)))
+
+
+def record_steps(rows):
+    """
+    Record completed simulation steps in session state in one update.
+    
+    Args:
+        rows: One metrics row per completed step, in METRIC_COLUMNS order
+    """
+    append_metrics_rows(rows)
+    st.session_state.step_count += len(rows)
+
+
+def append_metrics_rows(rows):
+    """
+    Append metrics rows to the history buffer.
+    
+    Each row is scattered across the per-metric columns. Once the history
+    holds METRICS_MAX_ROWS steps, the oldest steps are dropped to make room.
+    
+    Args:
+        rows: Sequence of rows in METRIC_COLUMNS order
+    """
+    arr = st.session_state.metrics_arr
+    n = st.session_state.metrics_len
+    end = n + len(rows)
+    if end > METRICS_MAX_ROWS:
+        # Shift the newest steps that still fit to the front
+        rows = np.asarray(rows)[-METRICS_MAX_ROWS:]
+        keep = METRICS_MAX_ROWS - len(rows)
+        arr[:, :keep] = arr[:, n - keep:n]
+        n = keep
+        end = METRICS_MAX_ROWS
+    if end > arr.shape[1]:
+        # Double the buffer until the rows fit, up to the history cap
+        size = arr.shape[1]
+        while size < end:
+            size *= 2
+        size = min(size, METRICS_MAX_ROWS)
+        grown = np.zeros((len(METRIC_COLUMNS), size), dtype=np.int32)
+        grown[:, :n] = arr[:, :n]
+        st.session_state.metrics_arr = arr = grown
+    arr[:, n:end] = np.asarray(rows).T
+    st.session_state.metrics_len = end
+
+
+def run_steps(model, steps, progress):
+    """
+    Step the model off the Streamlit script thread.
+    
+    Args:
+        model: FarmModel to step
+        steps: Number of steps to run
+        progress: One-element list updated with the steps completed so far
+    
+    Returns:
+        Array with one metrics row per step, in METRIC_COLUMNS order
+    """
+    rows = np.empty((steps, len(METRIC_COLUMNS)), dtype=np.int32)
+    for i in range(steps):
+        model.step()
+        rows[i] = get_metrics_row(model)
+        progress[0] = i + 1
+    return rows
+
+
+def get_metrics_frame():
+    """Return the recorded metrics history as a DataFrame."""
+    n = st.session_state.metrics_len
+    return pd.DataFrame(dict(zip(METRIC_COLUMNS, st.session_state.metrics_arr[:, :n])))
+
 
+@st.cache_data(max_entries=4, show_spinner=False)
+def build_metrics_csv(rows):
+    """
+    Serialize metrics rows to gzip-compressed CSV without building a DataFrame.
+    
+    Cached on the row contents, so reruns that leave the history
+    unchanged reuse the previous bytes.
+    
+    Args:
+        rows: Array of metrics rows in METRIC_COLUMNS order
+    
+    Returns:
+        Gzipped UTF-8 CSV bytes with a header row
+    """
+    buffer = io.BytesIO()
+    # Fixed mtime keeps the output identical for identical histories
+    compressed = gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=5, mtime=0)
+    text = io.TextIOWrapper(compressed, encoding='utf-8', newline='')
+    writer = csv.writer(text, lineterminator='\n')
+    writer.writerow(METRIC_COLUMNS)
+    for start in range(0, len(rows), CSV_EXPORT_CHUNK_ROWS):
+        writer.writerows(rows[start:start + CSV_EXPORT_CHUNK_ROWS].tolist())
+    # Closing the text wrapper closes the gzip stream but not the buffer
+    text.close()
+    return buffer.getvalue()
 
-def create_farm_grid_plot(model):
-    """Create a heatmap visualization of the farm grid."""
-    # Create state matrix
-    state_matrix = []
-    for y in range(model.height):
-        row = []
-        for x in range(model.width):
-            state = model.get_cell_state((x, y))
-            row.append(state.value)
-        state_matrix.append(row)
-    
-    # Create heatmap
-    fig = go.Figure(data=go.Heatmap(
-        z=state_matrix,
-        colorscale=[
-            [0, '#E8E8E8'],  # INITIAL
-            [0.14, '#8B4513'],  # PLOUGHED
-            [0.28, '#D2B48C'],  # SOWN
-            [0.42, '#90EE90'],  # GROWING
-            [0.57, '#FFD700'],  # NEED_WATER
-            [0.71, '#228B22'],  # HEALTHY
-            [0.85, '#DC143C'],  # DISEASED
-            [1, '#FFA500']   # READY_TO_HARVEST
-        ],
-        showscale=False,
-        hovertemplate='X: %{x}<br>Y: %{y}<br>State: %{z}<extra></extra>'
+
+@st.cache_data(max_entries=8)
+def create_farm_grid_plot(state_grid):
+    """
+    Create a heatmap visualization of the farm grid.
+    
+    Cached on the grid contents, so reruns that leave the farm unchanged
+    reuse the figure.
+    
+    Args:
+        state_grid: (height, width) array of CellState values
+    """
+    # Render the grid as a single raster image rather than one shape per cell
+    fig = go.Figure(data=go.Image(
+        z=CELL_STATE_RGB[state_grid],
+        hovertext=CELL_STATE_NAMES[state_grid],
+        hovertemplate='X: %{x}<br>Y: %{y}<br>State: %{hovertext}<extra></extra>'
     ))
     
     fig.update_layout(
@@ -180,12 +488,69 @@ def create_farm_grid_plot(model):
     return fig
 
 
-def create_metrics_chart(metrics_history):
-    """Create time-series chart of key metrics."""
-    if not metrics_history:
+def lttb_indices(x, y, n_out):
+    """
+    Select points to plot with Largest-Triangle-Three-Buckets downsampling.
+    
+    Keeps the first and last points and, from each of n_out - 2 equal
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the mean of the next bucket, preserving the
+    visual shape of the series.
+    
+    Args:
+        x: Sorted x values
+        y: y values
+        n_out: Number of points to keep
+    
+    Returns:
+        Sorted indices of the points to keep
+    """
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+    
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+        
+        # Twice the triangle area for each candidate in the bucket
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:stop] - y[a])
+            - (x[a] - x[start:stop]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    
+    return selected
+
+
+def lttb_series(df, column):
+    """Return (step, value) arrays of a metrics column, downsampled for plotting."""
+    x = df['step'].to_numpy()
+    y = df[column].to_numpy()
+    keep = lttb_indices(x, y, MAX_CHART_POINTS)
+    return x[keep], y[keep]
+
+
+@st.cache_data(max_entries=4)
+def create_metrics_chart(df):
+    """Create time-series chart of key metrics (cached on the history contents)."""
+    if df.empty:
         return None
     
-    df = pd.DataFrame(metrics_history)
+    # Imported on first use; the subplot helpers are only needed once
+    # the metrics tab has history to chart
+    from plotly.subplots import make_subplots
     
     fig = make_subplots(
         rows=2, cols=2,
@@ -194,39 +559,45 @@ def create_metrics_chart(metrics_history):
     )
     
     # Cell states
+    x, y = lttb_series(df, 'ploughed')
     fig.add_trace(
-        go.Scatter(x=df['step'], y=df['ploughed'], name='Ploughed', 
+        go.Scatter(x=x, y=y, name='Ploughed', 
                   line=dict(color='#8B4513')),
         row=1, col=1
     )
+    x, y = lttb_series(df, 'sown')
     fig.add_trace(
-        go.Scatter(x=df['step'], y=df['sown'], name='Sown',
+        go.Scatter(x=x, y=y, name='Sown',
                   line=dict(color='#D2B48C')),
         row=1, col=1
     )
     
     # Crop health
+    x, y = lttb_series(df, 'growing')
     fig.add_trace(
-        go.Scatter(x=df['step'], y=df['growing'], name='Growing',
+        go.Scatter(x=x, y=y, name='Growing',
                   line=dict(color='#90EE90')),
         row=1, col=2
     )
+    x, y = lttb_series(df, 'healthy')
     fig.add_trace(
-        go.Scatter(x=df['step'], y=df['healthy'], name='Healthy',
+        go.Scatter(x=x, y=y, name='Healthy',
                   line=dict(color='#228B22')),
         row=1, col=2
     )
     
     # Harvest progress
+    x, y = lttb_series(df, 'harvested')
     fig.add_trace(
-        go.Scatter(x=df['step'], y=df['harvested'], name='Harvested',
+        go.Scatter(x=x, y=y, name='Harvested',
                   line=dict(color='#FFA500'), fill='tozeroy'),
         row=2, col=1
     )
     
     # Disease incidents
+    x, y = lttb_series(df, 'diseased')
     fig.add_trace(
-        go.Scatter(x=df['step'], y=df['diseased'], name='Diseased',
+        go.Scatter(x=x, y=y, name='Diseased',
                   line=dict(color='#DC143C'), fill='tozeroy'),
         row=2, col=2
     )
@@ -238,30 +609,106 @@ def create_metrics_chart(metrics_history):
     return fig
 
 
+def get_metrics_chart():
+    """
+    Get the metrics chart, extending the persisted figure with new steps.
+    
+    While the history fits within MAX_CHART_POINTS, steps recorded since
+    the last render are appended to the existing traces instead of the
+    figure being rebuilt; longer histories are rebuilt downsampled.
+    
+    Returns:
+        Plotly figure of the recorded metrics
+    """
+    n = st.session_state.metrics_len
+    fig = st.session_state.metrics_fig
+    plotted = st.session_state.metrics_fig_len
+    
+    if fig is None or n > MAX_CHART_POINTS:
+        fig = create_metrics_chart(get_metrics_frame())
+    elif n > plotted:
+        new_steps = st.session_state.metrics_arr[:, plotted:n]
+        with fig.batch_update():
+            for trace in fig.data:
+                # Trace names are the capitalized metric column names
+                column = METRIC_COLUMNS.index(trace.name.lower())
+                trace.x = np.concatenate((trace.x, new_steps[0]))
+                trace.y = np.concatenate((trace.y, new_steps[column]))
+    
+    st.session_state.metrics_fig = fig
+    st.session_state.metrics_fig_len = n
+    return fig
+
+
 def create_agent_status_table(model):
-    """Create a table showing agent statuses."""
-    agent_data = []
-    
-    # Master agent
-    agent_data.append({
-        'Agent': 'Master Agent',
-        'Type': 'Coordinator',
-        'Position': f"{model.master_agent.pos}",
-        'Status': 'Active',
-        'Tasks Assigned': len(model.master_agent.assigned_tasks)
-    })
-    
-    # Worker agents
-    for agent in model.worker_agents:
-        agent_data.append({
-            'Agent': f'{agent.agent_type.title()} Agent',
-            'Type': agent.agent_type,
-            'Position': f"{agent.pos}",
-            'Status': agent.status.value,
-            'Current Task': agent.current_task.task_id if agent.current_task else 'None'
-        })
-    
-    return pd.DataFrame(agent_data)
+    """
+    Get a table showing agent statuses.
+    
+    The table is built once per model and kept in session state; each call
+    only refreshes the columns that change as the simulation runs.
+    """
+    table = st.session_state.get('agent_table')
+    if table is None or table[0] is not model:
+        # Master agent first, then the worker agents
+        rows = [('Master Agent', 'Coordinator', None, 'Active', None, None)]
+        for agent in model.worker_agents:
+            rows.append((f'{agent.agent_type.title()} Agent', agent.agent_type, None, None, None, None))
+        table = (model, pd.DataFrame(rows, columns=AGENT_TABLE_COLUMNS))
+        st.session_state.agent_table = table
+    
+    df = table[1]
+    workers = model.worker_agents
+    df['Position'] = [f"{model.master_agent.pos}"] + [f"{agent.pos}" for agent in workers]
+    df.loc[1:, 'Status'] = [agent.status.value for agent in workers]
+    df.at[0, 'Tasks Assigned'] = len(model.master_agent.assigned_tasks)
+    df.loc[1:, 'Current Task'] = [
+        agent.current_task.task_id if agent.current_task else 'None' for agent in workers
+    ]
+    return df
+
+
+@st.fragment
+def render_step_controls():
+    """
+    Render the step controls.
+    
+    Runs as a fragment, so editing the step count reruns only this block.
+    Step batches run in the background; the full page is rerun once they
+    finish to show the new state.
+    """
+    busy = st.session_state.step_job is not None
+    
+    if st.button("Step Forward", use_container_width=True, disabled=busy):
+        model = st.session_state.model
+        if model:
+            model.step()
+            record_steps([get_metrics_row(model)])
+            st.rerun()
+    
+    steps_to_run = st.number_input("Steps to Execute", 1, 1000, 10, disabled=busy)
+    if st.button(f"Run {steps_to_run} Steps", use_container_width=True, disabled=busy):
+        if st.session_state.model:
+            progress = [0]
+            future = st.session_state.step_executor.submit(
+                run_steps, st.session_state.model, steps_to_run, progress
+            )
+            st.session_state.step_job = (future, steps_to_run, progress)
+            st.rerun()
+
+
+@st.fragment(run_every=STEP_POLL_INTERVAL)
+def render_step_progress():
+    """Poll the background step batch, recording its metrics once done."""
+    job = st.session_state.step_job
+    if job is None:
+        return
+    
+    future, steps, progress = job
+    st.progress(progress[0] / steps, text=f"Running step {progress[0]} of {steps}")
+    if future.done():
+        st.session_state.step_job = None
+        record_steps(future.result())
+        st.rerun()
 
 
 def main():
@@ -284,10 +731,11 @@ def main():
         grid_height = st.slider("Grid Height", 10, 50, 20)
         
         # Initialize/Reset button
-        if st.button("Initialize / Reset Simulation", use_container_width=True, type="primary"):
+        if st.button("Initialize / Reset Simulation", use_container_width=True, type="primary",
+                     disabled=st.session_state.step_job is not None):
             st.session_state.model = create_model(grid_width, grid_height)
             st.session_state.step_count = 0
-            st.session_state.metrics_history = []
+            reset_metrics_history()
             st.session_state.running = False
             st.success("Simulation initialized successfully")
         
@@ -308,26 +756,9 @@ def main():
             if st.button("Pause", use_container_width=True):
                 st.session_state.running = False
         
-        if st.button("Step Forward", use_container_width=True):
-            if st.session_state.model:
-                st.session_state.model.step()
-                st.session_state.step_count += 1
-                metrics = get_current_metrics(st.session_state.model)
-                st.session_state.metrics_history.append(metrics)
-                st.rerun()
-        
-        steps_to_run = st.number_input("Steps to Execute", 1, 1000, 10)
-        if st.button(f"Run {steps_to_run} Steps", use_container_width=True):
-            if st.session_state.model:
-                progress_bar = st.progress(0)
-                for i in range(steps_to_run):
-                    st.session_state.model.step()
-                    st.session_state.step_count += 1
-                    metrics = get_current_metrics(st.session_state.model)
-                    st.session_state.metrics_history.append(metrics)
-                    progress_bar.progress((i + 1) / steps_to_run)
-                st.success(f"Completed {steps_to_run} steps")
-                st.rerun()
+        render_step_controls()
+        if st.session_state.step_job is not None:
+            render_step_progress()
         
         st.markdown("---")
         
@@ -342,6 +773,11 @@ def main():
         st.caption("FAI-Farm Multi-Agent System v2.0")
     
     # Main content
+    if st.session_state.step_job is not None:
+        # The model is being stepped in the background; don't read it mid-step
+        st.info("Running simulation steps in the background...")
+        return
+    
     if st.session_state.model is None:
         st.info("Initialize the simulation using the sidebar controls to begin")
         
@@ -383,38 +819,14 @@ def main():
             **Weather is simulated internally** (not from external API) with realistic variations:
             """)
             
-            st.code("""
-Initial Values (at start):
-  Temperature: 25.0°C
-  Humidity: 60.0%
-  Rain Forecast: False (No rain)
-  Wind Speed: 10.0 km/h
-
-Update Frequency: Every 5 simulation steps
-
-Temperature Update:
-  New = Current + random(-2, +2)°C
-  Range: 20-35°C
-  
-Humidity Update:
-  New = Current + random(-5, +5)%
-  Range: 40-90%
-  
-Rain Forecast:
-  Probability: 10% chance per update
-  Random check each update
-  
-Wind Speed Update:
-  New = Current + random(-3, +3) km/h
-  Range: 5-40 km/h
-            """)
+            st.code(METHODOLOGY_WEATHER)
             
             st.markdown(f"""
             **Current Weather State:**
-            - Temperature: {weather['temperature']:.1f}°C (Range: 20-35°C)
-            - Humidity: {weather['humidity']:.0f}% (Range: 40-90%)
-            - Rain Forecast: {'Yes' if weather['rain_forecast_24h'] else 'No'} (10% probability)
-            - Wind Speed: {weather['wind_speed']:.1f} km/h (Range: 5-40 km/h)
+            - Temperature: {weather.temperature:.1f}°C (Range: 20-35°C)
+            - Humidity: {weather.humidity:.0f}% (Range: 40-90%)
+            - Rain Forecast: {'Yes' if weather.rain_forecast_24h else 'No'} (10% probability)
+            - Wind Speed: {weather.wind_speed:.1f} km/h (Range: 5-40 km/h)
             - Last Update: Step {(st.session_state.model.step_count // 5) * 5}
             - Next Update: Step {((st.session_state.model.step_count // 5) + 1) * 5}
             """)
@@ -422,11 +834,11 @@ Wind Speed Update:
         col1, col2, col3, col4, col5 = st.columns(5)
         
         with col1:
-            st.metric("Temperature", f"{weather['temperature']:.1f}°C")
+            st.metric("Temperature", f"{weather.temperature:.1f}°C")
         with col2:
-            st.metric("Humidity", f"{weather['humidity']:.0f}%")
+            st.metric("Humidity", f"{weather.humidity:.0f}%")
         with col3:
-            st.metric("Rain Forecast", "Yes" if weather['rain_forecast_24h'] else "No")
+            st.metric("Rain Forecast", "Yes" if weather.rain_forecast_24h else "No")
         with col4:
             st.metric("Estimated Yield", f"{yield_pred['estimated_yield']:.1f} units")
         with col5:
@@ -438,6 +850,8 @@ Wind Speed Update:
         st.markdown('<div class="section-header">Key Performance Indicators</div>', unsafe_allow_html=True)
         
         metrics = get_current_metrics(st.session_state.model)
+        n = st.session_state.metrics_len
+        previous = dict(zip(METRIC_COLUMNS, st.session_state.metrics_arr[:, n - 1].tolist())) if n else None
         
         col1, col2, col3, col4, col5 = st.columns(5)
         
@@ -447,17 +861,17 @@ Wind Speed Update:
             st.metric("Sown Cells", metrics['sown'])
         with col3:
             st.metric("Healthy Crops", metrics['healthy'], 
-                     delta=None if not st.session_state.metrics_history 
-                     else metrics['healthy'] - st.session_state.metrics_history[-1]['healthy'])
+                     delta=None if previous is None
+                     else metrics['healthy'] - previous['healthy'])
         with col4:
             st.metric("Diseased Crops", metrics['diseased'],
-                     delta=None if not st.session_state.metrics_history
-                     else metrics['diseased'] - st.session_state.metrics_history[-1]['diseased'],
+                     delta=None if previous is None
+                     else metrics['diseased'] - previous['diseased'],
                      delta_color="inverse")
         with col5:
             st.metric("Harvested Crops", metrics['harvested'],
-                     delta=None if not st.session_state.metrics_history
-                     else metrics['harvested'] - st.session_state.metrics_history[-1]['harvested'])
+                     delta=None if previous is None
+                     else metrics['harvested'] - previous['harvested'])
         
         st.markdown("---")
         
@@ -466,8 +880,8 @@ Wind Speed Update:
         
         with tab1:
             st.markdown('<div class="section-header">Farm Grid Visualization</div>', unsafe_allow_html=True)
-            grid_plot = create_farm_grid_plot(st.session_state.model)
-            st.plotly_chart(grid_plot, use_container_width=True)
+            grid_plot = create_farm_grid_plot(st.session_state.model.state_grid)
+            st.plotly_chart(grid_plot, use_container_width=True, key="farm_grid_chart")
             
             # Legend with color indicators
             st.markdown("**Cell State Legend:**")
@@ -487,17 +901,16 @@ Wind Speed Update:
         
         with tab2:
             st.markdown('<div class="section-header">Performance Metrics Over Time</div>', unsafe_allow_html=True)
-            if st.session_state.metrics_history:
-                metrics_chart = create_metrics_chart(st.session_state.metrics_history)
-                st.plotly_chart(metrics_chart, use_container_width=True)
+            if st.session_state.metrics_len:
+                st.plotly_chart(get_metrics_chart(), use_container_width=True, key="metrics_chart")
                 
                 # Summary statistics
                 st.markdown('<div class="section-header">Summary Statistics</div>', unsafe_allow_html=True)
-                df = pd.DataFrame(st.session_state.metrics_history)
+                df = get_metrics_frame()
                 
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    st.metric("Total Steps Executed", len(df))
+                    st.metric("Total Steps Executed", st.session_state.step_count)
                     st.metric("Peak Healthy Crops", df['healthy'].max())
                 with col2:
                     st.metric("Total Crops Harvested", df['harvested'].iloc[-1])
@@ -505,7 +918,8 @@ Wind Speed Update:
                 with col3:
                     avg_growing = df['growing'].mean()
                     st.metric("Average Growing Crops", f"{avg_growing:.1f}")
-                    harvest_rate = df['harvested'].iloc[-1] / len(df) if len(df) > 0 else 0
+                    steps = st.session_state.step_count
+                    harvest_rate = df['harvested'].iloc[-1] / steps if steps > 0 else 0
                     st.metric("Harvest Rate (per step)", f"{harvest_rate:.2f}")
             else:
                 st.info("Execute simulation steps to view performance metrics")
@@ -523,14 +937,13 @@ Wind Speed Update:
                 st.markdown("**Master Agent Status**")
                 st.write(f"Current Position: {st.session_state.model.master_agent.pos}")
                 st.write(f"Active Tasks: {len(st.session_state.model.master_agent.assigned_tasks)}")
-                st.write(f"Task Queue Size: {st.session_state.model.master_agent.task_queue.qsize()}")
+                st.write(f"Task Queue Size: {st.session_state.model.master_agent.queued_task_count}")
             
             with col2:
                 st.markdown("**Worker Agent Summary**")
-                idle_count = sum(1 for a in st.session_state.model.worker_agents 
-                               if a.status.value == 'idle')
-                working_count = sum(1 for a in st.session_state.model.worker_agents 
-                                  if a.status.value == 'working')
+                status_counts = st.session_state.model.worker_status_counts
+                idle_count = status_counts[AgentStatus.IDLE]
+                working_count = status_counts[AgentStatus.WORKING]
                 st.write(f"Idle Agents: {idle_count}")
                 st.write(f"Working Agents: {working_count}")
                 st.write(f"Total Agents: {len(st.session_state.model.worker_agents)}")
@@ -541,51 +954,28 @@ Wind Speed Update:
             stress = st.session_state.model.get_stress_indicators()
             weather = st.session_state.model.weather
             
-            # Calculation Methodology Section
-            with st.expander("Calculation Methodology - How Numbers Are Computed", expanded=False):
-                st.markdown("### Stress Detection Criteria")
-                
-                col_a, col_b = st.columns(2)
-                with col_a:
-                    st.markdown("**Water Stress Detection:**")
-                    st.code("""
-Condition: water_level < 0.3 (30%)
-
-For each crop cell:
-  IF water_level < 0.3:
-    Count as water-stressed
-    
-Percentage = (water_stressed / total_crops) × 100
-                    """)
-                
-                with col_b:
-                    st.markdown("**Temperature Stress Detection:**")
-                    st.code("""
-Condition: temperature > 32°C AND water_level < 0.5
-
-For each crop cell:
-  IF temperature > 32 AND water_level < 0.5:
-    Count as temperature-stressed
-    
-Percentage = (temp_stressed / total_crops) × 100
-                    """)
-                
-                st.markdown("**Overall Health Score:**")
-                st.code("""
-Formula: ((total_crops - stressed_crops) / total_crops) × 100
-
-Where:
-  stressed_crops = water_stressed + temperature_stressed
-  
-Interpretation:
-  80-100% = Excellent
-  60-79%  = Fair
-  40-59%  = Poor
-  <40%    = Critical
-                """)
-                
-                st.markdown("**Current Calculation Example:**")
-                st.code(f"""
+            if stress['total_crops'] == 0:
+                # Nothing to break down until crops are planted
+                st.info("No crops planted yet. Stress monitoring starts once cells are sown.")
+            else:
+                # Calculation Methodology Section
+                with st.expander("Calculation Methodology - How Numbers Are Computed", expanded=False):
+                    st.markdown("### Stress Detection Criteria")
+                    
+                    col_a, col_b = st.columns(2)
+                    with col_a:
+                        st.markdown("**Water Stress Detection:**")
+                        st.code(METHODOLOGY_WATER_STRESS)
+                    
+                    with col_b:
+                        st.markdown("**Temperature Stress Detection:**")
+                        st.code(METHODOLOGY_TEMPERATURE_STRESS)
+                    
+                    st.markdown("**Overall Health Score:**")
+                    st.code(METHODOLOGY_HEALTH_SCORE)
+                    
+                    st.markdown("**Current Calculation Example:**")
+                    st.code(f"""
 Total Crops: {stress['total_crops']}
 Water Stressed: {stress['water_stressed_count']} crops (water < 0.3)
 Temperature Stressed: {stress['temperature_stressed_count']} crops (temp > 32°C + water < 0.5)
@@ -595,75 +985,60 @@ Temp Stress %  = ({stress['temperature_stressed_count']} / {stress['total_crops'
 
 Total Stressed = {stress['water_stressed_count']} + {stress['temperature_stressed_count']} = {stress['water_stressed_count'] + stress['temperature_stressed_count']}
 Health Score = (({stress['total_crops']} - {stress['water_stressed_count'] + stress['temperature_stressed_count']}) / {stress['total_crops']}) × 100 = {stress['overall_health_score']}%
-                """)
-            
-            # Stress overview
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.metric("Water Stressed Crops", 
-                         f"{stress['water_stressed_count']} ({stress['water_stress_percentage']}%)",
-                         delta=None,
-                         delta_color="inverse")
-            with col2:
-                st.metric("Temperature Stressed", 
-                         f"{stress['temperature_stressed_count']} ({stress['temperature_stress_percentage']}%)",
-                         delta=None,
-                         delta_color="inverse")
-            with col3:
-                health_score = stress['overall_health_score']
-                health_status = "Excellent" if health_score > 80 else "Fair" if health_score > 60 else "Poor"
-                st.metric("Overall Health Score", f"{health_score:.1f}%", 
-                         delta=None)
-                st.markdown(f"**Status:** {health_status}")
-            
-            st.markdown("---")
-            
-            # Stress gauge chart
-            st.markdown("**Stress Level Distribution**")
-            
-            fig = go.Figure()
-            
-            fig.add_trace(go.Bar(
-                x=['Water Stress', 'Temperature Stress', 'Healthy'],
-                y=[stress['water_stress_percentage'], 
-                   stress['temperature_stress_percentage'],
-                   stress['overall_health_score']],
-                marker_color=['#2196F3', '#FF9800', '#4CAF50'],
-                text=[f"{stress['water_stress_percentage']:.1f}%",
-                      f"{stress['temperature_stress_percentage']:.1f}%",
-                      f"{stress['overall_health_score']:.1f}%"],
-                textposition='auto'
-            ))
-            
-            fig.update_layout(
-                title="Crop Health Distribution",
-                yaxis_title="Percentage (%)",
-                height=400,
-                showlegend=False
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
+                    """)
+                
+                # Stress overview
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    st.metric("Water Stressed Crops", 
+                             f"{stress['water_stressed_count']} ({stress['water_stress_percentage']}%)",
+                             delta=None,
+                             delta_color="inverse")
+                with col2:
+                    st.metric("Temperature Stressed", 
+                             f"{stress['temperature_stressed_count']} ({stress['temperature_stress_percentage']}%)",
+                             delta=None,
+                             delta_color="inverse")
+                with col3:
+                    health_score = stress['overall_health_score']
+                    health_status = "Excellent" if health_score > 80 else "Fair" if health_score > 60 else "Poor"
+                    st.metric("Overall Health Score", f"{health_score:.1f}%", 
+                             delta=None)
+                    st.markdown(f"**Status:** {health_status}")
+                
+                st.markdown("---")
+                
+                # Stress gauge chart
+                st.markdown("**Stress Level Distribution**")
+                
+                fig = go.Figure()
+                
+                fig.add_trace(go.Bar(
+                    x=['Water Stress', 'Temperature Stress', 'Healthy'],
+                    y=[stress['water_stress_percentage'], 
+                       stress['temperature_stress_percentage'],
+                       stress['overall_health_score']],
+                    marker_color=['#2196F3', '#FF9800', '#4CAF50'],
+                    text=[f"{stress['water_stress_percentage']:.1f}%",
+                          f"{stress['temperature_stress_percentage']:.1f}%",
+                          f"{stress['overall_health_score']:.1f}%"],
+                    textposition='auto'
+                ))
+                
+                fig.update_layout(
+                    title="Crop Health Distribution",
+                    yaxis_title="Percentage (%)",
+                    height=400,
+                    showlegend=False
+                )
+                
+                st.plotly_chart(fig, use_container_width=True)
             
             # Recommendations
             st.markdown('<div class="section-header">Automated Recommendations</div>', unsafe_allow_html=True)
             
-            recommendations = []
-            
-            if stress['water_stress_percentage'] > 30:
-                recommendations.append("**High water stress detected** - Increase irrigation frequency")
-            
-            if stress['temperature_stress_percentage'] > 20:
-                recommendations.append("**Temperature stress alert** - Consider shade nets or cooling measures")
-            
-            if weather['rain_forecast_24h']:
-                recommendations.append("**Rain forecasted** - Irrigation automatically delayed to conserve water")
-            
-            if weather['temperature'] > 32:
-                recommendations.append("**High temperature warning** - Monitor crops closely for heat stress")
-            
-            if yield_pred['at_risk_crops'] > 5:
-                recommendations.append(f"**Disease alert** - {yield_pred['at_risk_crops']} crops at risk, apply treatment")
+            recommendations = get_recommendations(stress, weather, yield_pred)
             
             if not recommendations:
                 st.success("All systems operating normally. No immediate actions required.")
@@ -679,18 +1054,13 @@ Health Score = (({stress['total_crops']} - {stress['water_stressed_count'] + str
                 st.markdown("### How Yield is Estimated")
                 
                 # Get actual counts for explanation
-                growing = st.session_state.model.count_cells_by_state(CellState.GROWING)
-                healthy = st.session_state.model.count_cells_by_state(CellState.HEALTHY)
-                diseased = st.session_state.model.count_cells_by_state(CellState.DISEASED)
-                ready = st.session_state.model.count_cells_by_state(CellState.READY_TO_HARVEST)
+                growing = metrics['growing']
+                healthy = metrics['healthy']
+                diseased = metrics['diseased']
+                ready = metrics['ready']
                 
                 st.markdown("**Yield Factors by Crop State:**")
-                st.code("""
-Healthy Crops:  1.0 yield per cell (100%)
-Growing Crops:  0.7 yield per cell (70%)
-Diseased Crops: 0.3 yield per cell (30%)
-Ready Crops:    1.0 yield per cell (100%)
-                """)
+                st.code(METHODOLOGY_YIELD_FACTORS)
                 
                 st.markdown("**Current Calculation:**")
                 st.code(f"""
@@ -744,74 +1114,30 @@ Expected Harvest Step: {yield_pred['estimated_harvest_step']}
             # CSP Scheduler info
             with st.expander("CSP Scheduler - Constraint Satisfaction"):
                 st.write("Constraint-based task scheduling with resource allocation and optimization")
-                st.code("""
-Resource Management:
-- Water: 1000L capacity
-- Fuel: 500L capacity
-- Tools: 5 units available
-
-Constraint Types:
-- Agent availability (prevents double-booking)
-- Resource capacity limits
-- Task time windows
-- Task precedence relationships
-- Priority-based allocation
-                """)
+                st.code(ABOUT_CSP_SCHEDULER)
             
             # PDDL Planner info
             with st.expander("PDDL Planner - Automated Planning"):
                 st.write("High-level action planning and sequencing for farm operations")
-                st.code("""
-Available Actions:
-1. move(agent, from_location, to_location)
-2. plough(agent, plot)
-3. sow(agent, plot, crop_type)
-4. water(agent, plot)
-5. scan(drone, plot)
-6. harvest(agent, plot)
-
-Planning Domain:
-- Preconditions and effects defined
-- Goal-oriented task generation
-- Optimal action sequencing
-                """)
+                st.code(ABOUT_PDDL_PLANNER)
             
             # Rule Engine info
             with st.expander("Rule Engine - Knowledge-Based Reasoning"):
                 st.write("Forward-chaining inference engine for disease diagnosis and decision making")
-                st.code("""
-Sample Production Rules:
-
-Disease Detection:
-- IF humidity > 80% AND leaf_spots_present 
-  THEN diagnose_leaf_spot_disease
-  
-Resource Management:
-- IF water_level < 0.3 AND crop_growing 
-  THEN schedule_watering_task
-  
-Harvest Readiness:
-- IF growth_percentage >= 100% 
-  THEN mark_ready_for_harvest
-  
-Health Monitoring:
-- IF temperature > 35 AND humidity < 40
-  THEN increase_irrigation_frequency
-                """)
+                st.code(ABOUT_RULE_ENGINE)
             
             # Export data
             st.markdown('<div class="section-header">Data Export</div>', unsafe_allow_html=True)
-            if st.session_state.metrics_history:
-                df = pd.DataFrame(st.session_state.metrics_history)
-                csv = df.to_csv(index=False)
+            n = st.session_state.metrics_len
+            if n:
                 st.download_button(
-                    label="Download Metrics as CSV",
-                    data=csv,
-                    file_name="fai_farm_metrics.csv",
-                    mime="text/csv",
+                    label="Download Metrics as CSV (gzip)",
+                    data=build_metrics_csv(st.session_state.metrics_arr[:, :n].T),
+                    file_name="fai_farm_metrics.csv.gz",
+                    mime="application/gzip",
                     use_container_width=True
                 )
-                st.caption(f"Export contains {len(df)} simulation steps with {len(df.columns)} metrics per step")
+                st.caption(f"Export contains {n} simulation steps with {len(METRIC_COLUMNS)} metrics per step")
             else:
                 st.info("No data available for export. Run the simulation first.")
 
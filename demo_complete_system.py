@@ -14,6 +14,10 @@ This script demonstrates all features of the FAI-Farm system:
 
 import sys
 import os
+import io
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
@@ -27,7 +31,8 @@ from ml.disease_classifier import DiseaseClassifier
 
 
 def print_section(title):
-    """Print a formatted section header."""
+    """Print a formatted section header, flushing the previous section."""
+    sys.stdout.flush()
     print("\n" + "=" * 70)
     print(f"  {title}")
     print("=" * 70)
@@ -47,10 +52,11 @@ def demo_core_simulation():
     for i in range(100):
         model.step()
         if (i + 1) % 25 == 0:
-            ploughed = model.count_cells_by_state(CellState.PLOUGHED)
-            sown = model.count_cells_by_state(CellState.SOWN)
-            growing = model.count_cells_by_state(CellState.GROWING)
-            healthy = model.count_cells_by_state(CellState.HEALTHY)
+            counts = model.count_all_states()
+            ploughed = counts[CellState.PLOUGHED.value]
+            sown = counts[CellState.SOWN.value]
+            growing = counts[CellState.GROWING.value]
+            healthy = counts[CellState.HEALTHY.value]
             harvested = model.harvested_count
             print(f"  Step {i+1:3d}: Ploughed={ploughed}, Sown={sown}, "
                   f"Growing={growing}, Healthy={healthy}, Harvested={harvested}")
@@ -212,7 +218,9 @@ def demo_ml_classification():
     print_section("5. ML DISEASE CLASSIFICATION")
     
     print("\n Loading ML disease classifier...")
-    classifier = DiseaseClassifier()
+    # Runs in a worker process next to the other demos, so keep the
+    # forest to one core instead of competing with them
+    classifier = DiseaseClassifier(n_jobs=1)
     
     # Check if model exists
     model_path = "../ml/disease_model.pkl"
@@ -224,7 +232,7 @@ def demo_ml_classification():
         print(f" Model loaded from {model_path}")
     else:
         print(" Model not found, using freshly trained model")
-        classifier.train()
+        classifier.train(verbose=True)
     
     print("\n Testing disease predictions...")
     
@@ -277,29 +285,34 @@ def demo_ml_classification():
 
 
 def demo_weather_and_yield():
-    """Demonstrate weather simulation and yield prediction."""
+    """
+    Demonstrate weather simulation and yield prediction.
+    
+    Returns:
+        Tuple of (model, final yield prediction)
+    """
     print_section("6. WEATHER SIMULATION & YIELD PREDICTION ")
     
     print("\n Initializing farm with weather simulation...")
     model = FarmModel(width=10, height=10, num_workers=5)
     
     print(f"\n Initial Weather Conditions:")
-    print(f"  Temperature: {model.weather['temperature']:.1f}°C")
-    print(f"  Humidity: {model.weather['humidity']:.0f}%")
-    print(f"  Rain Forecast: {'Yes ' if model.weather['rain_forecast_24h'] else 'No '}")
-    print(f"  Wind Speed: {model.weather['wind_speed']:.1f} km/h")
+    print(f"  Temperature: {model.weather.temperature:.1f}°C")
+    print(f"  Humidity: {model.weather.humidity:.0f}%")
+    print(f"  Rain Forecast: {'Yes ' if model.weather.rain_forecast_24h else 'No '}")
+    print(f"  Wind Speed: {model.weather.wind_speed:.1f} km/h")
     
     print("\n Running simulation for 50 steps...")
     for i in range(50):
         model.step()
         if (i + 1) % 10 == 0:
-            print(f"  Step {i + 1}: Temp={model.weather['temperature']:.1f}°C, "
-                  f"Rain={'Yes' if model.weather['rain_forecast_24h'] else 'No'}")
+            print(f"  Step {i + 1}: Temp={model.weather.temperature:.1f}°C, "
+                  f"Rain={'Yes' if model.weather.rain_forecast_24h else 'No'}")
     
     print(f"\n Updated Weather Conditions:")
-    print(f"  Temperature: {model.weather['temperature']:.1f}°C")
-    print(f"  Humidity: {model.weather['humidity']:.0f}%")
-    print(f"  Rain Forecast: {'Yes ' if model.weather['rain_forecast_24h'] else 'No '}")
+    print(f"  Temperature: {model.weather.temperature:.1f}°C")
+    print(f"  Humidity: {model.weather.humidity:.0f}%")
+    print(f"  Rain Forecast: {'Yes ' if model.weather.rain_forecast_24h else 'No '}")
     
     print("\n Yield Prediction:")
     yield_pred = model.calculate_yield_prediction()
@@ -313,11 +326,16 @@ def demo_weather_and_yield():
     
     print("\n Weather simulation and yield prediction working correctly")
     
-    return model
+    return model, yield_pred
 
 
 def demo_stress_monitoring():
-    """Demonstrate crop stress monitoring."""
+    """
+    Demonstrate crop stress monitoring.
+    
+    Returns:
+        Tuple of (model, final stress indicators)
+    """
     print_section("7. CROP STRESS MONITORING ")
     
     print("\n Initializing stress monitoring system...")
@@ -331,59 +349,114 @@ def demo_stress_monitoring():
             print(f"  Step {i + 1}: Health Score={stress['overall_health_score']:.1f}%, "
                   f"Water Stress={stress['water_stress_percentage']:.1f}%")
     
-    print("\n Final Stress Analysis:")
     stress = model.get_stress_indicators()
-    print(f"  Water Stressed Crops: {stress['water_stressed_count']} ({stress['water_stress_percentage']:.1f}%)")
-    print(f"  Temperature Stressed: {stress['temperature_stressed_count']} ({stress['temperature_stress_percentage']:.1f}%)")
-    print(f"  Total Crops: {stress['total_crops']}")
-    print(f"  Overall Health Score: {stress['overall_health_score']:.1f}%")
+    lines = [
+        "\n Final Stress Analysis:",
+        f"  Water Stressed Crops: {stress['water_stressed_count']} ({stress['water_stress_percentage']:.1f}%)",
+        f"  Temperature Stressed: {stress['temperature_stressed_count']} ({stress['temperature_stress_percentage']:.1f}%)",
+        f"  Total Crops: {stress['total_crops']}",
+        f"  Overall Health Score: {stress['overall_health_score']:.1f}%",
+        "\n Automated Recommendations:",
+    ]
     
     # Generate recommendations
-    print("\n Automated Recommendations:")
     if stress['water_stress_percentage'] > 30:
-        print("   High water stress detected - Increase irrigation frequency")
+        lines.append("   High water stress detected - Increase irrigation frequency")
     if stress['temperature_stress_percentage'] > 20:
-        print("   Temperature stress alert - Consider cooling measures")
-    if model.weather['rain_forecast_24h']:
-        print("   Rain forecasted - Irrigation automatically delayed")
-    if model.weather['temperature'] > 32:
-        print("   High temperature warning - Monitor crops closely")
+        lines.append("   Temperature stress alert - Consider cooling measures")
+    if model.weather.rain_forecast_24h:
+        lines.append("   Rain forecasted - Irrigation automatically delayed")
+    if model.weather.temperature > 32:
+        lines.append("   High temperature warning - Monitor crops closely")
     if stress['overall_health_score'] > 80:
-        print("   All systems operating normally")
+        lines.append("   All systems operating normally")
+    print("\n".join(lines))
     
     print("\n Stress monitoring working correctly")
     
-    return model
+    return model, stress
+
+
+# Demonstrations in presentation order, each with a function extracting the
+# figures its line in the final summary needs
+DEMOS = (
+    ('core', demo_core_simulation, lambda model: model.harvested_count),
+    ('planning', demo_pddl_planning, lambda planner: len(planner.plan)),
+    ('scheduling', demo_csp_scheduling, lambda scheduler: len(scheduler.assignments)),
+    ('rules', demo_rule_based_reasoning, lambda engine: len(engine.rules)),
+    ('ml', demo_ml_classification, lambda classifier: None),
+    ('weather', demo_weather_and_yield,
+     lambda result: (result[0].weather.temperature, result[1]['estimated_yield'])),
+    ('stress', demo_stress_monitoring,
+     lambda result: result[1]['overall_health_score']),
+)
+
+
+def run_demo(index):
+    """
+    Run one demonstration in a worker process.
+    
+    Args:
+        index: Position of the demonstration in DEMOS
+    
+    Returns:
+        Tuple of (captured output, summary figures, formatted traceback if
+        the demonstration raised, else None)
+    """
+    _, demo, summarize = DEMOS[index]
+    # Capture stderr (e.g. sklearn warnings) with stdout so it is printed
+    # in order with the demonstration's own output
+    output = io.StringIO()
+    summary = error = None
+    with redirect_stdout(output), redirect_stderr(output):
+        try:
+            summary = summarize(demo())
+        except Exception:
+            error = traceback.format_exc()
+    return output.getvalue(), summary, error
 
 
 def main():
     """Run complete system demonstration."""
+    # Block-buffer stdout even on a terminal; print_section flushes once
+    # per section instead of on every line
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(line_buffering=False)
+    
     print("\n" + "=" * 70)
     print("  FAI-FARM COMPLETE SYSTEM DEMONSTRATION v2.0")
     print("  Multi-Agent Agricultural Simulation with AI")
     print("=" * 70)
     
     try:
-        # Run all demonstrations
-        model = demo_core_simulation()
-        planner = demo_pddl_planning()
-        scheduler = demo_csp_scheduling()
-        engine = demo_rule_based_reasoning()
-        classifier = demo_ml_classification()
-        weather_model = demo_weather_and_yield()
-        stress_model = demo_stress_monitoring()
+        # The demonstrations share no state, so run them in parallel worker
+        # processes and print each one's output in order as it completes
+        summary = {}
+        workers = min(len(DEMOS), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run_demo, i) for i in range(len(DEMOS))]
+            for (name, _, _), future in zip(DEMOS, futures):
+                output, summary[name], error = future.result()
+                sys.stdout.write(output)
+                if error is not None:
+                    executor.shutdown(cancel_futures=True)
+                    print(f"\n Error during {name} demonstration:")
+                    print(error, end="")
+                    sys.stdout.flush()
+                    return False
+        temperature, estimated_yield = summary['weather']
         
         # Final summary
         print_section("DEMONSTRATION COMPLETE")
         print("\n All systems operational!")
         print("\n Summary:")
-        print(f"   Core Simulation: {model.harvested_count} crops harvested")
-        print(f"   PDDL Planning: {len(planner.plan)} actions generated")
-        print(f"   CSP Scheduling: {len(scheduler.assignments)} tasks scheduled")
-        print(f"   Weather Simulation: Temperature {weather_model.weather['temperature']:.1f}°C")
-        print(f"   Yield Prediction: {weather_model.calculate_yield_prediction()['estimated_yield']:.2f} units")
-        print(f"   Stress Monitoring: {stress_model.get_stress_indicators()['overall_health_score']:.1f}% health")
-        print(f"   Rule Engine: {len(engine.rules)} rules loaded")
+        print(f"   Core Simulation: {summary['core']} crops harvested")
+        print(f"   PDDL Planning: {summary['planning']} actions generated")
+        print(f"   CSP Scheduling: {summary['scheduling']} tasks scheduled")
+        print(f"   Weather Simulation: Temperature {temperature:.1f}°C")
+        print(f"   Yield Prediction: {estimated_yield:.2f} units")
+        print(f"   Stress Monitoring: {summary['stress']:.1f}% health")
+        print(f"   Rule Engine: {summary['rules']} rules loaded")
         print(f"   ML Classifier: Model trained and ready")
         
         print("\n System Status: READY FOR DEPLOYMENT")
@@ -400,7 +473,7 @@ def main():
         
     except Exception as e:
         print(f"\n Error during demonstration: {e}")
-        import traceback
+        sys.stdout.flush()
         traceback.print_exc()
         return False
 
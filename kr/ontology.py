@@ -9,8 +9,22 @@ from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Set, Tuple
 from enum import Enum
 
+from model.cell_state import _DATACLASS_OPTIONS
 
-class CropType(Enum):
+
+class _CodedEnum(Enum):
+    """
+    Enum whose members also carry a dense integer code.
+    
+    Codes follow definition order starting at 0, so members can index
+    arrays and bit positions while keeping their readable string values.
+    """
+    
+    def __init__(self, value):
+        self.code = len(type(self)._member_names_)
+
+
+class CropType(_CodedEnum):
     """Types of crops that can be grown."""
     WHEAT = "wheat"
     CORN = "corn"
@@ -19,7 +33,7 @@ class CropType(Enum):
     TOMATO = "tomato"
 
 
-class SoilType(Enum):
+class SoilType(_CodedEnum):
     """Types of soil."""
     CLAY = "clay"
     SANDY = "sandy"
@@ -27,7 +41,7 @@ class SoilType(Enum):
     SILT = "silt"
 
 
-class GrowthStage(Enum):
+class GrowthStage(_CodedEnum):
     """Crop growth stages."""
     SEED = "seed"
     GERMINATION = "germination"
@@ -38,6 +52,11 @@ class GrowthStage(Enum):
     HARVEST_READY = "harvest_ready"
 
 
+# Stage each growth stage advances to; the final stage stays put
+_STAGES = list(GrowthStage)
+_NEXT_STAGE = dict(zip(_STAGES, _STAGES[1:] + _STAGES[-1:]))
+
+
 class DiseaseType(Enum):
     """Types of crop diseases."""
     LEAF_SPOT = "leaf_spot"
@@ -47,7 +66,7 @@ class DiseaseType(Enum):
     RUST = "rust"
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Crop:
     """
     Represents a crop with its properties and requirements.
@@ -68,17 +87,14 @@ class Crop:
     
     def advance_growth_stage(self):
         """Advance to next growth stage."""
-        stages = list(GrowthStage)
-        current_index = stages.index(self.growth_stage)
-        if current_index < len(stages) - 1:
-            self.growth_stage = stages[current_index + 1]
+        self.growth_stage = _NEXT_STAGE[self.growth_stage]
     
     def is_harvest_ready(self) -> bool:
         """Check if crop is ready for harvest."""
         return self.growth_stage == GrowthStage.HARVEST_READY
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Plot:
     """
     Represents a farm plot with its properties.
@@ -118,7 +134,7 @@ class Plot:
         return None
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Resource:
     """
     Represents a farm resource.
@@ -141,7 +157,7 @@ class Resource:
         self.quantity += amount
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Equipment:
     """
     Represents farm equipment.
@@ -154,6 +170,15 @@ class Equipment:
     current_location: Optional[Tuple[int, int]] = None
 
 
+# Standard crops: (key, type, name, growth duration in days, water in
+# liters per day, optimal temperature range, suitable soil types)
+_CROP_SPECS = (
+    ("wheat", CropType.WHEAT, "Winter Wheat", 120, 25.0, (15.0, 25.0), (SoilType.LOAM, SoilType.CLAY)),
+    ("corn", CropType.CORN, "Sweet Corn", 90, 30.0, (20.0, 30.0), (SoilType.LOAM, SoilType.SANDY)),
+    ("rice", CropType.RICE, "Paddy Rice", 150, 50.0, (25.0, 35.0), (SoilType.CLAY, SoilType.SILT)),
+)
+
+
 class FarmOntology:
     """
     Complete farm ontology managing all domain concepts and relationships.
@@ -171,43 +196,26 @@ class FarmOntology:
     
     def _initialize_crop_knowledge(self):
         """Initialize crop knowledge base with standard crops."""
-        # Wheat
-        wheat = Crop(
-            type=CropType.WHEAT,
-            name="Winter Wheat",
-            growth_duration=120,
-            water_requirement=25.0,
-            optimal_temperature=(15.0, 25.0),
-            suitable_soil_types=[SoilType.LOAM, SoilType.CLAY]
-        )
-        self.crops["wheat"] = wheat
-        
-        # Corn
-        corn = Crop(
-            type=CropType.CORN,
-            name="Sweet Corn",
-            growth_duration=90,
-            water_requirement=30.0,
-            optimal_temperature=(20.0, 30.0),
-            suitable_soil_types=[SoilType.LOAM, SoilType.SANDY]
-        )
-        self.crops["corn"] = corn
-        
-        # Rice
-        rice = Crop(
-            type=CropType.RICE,
-            name="Paddy Rice",
-            growth_duration=150,
-            water_requirement=50.0,
-            optimal_temperature=(25.0, 35.0),
-            suitable_soil_types=[SoilType.CLAY, SoilType.SILT]
-        )
-        self.crops["rice"] = rice
+        for key, crop_type, name, duration, water, temperature, soils in _CROP_SPECS:
+            self.crops[key] = Crop(
+                type=crop_type,
+                name=name,
+                growth_duration=duration,
+                water_requirement=water,
+                optimal_temperature=temperature,
+                suitable_soil_types=list(soils)
+            )
     
     def add_plot(self, plot: Plot):
         """Add a plot to the ontology."""
         self.plots[plot.id] = plot
     
+    def _planted_plots(self):
+        """Iterate over plots that currently have a crop, in insertion order."""
+        for plot in self.plots.values():
+            if plot.current_crop is not None:
+                yield plot
+    
     def add_resource(self, resource: Resource):
         """Add a resource to the ontology."""
         self.resources[resource.name] = resource
@@ -218,65 +226,92 @@ class FarmOntology:
     
     def get_suitable_crops_for_plot(self, plot_id: str) -> List[Crop]:
         """Get list of crops suitable for a given plot."""
-        if plot_id not in self.plots:
+        plot = self.plots.get(plot_id)
+        if plot is None:
             return []
         
-        plot = self.plots[plot_id]
-        suitable = []
-        
-        for crop in self.crops.values():
-            if crop.is_suitable_for_soil(plot.soil_type):
-                suitable.append(crop)
-        
-        return suitable
+        return [crop for crop in self.crops.values() if crop.is_suitable_for_soil(plot.soil_type)]
     
     def get_plots_with_crop(self, crop_type: CropType) -> List[Plot]:
         """Get all plots growing a specific crop type."""
         return [
-            plot for plot in self.plots.values()
-            if plot.current_crop and plot.current_crop.type == crop_type
+            plot for plot in self._planted_plots()
+            if plot.current_crop.type == crop_type
         ]
     
     def get_plots_needing_water(self, threshold: float = 0.3) -> List[Plot]:
         """Get plots with low soil moisture."""
         return [
-            plot for plot in self.plots.values()
-            if plot.soil_moisture < threshold and plot.current_crop is not None
+            plot for plot in self._planted_plots()
+            if plot.soil_moisture < threshold
         ]
     
     def get_plots_ready_for_harvest(self) -> List[Plot]:
         """Get plots with crops ready for harvest."""
         return [
-            plot for plot in self.plots.values()
-            if plot.current_crop and plot.current_crop.is_harvest_ready()
+            plot for plot in self._planted_plots()
+            if plot.current_crop.is_harvest_ready()
         ]
     
+    def scan_plot_status(
+        self, threshold: float = 0.3
+    ) -> Tuple[List[Plot], List[Plot], Dict[CropType, List[Plot]]]:
+        """
+        Bucket planted plots for water, harvest and crop type in one pass.
+        
+        Equivalent to calling get_plots_needing_water,
+        get_plots_ready_for_harvest and get_plots_with_crop for every crop
+        type, while walking the planted plots only once.
+        
+        Args:
+            threshold: Soil moisture below which a plot needs water
+        
+        Returns:
+            Tuple of (plots needing water, plots ready for harvest,
+            planted plots by crop type)
+        """
+        needing_water = []
+        ready = []
+        by_crop = {}
+        for plot in self._planted_plots():
+            crop = plot.current_crop
+            if plot.soil_moisture < threshold:
+                needing_water.append(plot)
+            if crop.is_harvest_ready():
+                ready.append(plot)
+            by_crop.setdefault(crop.type, []).append(plot)
+        return needing_water, ready, by_crop
+    
     def calculate_water_demand(self) -> float:
         """Calculate total water demand for all crops."""
         total = 0.0
-        for plot in self.plots.values():
-            if plot.current_crop:
-                total += plot.current_crop.water_requirement * plot.area
+        for plot in self._planted_plots():
+            total += plot.current_crop.water_requirement * plot.area
         return total
     
     def export_ontology(self, filename: str):
         """Export ontology to a file."""
+        parts = ["# FAI-Farm Ontology\n\n", "## Crops\n"]
+        parts.extend(
+            f"- {crop.name} ({crop.type.value})\n"
+            f"  Duration: {crop.growth_duration} days\n"
+            f"  Water: {crop.water_requirement} L/day\n"
+            for crop in self.crops.values()
+        )
+        
+        parts.append("\n## Plots\n")
+        parts.extend(
+            f"- {plot.id} at {plot.position}\n"
+            f"  Soil: {plot.soil_type.value}\n"
+            + (f"  Crop: {plot.current_crop.name}\n" if plot.current_crop else "")
+            for plot in self.plots.values()
+        )
+        
+        parts.append("\n## Resources\n")
+        parts.extend(
+            f"- {resource.name}: {resource.quantity} {resource.unit}\n"
+            for resource in self.resources.values()
+        )
+        
         with open(filename, 'w') as f:
-            f.write("# FAI-Farm Ontology\n\n")
-            
-            f.write("## Crops\n")
-            for crop in self.crops.values():
-                f.write(f"- {crop.name} ({crop.type.value})\n")
-                f.write(f"  Duration: {crop.growth_duration} days\n")
-                f.write(f"  Water: {crop.water_requirement} L/day\n")
-            
-            f.write("\n## Plots\n")
-            for plot in self.plots.values():
-                f.write(f"- {plot.id} at {plot.position}\n")
-                f.write(f"  Soil: {plot.soil_type.value}\n")
-                if plot.current_crop:
-                    f.write(f"  Crop: {plot.current_crop.name}\n")
-            
-            f.write("\n## Resources\n")
-            for resource in self.resources.values():
-                f.write(f"- {resource.name}: {resource.quantity} {resource.unit}\n")
+            f.writelines(parts)
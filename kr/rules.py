@@ -5,17 +5,38 @@ Implements forward-chaining inference for disease diagnosis and
 agricultural decision-making.
 """
 
-from typing import List, Dict, Callable, Any, Set
+import bisect
+from typing import List, Dict, Callable, Any, Optional, Set, Tuple
 from dataclasses import dataclass
 from enum import Enum
-import sys
-import os
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
 
 from kr.ontology import DiseaseType, Plot, Crop
 
 
+# Marker for facts that have not been asserted
+_MISSING = object()
+
+# Maximum number of distinct fact sets whose diagnosis is remembered
+_DIAGNOSIS_CACHE_SIZE = 1024
+
+# Facts reported by a diagnosis, with the value used when no rule set them
+_DIAGNOSIS_DEFAULTS = {
+    'action_required': None,
+    'priority': 50,
+    'disease_diagnosed': None,
+    'treatment_required': False,
+    'recommended_action': None,
+    'disease_risk': 'low'
+}
+
+
+def _within(values: np.ndarray, low: float, high: float) -> np.ndarray:
+    """Elementwise low <= values <= high."""
+    return (low <= values) & (values <= high)
+
+
 class RuleCondition(Enum):
     """Types of conditions in rules."""
     GREATER_THAN = ">"
@@ -25,6 +46,34 @@ class RuleCondition(Enum):
     OR = "OR"
 
 
+@dataclass
+class Condition:
+    """
+    Test over named facts, the alpha-network unit of a rule.
+    
+    Declaring which facts a test reads lets the rule engine re-check it
+    only when one of those facts changes. Missing facts take the
+    matching default.
+    """
+    facts: Tuple[str, ...]
+    test: Callable[..., bool]
+    defaults: Tuple[Any, ...]
+    
+    def __call__(self, facts: Dict) -> bool:
+        """Evaluate the test against a fact dictionary."""
+        return bool(self.test(*map(facts.get, self.facts, self.defaults)))
+
+
+@dataclass
+class SetFacts:
+    """Rule action asserting fixed fact values."""
+    values: Dict[str, Any]
+    
+    def __call__(self, facts: Dict):
+        """Write the values into a fact dictionary."""
+        facts.update(self.values)
+
+
 @dataclass
 class Rule:
     """
@@ -32,10 +81,13 @@ class Rule:
     """
     id: str
     name: str
-    conditions: List[Callable[[Dict], bool]]
-    actions: List[Callable[[Dict], None]]
+    conditions: List[Callable[[Dict], bool]]  # Condition, or any predicate over all facts
+    actions: List[Callable[[Dict], None]]  # SetFacts, or any callable updating facts
     priority: int = 50
     description: str = ""
+    # Optional vectorized form of the conditions for batch diagnosis: given
+    # fact(key, default) returning one value per plot, a boolean array
+    batch_conditions: Optional[Callable[[Callable[[str, Any], np.ndarray]], np.ndarray]] = None
     
     def evaluate(self, facts: Dict) -> bool:
         """
@@ -63,13 +115,46 @@ class Rule:
 class RuleEngine:
     """
     Forward-chaining rule engine for agricultural reasoning.
+    
+    Rules are compiled into a small discrimination network. Each Condition
+    is indexed by the facts it reads and its last result is kept, so a
+    fact change re-checks only the conditions that depend on it, and the
+    agenda always holds the unfired rules whose conditions all hold.
+    Facts must be set through add_fact (or rule actions) for the network
+    to see them.
     """
     
     def __init__(self):
         """Initialize the rule engine."""
         self.rules: List[Rule] = []
         self.facts: Dict[str, Any] = {}
-        self.fired_rules: Set[str] = set()
+        
+        # Fired rule ids as a bitset, one bit per distinct id
+        self.fired_mask = 0
+        self._id_bits: Dict[str, int] = {}
+        
+        # Negated priorities of self.rules, ascending, for ordered insertion
+        self._neg_priorities: List[int] = []
+        
+        # Network state, keyed by rule slot (order of addition): the rules,
+        # each slot's position in self.rules, the bit of each slot's id,
+        # (slot, condition) pairs indexed
+        # by the fact they read, pairs for plain predicates that may read any
+        # fact, the last result of each condition, the count of conditions
+        # not holding per rule, and the slots of unfired rules whose
+        # conditions all hold
+        self._slot_rules: List[Rule] = []
+        self._rank: List[int] = []
+        self._slot_bits: List[int] = []
+        self._conditions_by_fact: Dict[str, List[Tuple[int, int]]] = {}
+        self._opaque_conditions: List[Tuple[int, int]] = []
+        self._condition_state: List[List[bool]] = []
+        self._unsatisfied: List[int] = []
+        self._agenda: Set[int] = set()
+        
+        # Diagnoses keyed by the facts they were run on, with the engine
+        # state they left behind; cleared whenever the rule base changes
+        self._diagnosis_cache: Dict[Tuple, Tuple[Dict, Tuple]] = {}
         
         # Initialize disease diagnosis rules
         self._initialize_disease_rules()
@@ -79,13 +164,104 @@ class RuleEngine:
     
     def add_rule(self, rule: Rule):
         """Add a rule to the engine."""
-        self.rules.append(rule)
-        # Sort by priority (higher first)
-        self.rules.sort(key=lambda r: r.priority, reverse=True)
+        self._diagnosis_cache.clear()
+        
+        # Insert by priority (higher first), after rules of equal priority
+        position = bisect.bisect_right(self._neg_priorities, -rule.priority)
+        self._neg_priorities.insert(position, -rule.priority)
+        self.rules.insert(position, rule)
+        self._rank = [rank + 1 if rank >= position else rank for rank in self._rank]
+        
+        # Index the new rule's conditions by the facts they read
+        slot = len(self._slot_rules)
+        self._slot_rules.append(rule)
+        self._rank.append(position)
+        bit = self._id_bits.setdefault(rule.id, 1 << len(self._id_bits))
+        self._slot_bits.append(bit)
+        for index, condition in enumerate(rule.conditions):
+            if isinstance(condition, Condition):
+                for key in condition.facts:
+                    self._conditions_by_fact.setdefault(key, []).append((slot, index))
+            else:
+                self._opaque_conditions.append((slot, index))
+        
+        state = [bool(condition(self.facts)) for condition in rule.conditions]
+        self._condition_state.append(state)
+        self._unsatisfied.append(state.count(False))
+        if self._unsatisfied[slot] == 0 and not self.fired_mask & bit:
+            self._agenda.add(slot)
+    
+    @property
+    def fired_rules(self) -> Set[str]:
+        """Ids of the rules fired since the last reset."""
+        return {rule_id for rule_id, bit in self._id_bits.items() if self.fired_mask & bit}
+    
+    def _refresh(self):
+        """Re-evaluate every condition against the current facts."""
+        self._condition_state = [
+            [bool(condition(self.facts)) for condition in rule.conditions]
+            for rule in self._slot_rules
+        ]
+        self._unsatisfied = [state.count(False) for state in self._condition_state]
+        self._agenda = {
+            slot for slot, bit in enumerate(self._slot_bits)
+            if self._unsatisfied[slot] == 0 and not self.fired_mask & bit
+        }
+    
+    def _recheck(self, slot: int, index: int):
+        """
+        Re-evaluate one condition and update its rule's agenda entry.
+        
+        Args:
+            slot: Slot of the rule
+            index: Index of the condition within the rule
+        """
+        holds = bool(self._slot_rules[slot].conditions[index](self.facts))
+        state = self._condition_state[slot]
+        if holds == state[index]:
+            return
+        state[index] = holds
+        self._unsatisfied[slot] += -1 if holds else 1
+        if self._unsatisfied[slot] == 0 and not self.fired_mask & self._slot_bits[slot]:
+            self._agenda.add(slot)
+        else:
+            self._agenda.discard(slot)
     
     def add_fact(self, key: str, value: Any):
         """Add or update a fact."""
         self.facts[key] = value
+        for slot, index in self._conditions_by_fact.get(key, ()):
+            self._recheck(slot, index)
+        for slot, index in self._opaque_conditions:
+            self._recheck(slot, index)
+    
+    def _fire(self, slot: int):
+        """
+        Mark a rule as fired and apply its actions through the network.
+        
+        Args:
+            slot: Slot of the rule to fire
+        """
+        rule = self._slot_rules[slot]
+        bit = self._slot_bits[slot]
+        self.fired_mask |= bit
+        # Drop every rule sharing the id, as forward_chain skips fired ids
+        self._agenda = {
+            other for other in self._agenda if self._slot_bits[other] != bit
+        }
+        for action in rule.actions:
+            if isinstance(action, SetFacts):
+                for key, value in action.values.items():
+                    # A fact already holding the derived value changes no
+                    # condition, so skip propagating it
+                    current = self.facts.get(key, _MISSING)
+                    if current is value or (type(current) is type(value) and current == value):
+                        continue
+                    self.add_fact(key, value)
+            else:
+                # Arbitrary callables may change any fact
+                action(self.facts)
+                self._refresh()
     
     def get_fact(self, key: str, default=None):
         """Get a fact value."""
@@ -106,20 +282,19 @@ class RuleEngine:
         for _ in range(max_iterations):
             fired_any = False
             
-            for rule in self.rules:
-                # Skip already fired rules
-                if rule.id in self.fired_rules:
-                    continue
-                
-                # Check if conditions are met
-                if rule.evaluate(self.facts):
-                    # Execute actions
-                    rule.execute(self.facts)
-                    
-                    # Mark as fired
-                    self.fired_rules.add(rule.id)
-                    fired_this_cycle.append(rule.id)
-                    fired_any = True
+            # Fire agenda rules in priority order; a rule activated by an
+            # earlier firing fires this cycle if it comes later in the
+            # order, otherwise in the next cycle
+            position = -1
+            while True:
+                later = [slot for slot in self._agenda if self._rank[slot] > position]
+                if not later:
+                    break
+                slot = min(later, key=self._rank.__getitem__)
+                position = self._rank[slot]
+                self._fire(slot)
+                fired_this_cycle.append(self._slot_rules[slot].id)
+                fired_any = True
             
             # Stop if no rules fired this cycle
             if not fired_any:
@@ -127,10 +302,32 @@ class RuleEngine:
         
         return fired_this_cycle
     
+    def _snapshot(self) -> Tuple:
+        """Copy the facts, firings and network state."""
+        return (
+            dict(self.facts), self.fired_mask,
+            [list(state) for state in self._condition_state],
+            list(self._unsatisfied), set(self._agenda)
+        )
+    
+    def _restore(self, snapshot: Tuple):
+        """
+        Restore state captured by _snapshot.
+        
+        Args:
+            snapshot: Snapshot to restore, left unchanged
+        """
+        facts, self.fired_mask, condition_state, unsatisfied, agenda = snapshot
+        self.facts = dict(facts)
+        self._condition_state = [list(state) for state in condition_state]
+        self._unsatisfied = list(unsatisfied)
+        self._agenda = set(agenda)
+    
     def reset(self):
         """Reset the engine state."""
         self.facts = {}
-        self.fired_rules = set()
+        self.fired_mask = 0
+        self._refresh()
     
     def _initialize_disease_rules(self):
         """Initialize disease diagnosis rules."""
@@ -141,13 +338,18 @@ class RuleEngine:
             name="Leaf Spot Disease Detection",
             description="IF humidity > 80% AND leaf_spots detected THEN diagnose leaf_spot disease",
             conditions=[
-                lambda f: f.get('humidity', 0) > 80,
-                lambda f: f.get('leaf_spots_detected', False)
+                Condition(('humidity',), lambda humidity: humidity > 80, (0,)),
+                Condition(('leaf_spots_detected',), bool, (False,))
             ],
+            batch_conditions=lambda fact: (
+                (fact('humidity', 0) > 80) & fact('leaf_spots_detected', False).astype(bool)
+            ),
             actions=[
-                lambda f: f.update({'disease_diagnosed': DiseaseType.LEAF_SPOT}),
-                lambda f: f.update({'treatment_required': True}),
-                lambda f: f.update({'recommended_action': 'apply_fungicide'})
+                SetFacts({
+                    'disease_diagnosed': DiseaseType.LEAF_SPOT,
+                    'treatment_required': True,
+                    'recommended_action': 'apply_fungicide'
+                })
             ],
             priority=90
         )
@@ -159,13 +361,18 @@ class RuleEngine:
             name="Powdery Mildew Detection",
             description="IF temperature in range AND white_powder detected THEN diagnose powdery_mildew",
             conditions=[
-                lambda f: 15 <= f.get('temperature', 0) <= 25,
-                lambda f: f.get('white_powder_detected', False)
+                Condition(('temperature',), lambda temperature: 15 <= temperature <= 25, (0,)),
+                Condition(('white_powder_detected',), bool, (False,))
             ],
+            batch_conditions=lambda fact: (
+                _within(fact('temperature', 0), 15, 25) & fact('white_powder_detected', False).astype(bool)
+            ),
             actions=[
-                lambda f: f.update({'disease_diagnosed': DiseaseType.POWDERY_MILDEW}),
-                lambda f: f.update({'treatment_required': True}),
-                lambda f: f.update({'recommended_action': 'apply_sulfur'})
+                SetFacts({
+                    'disease_diagnosed': DiseaseType.POWDERY_MILDEW,
+                    'treatment_required': True,
+                    'recommended_action': 'apply_sulfur'
+                })
             ],
             priority=90
         )
@@ -177,13 +384,18 @@ class RuleEngine:
             name="Root Rot Detection",
             description="IF water_level > 0.9 AND wilting detected THEN diagnose root_rot",
             conditions=[
-                lambda f: f.get('water_level', 0) > 0.9,
-                lambda f: f.get('wilting_detected', False)
+                Condition(('water_level',), lambda water_level: water_level > 0.9, (0,)),
+                Condition(('wilting_detected',), bool, (False,))
             ],
+            batch_conditions=lambda fact: (
+                (fact('water_level', 0) > 0.9) & fact('wilting_detected', False).astype(bool)
+            ),
             actions=[
-                lambda f: f.update({'disease_diagnosed': DiseaseType.ROOT_ROT}),
-                lambda f: f.update({'treatment_required': True}),
-                lambda f: f.update({'recommended_action': 'reduce_watering'})
+                SetFacts({
+                    'disease_diagnosed': DiseaseType.ROOT_ROT,
+                    'treatment_required': True,
+                    'recommended_action': 'reduce_watering'
+                })
             ],
             priority=95
         )
@@ -195,11 +407,11 @@ class RuleEngine:
             name="High Disease Risk Alert",
             description="IF disease_probability > 0.7 THEN alert high_risk",
             conditions=[
-                lambda f: f.get('disease_probability', 0) > 0.7
+                Condition(('disease_probability',), lambda probability: probability > 0.7, (0,))
             ],
+            batch_conditions=lambda fact: fact('disease_probability', 0) > 0.7,
             actions=[
-                lambda f: f.update({'disease_risk': 'high'}),
-                lambda f: f.update({'alert_master_agent': True})
+                SetFacts({'disease_risk': 'high', 'alert_master_agent': True})
             ],
             priority=85
         )
@@ -214,12 +426,14 @@ class RuleEngine:
             name="Water Stress Management",
             description="IF water_level < 0.3 AND crop_growing THEN schedule_watering",
             conditions=[
-                lambda f: f.get('water_level', 1.0) < 0.3,
-                lambda f: f.get('crop_growing', False)
+                Condition(('water_level',), lambda water_level: water_level < 0.3, (1.0,)),
+                Condition(('crop_growing',), bool, (False,))
             ],
+            batch_conditions=lambda fact: (
+                (fact('water_level', 1.0) < 0.3) & fact('crop_growing', False).astype(bool)
+            ),
             actions=[
-                lambda f: f.update({'action_required': 'water'}),
-                lambda f: f.update({'priority': 90})
+                SetFacts({'action_required': 'water', 'priority': 90})
             ],
             priority=80
         )
@@ -231,11 +445,11 @@ class RuleEngine:
             name="Harvest Readiness",
             description="IF growth_progress >= 100 THEN schedule_harvest",
             conditions=[
-                lambda f: f.get('growth_progress', 0) >= 100
+                Condition(('growth_progress',), lambda progress: progress >= 100, (0,))
             ],
+            batch_conditions=lambda fact: fact('growth_progress', 0) >= 100,
             actions=[
-                lambda f: f.update({'action_required': 'harvest'}),
-                lambda f: f.update({'priority': 80})
+                SetFacts({'action_required': 'harvest', 'priority': 80})
             ],
             priority=75
         )
@@ -247,12 +461,14 @@ class RuleEngine:
             name="Optimal Planting Conditions",
             description="IF soil_ploughed AND temperature_optimal THEN recommend_planting",
             conditions=[
-                lambda f: f.get('soil_ploughed', False),
-                lambda f: 15 <= f.get('temperature', 0) <= 30
+                Condition(('soil_ploughed',), bool, (False,)),
+                Condition(('temperature',), lambda temperature: 15 <= temperature <= 30, (0,))
             ],
+            batch_conditions=lambda fact: (
+                fact('soil_ploughed', False).astype(bool) & _within(fact('temperature', 0), 15, 30)
+            ),
             actions=[
-                lambda f: f.update({'action_required': 'sow'}),
-                lambda f: f.update({'priority': 70})
+                SetFacts({'action_required': 'sow', 'priority': 70})
             ],
             priority=70
         )
@@ -264,11 +480,11 @@ class RuleEngine:
             name="Nutrient Deficiency",
             description="IF nitrogen < 20 OR phosphorus < 15 THEN apply_fertilizer",
             conditions=[
-                lambda f: f.get('nitrogen', 100) < 20 or f.get('phosphorus', 100) < 15
+                Condition(('nitrogen', 'phosphorus'), lambda nitrogen, phosphorus: nitrogen < 20 or phosphorus < 15, (100, 100))
             ],
+            batch_conditions=lambda fact: (fact('nitrogen', 100) < 20) | (fact('phosphorus', 100) < 15),
             actions=[
-                lambda f: f.update({'action_required': 'fertilize'}),
-                lambda f: f.update({'priority': 60})
+                SetFacts({'action_required': 'fertilize', 'priority': 60})
             ],
             priority=65
         )
@@ -285,35 +501,147 @@ class RuleEngine:
         Returns:
             Diagnosis and recommendations
         """
-        # Reset for new diagnosis
-        self.reset()
+        # Plot facts, then environmental facts
+        facts = {'water_level': plot.soil_moisture, 'soil_ploughed': plot.is_ploughed}
+        if plot.current_crop:
+            facts['crop_growing'] = True
+            facts['growth_progress'] = plot.current_crop.health_status * 100
+        facts.update(environmental_data)
         
-        # Add plot facts
-        self.add_fact('water_level', plot.soil_moisture)
-        self.add_fact('soil_ploughed', plot.is_ploughed)
+        # Plots sharing the exact same facts share a diagnosis; types are
+        # part of the key so that e.g. 1 and True stay distinct
+        try:
+            signature = tuple(sorted((key, type(value), value) for key, value in facts.items()))
+            hash(signature)
+        except TypeError:
+            signature = None
         
-        if plot.current_crop:
-            self.add_fact('crop_growing', True)
-            self.add_fact('growth_progress', 
-                         plot.current_crop.health_status * 100)
+        cached = self._diagnosis_cache.get(signature) if signature is not None else None
+        if cached is not None:
+            diagnosis, snapshot = cached
+            self._restore(snapshot)
+            return dict(diagnosis, fired_rules=list(diagnosis['fired_rules']))
         
-        # Add environmental facts
-        for key, value in environmental_data.items():
+        # Reset for new diagnosis
+        self.reset()
+        for key, value in facts.items():
             self.add_fact(key, value)
         
         # Run inference
         fired_rules = self.forward_chain()
         
         # Extract recommendations
-        return {
-            'fired_rules': fired_rules,
-            'action_required': self.get_fact('action_required'),
-            'priority': self.get_fact('priority', 50),
-            'disease_diagnosed': self.get_fact('disease_diagnosed'),
-            'treatment_required': self.get_fact('treatment_required', False),
-            'recommended_action': self.get_fact('recommended_action'),
-            'disease_risk': self.get_fact('disease_risk', 'low')
+        diagnosis = {'fired_rules': fired_rules}
+        for key, default in _DIAGNOSIS_DEFAULTS.items():
+            diagnosis[key] = self.get_fact(key, default)
+        
+        if signature is not None:
+            if len(self._diagnosis_cache) >= _DIAGNOSIS_CACHE_SIZE:
+                self._diagnosis_cache.clear()
+            self._diagnosis_cache[signature] = (
+                dict(diagnosis, fired_rules=list(fired_rules)), self._snapshot()
+            )
+        return diagnosis
+    
+    def _batchable(self) -> bool:
+        """
+        Check whether the rule base can be evaluated in one vectorized pass.
+        
+        This holds when every rule has batch_conditions, declares the facts
+        its conditions read, only sets fixed facts, has its own id, and no
+        condition reads a fact that a rule sets. Each rule then fires at
+        most once, in priority order, on the loaded facts alone.
+        
+        Returns:
+            True if diagnose_plots_batch can vectorize the rule base
+        """
+        read, derived = set(), set()
+        for rule in self.rules:
+            if rule.batch_conditions is None:
+                return False
+            for condition in rule.conditions:
+                if not isinstance(condition, Condition):
+                    return False
+                read.update(condition.facts)
+            for action in rule.actions:
+                if not isinstance(action, SetFacts):
+                    return False
+                derived.update(action.values)
+        return len(self._id_bits) == len(self.rules) and not read & derived
+    
+    def diagnose_plots_batch(self, plots: List[Plot], environmental_data: Dict) -> Dict[str, np.ndarray]:
+        """
+        Diagnose many plots at once.
+        
+        Gives the recommendations diagnose_plot would give for each plot.
+        When the rule base allows it, each rule is evaluated once as array
+        operations over all plots, leaving the engine's facts untouched;
+        otherwise the plots are diagnosed one at a time.
+        
+        Args:
+            plots: Plots to diagnose
+            environmental_data: Environmental conditions, each either one
+                value shared by all plots or a sequence with one per plot
+        
+        Returns:
+            Dictionary mapping each recommendation of diagnose_plot (all but
+            fired_rules) to an array with one entry per plot
+        """
+        count = len(plots)
+        results = {
+            key: np.full(count, default, dtype=object)
+            for key, default in _DIAGNOSIS_DEFAULTS.items()
         }
+        # Recommendations supplied as environmental facts stand until a
+        # rule overwrites them, as they do in diagnose_plot
+        for key, values in results.items():
+            if key in environmental_data:
+                values[:] = environmental_data[key]
+        
+        if self._batchable():
+            # Facts as (values, mask of plots holding the fact or None for all)
+            has_crop = np.fromiter((bool(plot.current_crop) for plot in plots), dtype=bool, count=count)
+            facts = {
+                'water_level': (np.fromiter((plot.soil_moisture for plot in plots), dtype=np.float64, count=count), None),
+                'soil_ploughed': (np.fromiter((plot.is_ploughed for plot in plots), dtype=bool, count=count), None),
+                'crop_growing': (has_crop, has_crop),
+                'growth_progress': (np.fromiter(
+                    (plot.current_crop.health_status * 100 if plot.current_crop else 0 for plot in plots),
+                    dtype=np.float64, count=count
+                ), has_crop)
+            }
+            for key, value in environmental_data.items():
+                facts[key] = (np.broadcast_to(np.asarray(value), (count,)), None)
+            
+            def fact(key: str, default: Any) -> np.ndarray:
+                values, held = facts.get(key, (None, None))
+                if values is None:
+                    return np.full(count, default)
+                if held is None:
+                    return values
+                return np.where(held, values, default)
+            
+            # Rules fire in priority order, so later writes win as they
+            # would in forward_chain
+            for rule in self.rules:
+                fires = np.broadcast_to(np.asarray(rule.batch_conditions(fact), dtype=bool), (count,))
+                for action in rule.actions:
+                    for key, value in action.values.items():
+                        if key in results:
+                            results[key][fires] = value
+        else:
+            for i, plot in enumerate(plots):
+                environment = {
+                    key: value[i] if np.ndim(value) else value
+                    for key, value in environmental_data.items()
+                }
+                diagnosis = self.diagnose_plot(plot, environment)
+                for key, values in results.items():
+                    values[i] = diagnosis[key]
+        
+        results['priority'] = results['priority'].astype(np.int64)
+        results['treatment_required'] = results['treatment_required'].astype(bool)
+        return results
     
     def export_rules(self, filename: str):
         """Export all rules to a file."""
@@ -13,7 +13,9 @@ from .cell_state import (
     Task,
     Message,
     StatusReport,
-    CellKnowledge
+    CellKnowledge,
+    CellAttrs,
+    Weather
 )
 
 __all__ = [
@@ -24,5 +26,7 @@ __all__ = [
     'Task',
     'Message',
     'StatusReport',
-    'CellKnowledge'
+    'CellKnowledge',
+    'CellAttrs',
+    'Weather'
 ]
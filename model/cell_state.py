@@ -5,13 +5,26 @@ This module defines the core data structures used throughout the simulation incl
 cell states, tasks, messages, and status reports.
 """
 
-from enum import Enum
+import sys
+from enum import Enum, IntEnum
 from dataclasses import dataclass, field
 from typing import Optional, Dict, Any, Tuple
 
 
-class CellState(Enum):
-    """Enumeration of all possible farm cell states."""
+# Slotted dataclasses drop the per-instance __dict__ (Python 3.10+ only)
+_DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# Fixed-point scale for [0, 1] quantities stored as uint8 in cell arrays
+UNIT_SCALE = 255
+
+
+class CellState(IntEnum):
+    """
+    Enumeration of all possible farm cell states.
+    
+    Integer-valued so states can be stored in and compared against the
+    model's uint8 cell arrays and used directly as lookup-table indices.
+    """
     INITIAL = 0
     PLOUGHED = 1
     SOWN = 2
@@ -48,7 +61,7 @@ class AgentStatus(Enum):
     COMPLETED = "completed"
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Task:
     """
     Represents a work task to be executed by a worker agent.
@@ -73,7 +86,7 @@ class Task:
     completed_at: Optional[int] = None
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Message:
     """
     Represents a message passed through the message bus between agents.
@@ -90,7 +103,7 @@ class Message:
     payload: Dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class StatusReport:
     """
     Represents a status update from a worker agent to the master agent.
@@ -111,7 +124,7 @@ class StatusReport:
     message: str = ""
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class CellKnowledge:
     """
     Represents the master agent's knowledge about a specific grid cell.
@@ -132,3 +145,46 @@ class CellKnowledge:
     disease_probability: float
     last_updated: int
     pending_tasks: list = field(default_factory=list)
+
+
+class CellAttrs:
+    """
+    Mutable per-cell attributes tracked by the farm model.
+    
+    Uses __slots__ so attribute reads are plain slot lookups rather than
+    dictionary hashing.
+    
+    Attributes:
+        water_level: Water content level (0.0 to 1.0)
+        growth_progress: Crop growth percentage (0 to 100)
+        disease_probability: Probability of disease presence (0.0 to 1.0)
+        last_watered: Simulation step when the cell was last watered
+    """
+    __slots__ = ('water_level', 'growth_progress', 'disease_probability', 'last_watered')
+    
+    def __init__(self, water_level: float = 0.0, growth_progress: int = 0,
+                 disease_probability: float = 0.0, last_watered: int = 0):
+        self.water_level = water_level
+        self.growth_progress = growth_progress
+        self.disease_probability = disease_probability
+        self.last_watered = last_watered
+
+
+class Weather:
+    """
+    Current simulated weather conditions.
+    
+    Attributes:
+        temperature: Air temperature in °C
+        humidity: Relative humidity in percent
+        rain_forecast_24h: Whether rain is expected within 24 hours
+        wind_speed: Wind speed in km/h
+    """
+    __slots__ = ('temperature', 'humidity', 'rain_forecast_24h', 'wind_speed')
+    
+    def __init__(self, temperature: float = 25.0, humidity: float = 60.0,
+                 rain_forecast_24h: bool = False, wind_speed: float = 10.0):
+        self.temperature = temperature
+        self.humidity = humidity
+        self.rain_forecast_24h = rain_forecast_24h
+        self.wind_speed = wind_speed
@@ -9,15 +9,70 @@ from mesa import Model
 from mesa.space import MultiGrid
 from mesa.time import RandomActivation
 from mesa.datacollection import DataCollector
-from typing import Dict, Tuple
-import sys
-import os
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
 
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model.cell_state import AgentStatus, CellState, CellAttrs, Message, Weather, UNIT_SCALE
+from utils.message_bus import MessageBus, TOPIC_TASK_COMPLETED
 
-from model.cell_state import CellState
-from utils.message_bus import MessageBus
+
+# Cell state groups, expanded below into lookup tables
+_CROP_GROWTH_STATES = frozenset({CellState.GROWING, CellState.HEALTHY, CellState.NEED_WATER})
+_CROP_STATES = _CROP_GROWTH_STATES | {CellState.SOWN}
+_ACTIVE_GROWTH_STATES = frozenset({CellState.GROWING, CellState.HEALTHY})
+
+# Whether a state holds a (growing) crop or is actively growing, indexed by
+# CellState value: one load per state, for single cells or whole arrays
+_CROP_GROWTH_STATE_LUT = np.array([state in _CROP_GROWTH_STATES for state in CellState], dtype=bool)
+_CROP_STATE_LUT = np.array([state in _CROP_STATES for state in CellState], dtype=bool)
+_ACTIVE_GROWTH_STATE_LUT = np.array([state in _ACTIVE_GROWTH_STATES for state in CellState], dtype=bool)
+
+# CellState members indexed by value, for decoding the state array
+_STATE_BY_VALUE = tuple(CellState)
+
+# Temperature (°C), humidity (%) and wind speed (km/h): the full width of
+# each weather update's random step, and the range each is clamped to
+_WEATHER_STEP = np.array([4.0, 10.0, 6.0])
+_WEATHER_LOW = np.array([20.0, 40.0, 5.0])
+_WEATHER_HIGH = np.array([35.0, 90.0, 40.0])
+
+# Byte alignment of the cell arrays: one cache line, and the width of the
+# widest (AVX-512) vector loads
+_ARRAY_ALIGN = 64
+
+# Flat cells per tile of the dirty-tile bitmap; ~20 KB of cell arrays plus
+# temporaries, sized so a bulk sweep over one tile stays within L2 cache
+_TILE_CELLS = 4096
+
+
+def _quantize_unit(value: float) -> int:
+    """Encode a [0, 1] value as uint8 fixed point, clamping out-of-range input."""
+    return round(min(1.0, max(0.0, value)) * UNIT_SCALE)
+
+
+def _aligned_full(size: int, fill_value, dtype) -> np.ndarray:
+    """
+    Allocate a filled 1-D array whose data starts on an _ARRAY_ALIGN boundary.
+    
+    Args:
+        size: Number of elements
+        fill_value: Initial value of every element
+        dtype: Element type
+    
+    Returns:
+        Aligned array of the given size and dtype
+    """
+    nbytes = size * np.dtype(dtype).itemsize
+    buf = np.empty(nbytes + _ARRAY_ALIGN, dtype=np.uint8)
+    offset = -buf.ctypes.data % _ARRAY_ALIGN
+    arr = buf[offset:offset + nbytes].view(dtype)
+    arr.fill(fill_value)
+    return arr
+
+
+def _metric_reporter(name: str) -> Callable[['FarmModel'], float]:
+    """Build a DataCollector reporter reading one of the model's step metrics."""
+    return lambda model: model.metrics[name]
 
 
 class FarmModel(Model):
@@ -52,39 +107,72 @@ class FarmModel(Model):
         # Initialize message bus for agent communication
         self.message_bus = MessageBus()
         
-        # Track cell states for each grid position
-        self.cell_states: Dict[Tuple[int, int], CellState] = {}
+        # Task completion messages produced this step, published as one batch
+        self.completed_task_messages: List[Message] = []
+        
+        # Cell grid as a struct of arrays indexed by flat cell id
+        # (y * width + x), all cells starting INITIAL. Growth progress
+        # (0-100) and disease probability are stored in uint8, the latter
+        # as fixed point (value * UNIT_SCALE). Water level drives the
+        # threshold transitions, so water_level holds it exactly and
+        # water_level_arr is a fixed point copy that keeps the agents'
+        # bulk sweeps bandwidth-light. Each array starts on a cache line.
+        num_cells = width * height
+        self.cell_state_arr = _aligned_full(num_cells, CellState.INITIAL.value, np.uint8)
+        self.water_level = _aligned_full(num_cells, 0.0, np.float64)
+        self.growth_progress_arr = _aligned_full(num_cells, 0, np.uint8)
+        self.last_watered = _aligned_full(num_cells, 0, np.int64)
+        self.water_level_arr = _aligned_full(num_cells, 0, np.uint8)
+        self.disease_probability_arr = _aligned_full(num_cells, 0, np.uint8)
+        
+        # Array holding each directly stored CellAttrs field, for
+        # update_cell_attributes
+        self._attribute_arrays: Dict[str, np.ndarray] = {
+            'water_level': self.water_level,
+            'growth_progress': self.growth_progress_arr,
+            'last_watered': self.last_watered
+        }
         
-        # Track cell attributes (water level, growth progress, disease probability)
-        self.cell_attributes: Dict[Tuple[int, int], Dict] = {}
+        # (height, width) view of cell_state_arr, row y holding cells (x, y)
+        self.state_grid = self.cell_state_arr.reshape(height, width)
         
-        # Initialize all cells to INITIAL state
-        for x in range(width):
-            for y in range(height):
-                self.cell_states[(x, y)] = CellState.INITIAL
-                self.cell_attributes[(x, y)] = {
-                    'water_level': 0.0,
-                    'growth_progress': 0,
-                    'disease_probability': 0.0,
-                    'last_watered': 0
-                }
+        # Cells per state, indexed by CellState value, kept current by every
+        # state write; and the crop summary behind the yield and stress
+        # reports, recomputed on demand after any cell write clears it and
+        # carried over by step_cells
+        self._state_counts = np.bincount(self.cell_state_arr, minlength=len(CellState))
+        self._crop_summary: Optional[Tuple[int, int, int]] = None
+        
+        # Flags, by flat id, of cells changed since the master agent last
+        # read the arrays; an array so bulk updates flag cells in one scatter
+        self.dirty_cells = np.zeros(num_cells, dtype=bool)
+        
+        # One flag per tile of tile_cells consecutive flat ids, set when a
+        # cell in the tile changes state so bulk scans can skip idle tiles
+        self.tile_cells = _TILE_CELLS
+        self.dirty_tiles = np.zeros(-(-num_cells // _TILE_CELLS), dtype=bool)
+        
+        # Flat obstacle grid used by agent pathfinding (non-zero = blocked)
+        self.obstacle_grid = np.zeros(num_cells, dtype=np.uint8)
         
         # Track simulation step
         self.step_count = 0
         
+        # (interval, callback) pairs run on steps that are multiples of interval
+        self._periodic: List[Tuple[int, Callable[[], None]]] = []
+        
+        # Statistics of the latest step, computed once by update_metrics and
+        # read by every data collector reporter
+        self.metrics: Dict[str, float] = {}
+        
         # Initialize data collector for statistics
         self.datacollector = DataCollector(
             model_reporters={
-                "Ploughed": lambda m: m.count_cells_by_state(CellState.PLOUGHED),
-                "Sown": lambda m: m.count_cells_by_state(CellState.SOWN),
-                "Growing": lambda m: m.count_cells_by_state(CellState.GROWING),
-                "Healthy": lambda m: m.count_cells_by_state(CellState.HEALTHY),
-                "Harvested": lambda m: m.harvested_count,
-                "Diseased": lambda m: m.count_cells_by_state(CellState.DISEASED),
-                "Temperature": lambda m: m.weather['temperature'],
-                "Humidity": lambda m: m.weather['humidity'],
-                "Estimated_Yield": lambda m: m.calculate_yield_prediction()['estimated_yield'],
-                "Water_Stress": lambda m: m.get_stress_indicators()['water_stress_percentage'],
+                name: _metric_reporter(name)
+                for name in (
+                    "Ploughed", "Sown", "Growing", "Healthy", "Harvested", "Diseased",
+                    "Temperature", "Humidity", "Estimated_Yield", "Water_Stress"
+                )
             }
         )
         
@@ -92,12 +180,16 @@ class FarmModel(Model):
         self.harvested_count = 0
         
         # Weather simulation
-        self.weather = {
-            'temperature': 25.0,
-            'humidity': 60.0,
-            'rain_forecast_24h': False,
-            'wind_speed': 10.0
-        }
+        self.weather = Weather(
+            temperature=25.0,
+            humidity=60.0,
+            rain_forecast_24h=False,
+            wind_speed=10.0
+        )
+        
+        # Weather generator, seeded from the model's RNG so runs stay
+        # reproducible along with the agents
+        self._weather_rng = np.random.default_rng(self.random.getrandbits(64))
         
         # Yield prediction tracking
         self.total_yield_estimate = 0.0
@@ -107,9 +199,42 @@ class FarmModel(Model):
         self.master_agent = None
         self.worker_agents = []
         
+        # Number of worker agents in each status, kept current by the
+        # workers' status transitions
+        self.worker_status_counts: Dict[AgentStatus, int] = dict.fromkeys(AgentStatus, 0)
+        
         # Create agents
         self.create_agents()
     
+    @property
+    def cell_states(self) -> Dict[Tuple[int, int], CellState]:
+        """
+        Snapshot of every cell's state keyed by grid position (x, y).
+        
+        Built from cell_state_arr on each access; writes to it are not
+        reflected in the model, use set_cell_state instead.
+        """
+        width = self.width
+        return {
+            (idx % width, idx // width): _STATE_BY_VALUE[value]
+            for idx, value in enumerate(self.cell_state_arr.tolist())
+        }
+    
+    def _cell_index(self, pos: Tuple[int, int]) -> int:
+        """
+        Flat cell id of a grid position.
+        
+        Args:
+            pos: Grid position (x, y)
+        
+        Returns:
+            y * width + x, or -1 for positions off the grid
+        """
+        x, y = pos
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return -1
+    
     def get_cell_state(self, pos: Tuple[int, int]) -> CellState:
         """
         Get the current state of a grid cell.
@@ -120,7 +245,8 @@ class FarmModel(Model):
         Returns:
             Current CellState of the cell
         """
-        return self.cell_states.get(pos, CellState.INITIAL)
+        idx = self._cell_index(pos)
+        return _STATE_BY_VALUE[self.cell_state_arr[idx]] if idx >= 0 else CellState.INITIAL
     
     def set_cell_state(self, pos: Tuple[int, int], state: CellState):
         """
@@ -130,10 +256,19 @@ class FarmModel(Model):
             pos: Grid position (x, y)
             state: New CellState to set
         """
-        if pos in self.cell_states:
-            self.cell_states[pos] = state
+        idx = self._cell_index(pos)
+        if idx >= 0:
+            # Index with the plain int value, skipping IntEnum conversion
+            value = state.value
+            counts = self._state_counts
+            counts[self.cell_state_arr[idx]] -= 1
+            counts[value] += 1
+            self.cell_state_arr[idx] = value
+            self._crop_summary = None
+            self.dirty_cells[idx] = True
+            self.dirty_tiles[idx // self.tile_cells] = True
     
-    def get_cell_attributes(self, pos: Tuple[int, int]) -> Dict:
+    def get_cell_attributes(self, pos: Tuple[int, int]) -> CellAttrs:
         """
         Get the attributes of a grid cell.
         
@@ -141,9 +276,18 @@ class FarmModel(Model):
             pos: Grid position (x, y)
         
         Returns:
-            Dictionary of cell attributes
+            Copy of the cell's CellAttrs (defaults for positions off the
+            grid); use update_cell_attributes to change them
         """
-        return self.cell_attributes.get(pos, {})
+        idx = self._cell_index(pos)
+        if idx < 0:
+            return CellAttrs()
+        return CellAttrs(
+            water_level=float(self.water_level[idx]),
+            growth_progress=int(self.growth_progress_arr[idx]),
+            disease_probability=int(self.disease_probability_arr[idx]) / UNIT_SCALE,
+            last_watered=int(self.last_watered[idx])
+        )
     
     def update_cell_attributes(self, pos: Tuple[int, int], **kwargs):
         """
@@ -151,10 +295,123 @@ class FarmModel(Model):
         
         Args:
             pos: Grid position (x, y)
-            **kwargs: Attribute key-value pairs to update
+            **kwargs: CellAttrs field values to update
         """
-        if pos in self.cell_attributes:
-            self.cell_attributes[pos].update(kwargs)
+        idx = self._cell_index(pos)
+        if idx >= 0:
+            for name, value in kwargs.items():
+                if name == 'disease_probability':
+                    self.disease_probability_arr[idx] = _quantize_unit(value)
+                    continue
+                array = self._attribute_arrays.get(name)
+                if array is None:
+                    raise AttributeError(f"'CellAttrs' object has no attribute '{name}'")
+                array[idx] = value
+            self._encode_cell(idx)
+            self._crop_summary = None
+    
+    def _write_states(self, cells: np.ndarray, states: np.ndarray):
+        """
+        Set the states of many cells, keeping the state counts current.
+        
+        Args:
+            cells: Flat cell ids, without repeats
+            states: New CellState value for each cell
+        """
+        num_states = len(CellState)
+        self._state_counts -= np.bincount(self.cell_state_arr[cells], minlength=num_states)
+        self._state_counts += np.bincount(states, minlength=num_states)
+        self.cell_state_arr[cells] = states
+        self._crop_summary = None
+    
+    def _encode_cell(self, idx: int):
+        """Refresh a cell's fixed point water level and mark it changed."""
+        self.water_level_arr[idx] = _quantize_unit(self.water_level[idx])
+        self.dirty_cells[idx] = True
+    
+    def water_cells(self, positions: Sequence[Tuple[int, int]], amount: float = 0.3):
+        """
+        Water a batch of cells in one vectorized update.
+        
+        SOWN cells start GROWING. NEED_WATER cells become HEALTHY when growth
+        progress is over 50 and the new water level over 0.5, otherwise
+        GROWING. DISEASED cells are treated (disease probability -0.2) and
+        go back to GROWING once the water level exceeds 0.6. Cells in any
+        other state are left unchanged.
+        
+        Args:
+            positions: Grid positions (x, y) to water
+            amount: Water level added to each cell (capped at 1.0)
+        """
+        width = self.width
+        idxs = np.fromiter((y * width + x for x, y in positions), dtype=np.intp, count=len(positions))
+        
+        states = self.cell_state_arr[idxs]
+        water = self.water_level[idxs]
+        growth = self.growth_progress_arr[idxs]
+        disease = self.disease_probability_arr[idxs] / UNIT_SCALE
+        
+        sown = states == CellState.SOWN.value
+        need_water = states == CellState.NEED_WATER.value
+        diseased = states == CellState.DISEASED.value
+        
+        water = np.minimum(1.0, water + amount)
+        disease = np.maximum(0.0, disease - 0.2)
+        
+        new_states = states.copy()
+        new_states[sown] = CellState.GROWING.value
+        new_states[need_water] = np.where(
+            (growth[need_water] > 50) & (water[need_water] > 0.5),
+            CellState.HEALTHY.value,
+            CellState.GROWING.value
+        )
+        new_states[diseased & (water > 0.6)] = CellState.GROWING.value
+        
+        # Write the results back for the cells that were watered; repeats
+        # of a position share the same results, so each cell is written once
+        rows = np.flatnonzero(sown | need_water | diseased)
+        cells, first = np.unique(idxs[rows], return_index=True)
+        rows = rows[first]
+        self._write_states(cells, new_states[rows])
+        self.water_level[cells] = water[rows]
+        self.last_watered[cells] = self.step_count
+        treated = diseased[rows]
+        self.disease_probability_arr[cells[treated]] = np.rint(disease[rows[treated]] * UNIT_SCALE)
+        
+        self.water_level_arr[cells] = np.rint(np.clip(self.water_level[cells], 0.0, 1.0) * UNIT_SCALE)
+        self.dirty_cells[cells] = True
+        self.dirty_tiles[cells // self.tile_cells] = True
+    
+    def update_disease_probabilities(self, idxs: np.ndarray, probabilities: np.ndarray):
+        """
+        Set the disease probability of many cells at once.
+        
+        Args:
+            idxs: Flat cell ids (y * width + x) to update
+            probabilities: New disease probability for each cell in idxs
+        """
+        self.disease_probability_arr[idxs] = np.rint(np.clip(probabilities, 0.0, 1.0) * UNIT_SCALE)
+        self.dirty_cells[idxs] = True
+    
+    def _crops(self) -> Tuple[int, int, int]:
+        """
+        Summarize the crop cells in one pass over the grid.
+        
+        Returns:
+            Tuple of (total growth progress of GROWING, HEALTHY and
+            NEED_WATER cells, crop cells under the water stress level,
+            crop cells under the heat stress water level)
+        """
+        if self._crop_summary is None:
+            crops = np.flatnonzero(_CROP_STATE_LUT[self.cell_state_arr])
+            water = self.water_level[crops]
+            growth_stage = _CROP_GROWTH_STATE_LUT[self.cell_state_arr[crops]]
+            self._crop_summary = (
+                int(self.growth_progress_arr[crops[growth_stage]].sum()),
+                int(np.count_nonzero(water < 0.3)),
+                int(np.count_nonzero(water < 0.5))
+            )
+        return self._crop_summary
     
     def count_cells_by_state(self, state: CellState) -> int:
         """
@@ -166,7 +423,16 @@ class FarmModel(Model):
         Returns:
             Number of cells in the specified state
         """
-        return sum(1 for s in self.cell_states.values() if s == state)
+        return int(self._state_counts[state])
+    
+    def count_all_states(self) -> np.ndarray:
+        """
+        Count the cells in every state.
+        
+        Returns:
+            Array of cell counts indexed by CellState value
+        """
+        return self._state_counts.copy()
     
     def update_weather(self):
         """
@@ -175,22 +441,21 @@ class FarmModel(Model):
         Updates temperature, humidity, rain forecast, and wind speed
         with realistic variations.
         """
-        import random
+        weather = self.weather
         
-        # Temperature variation (20-35°C)
-        self.weather['temperature'] += random.uniform(-2, 2)
-        self.weather['temperature'] = max(20, min(35, self.weather['temperature']))
+        # All four draws in one call, each uniform on [0, 1)
+        draws = self._weather_rng.random(4)
         
-        # Humidity variation (40-90%)
-        self.weather['humidity'] += random.uniform(-5, 5)
-        self.weather['humidity'] = max(40, min(90, self.weather['humidity']))
+        # Temperature (20-35°C), humidity (40-90%) and wind speed
+        # (5-40 km/h) each take a uniform step, clamped in one np.clip
+        levels = np.array([weather.temperature, weather.humidity, weather.wind_speed])
+        steps = _WEATHER_STEP * draws[[0, 1, 3]] - _WEATHER_STEP / 2
+        weather.temperature, weather.humidity, weather.wind_speed = np.clip(
+            levels + steps, _WEATHER_LOW, _WEATHER_HIGH
+        ).tolist()
         
         # Rain forecast (10% chance of rain)
-        self.weather['rain_forecast_24h'] = random.random() < 0.1
-        
-        # Wind speed variation (5-40 km/h)
-        self.weather['wind_speed'] += random.uniform(-3, 3)
-        self.weather['wind_speed'] = max(5, min(40, self.weather['wind_speed']))
+        weather.rain_forecast_24h = bool(draws[2] < 0.1)
     
     def calculate_yield_prediction(self) -> dict:
         """
@@ -200,19 +465,15 @@ class FarmModel(Model):
             Dictionary with yield estimates and harvest timing
         """
         # Count crops at different stages
-        growing = self.count_cells_by_state(CellState.GROWING)
-        healthy = self.count_cells_by_state(CellState.HEALTHY)
-        ready = self.count_cells_by_state(CellState.READY_TO_HARVEST)
-        diseased = self.count_cells_by_state(CellState.DISEASED)
+        counts = self._state_counts
+        growing = int(counts[CellState.GROWING])
+        healthy = int(counts[CellState.HEALTHY])
+        ready = int(counts[CellState.READY_TO_HARVEST])
+        diseased = int(counts[CellState.DISEASED])
         
         # Calculate average growth progress
-        total_growth = 0
-        crop_count = 0
-        for pos, state in self.cell_states.items():
-            if state in [CellState.GROWING, CellState.HEALTHY, CellState.NEED_WATER]:
-                attrs = self.cell_attributes[pos]
-                total_growth += attrs.get('growth_progress', 0)
-                crop_count += 1
+        total_growth = self._crops()[0]
+        crop_count = int(counts[_CROP_GROWTH_STATE_LUT].sum())
         
         avg_growth = total_growth / crop_count if crop_count > 0 else 0
         
@@ -258,22 +519,15 @@ class FarmModel(Model):
         Returns:
             Dictionary with stress metrics
         """
-        water_stressed = 0
+        total_crops = int(self._state_counts[_CROP_STATE_LUT].sum())
+        
+        # Water stress
+        _, water_stressed, heat_stressed = self._crops()
+        
+        # Temperature stress (high temp + low water)
         temperature_stressed = 0
-        total_crops = 0
-        
-        for pos, state in self.cell_states.items():
-            if state in [CellState.GROWING, CellState.HEALTHY, CellState.NEED_WATER, CellState.SOWN]:
-                total_crops += 1
-                attrs = self.cell_attributes[pos]
-                
-                # Water stress
-                if attrs.get('water_level', 0) < 0.3:
-                    water_stressed += 1
-                
-                # Temperature stress (high temp + low water)
-                if self.weather['temperature'] > 32 and attrs.get('water_level', 0) < 0.5:
-                    temperature_stressed += 1
+        if self.weather.temperature > 32:
+            temperature_stressed = heat_stressed
         
         return {
             'water_stressed_count': water_stressed,
@@ -284,6 +538,32 @@ class FarmModel(Model):
             'overall_health_score': round((total_crops - water_stressed - temperature_stressed) / total_crops * 100, 1) if total_crops > 0 else 100
         }
     
+    def update_metrics(self) -> Dict[str, float]:
+        """
+        Compute the statistics recorded by the data collector.
+        
+        The yield prediction and stress indicators are each computed once
+        here, so collecting a step reads stored values only.
+        
+        Returns:
+            Dictionary of the metrics, keyed by data collector reporter name
+        """
+        counts = self._state_counts
+        weather = self.weather
+        self.metrics = {
+            "Ploughed": int(counts[CellState.PLOUGHED]),
+            "Sown": int(counts[CellState.SOWN]),
+            "Growing": int(counts[CellState.GROWING]),
+            "Healthy": int(counts[CellState.HEALTHY]),
+            "Harvested": self.harvested_count,
+            "Diseased": int(counts[CellState.DISEASED]),
+            "Temperature": weather.temperature,
+            "Humidity": weather.humidity,
+            "Estimated_Yield": self.calculate_yield_prediction()['estimated_yield'],
+            "Water_Stress": self.get_stress_indicators()['water_stress_percentage'],
+        }
+        return self.metrics
+    
     def create_agents(self):
         """
         Create and initialize all agents in the simulation.
@@ -312,7 +592,7 @@ class FarmModel(Model):
         self.grid.place_agent(ploughing_agent, (2, 2))
         self.schedule.add(ploughing_agent)
         self.worker_agents.append(ploughing_agent)
-        self.master_agent.worker_registry["ploughing"] = ploughing_agent
+        self.master_agent.register_worker("ploughing", ploughing_agent)
         agent_id += 1
         
         # Sowing Agent
@@ -320,7 +600,7 @@ class FarmModel(Model):
         self.grid.place_agent(sowing_agent, (self.width - 3, 2))
         self.schedule.add(sowing_agent)
         self.worker_agents.append(sowing_agent)
-        self.master_agent.worker_registry["sowing"] = sowing_agent
+        self.master_agent.register_worker("sowing", sowing_agent)
         agent_id += 1
         
         # Watering Agent
@@ -328,7 +608,7 @@ class FarmModel(Model):
         self.grid.place_agent(watering_agent, (2, self.height - 3))
         self.schedule.add(watering_agent)
         self.worker_agents.append(watering_agent)
-        self.master_agent.worker_registry["watering"] = watering_agent
+        self.master_agent.register_worker("watering", watering_agent)
         agent_id += 1
         
         # Harvesting Agent
@@ -336,7 +616,7 @@ class FarmModel(Model):
         self.grid.place_agent(harvesting_agent, (self.width - 3, self.height - 3))
         self.schedule.add(harvesting_agent)
         self.worker_agents.append(harvesting_agent)
-        self.master_agent.worker_registry["harvesting"] = harvesting_agent
+        self.master_agent.register_worker("harvesting", harvesting_agent)
         agent_id += 1
         
         # Drone Monitoring Agent
@@ -344,7 +624,7 @@ class FarmModel(Model):
         self.grid.place_agent(drone_agent, (center_x, 2))
         self.schedule.add(drone_agent)
         self.worker_agents.append(drone_agent)
-        self.master_agent.worker_registry["drone"] = drone_agent
+        self.master_agent.register_worker("drone", drone_agent)
     
     def step_cells(self):
         """
@@ -357,35 +637,71 @@ class FarmModel(Model):
         
         Also decreases water level and increases growth progress over time.
         """
-        for pos, state in list(self.cell_states.items()):
-            attrs = self.cell_attributes[pos]
-            
-            # Update growing and healthy cells
-            if state in [CellState.GROWING, CellState.HEALTHY]:
-                # Decrease water level over time
-                new_water_level = max(0.0, attrs['water_level'] - 0.05)
-                attrs['water_level'] = new_water_level
-                
-                # Increase growth progress if sufficient water
-                if new_water_level > 0.3:
-                    attrs['growth_progress'] = min(100, attrs['growth_progress'] + 2)
-                
-                # Check for state transitions
-                if state == CellState.GROWING:
-                    if new_water_level < 0.3:
-                        # Needs water
-                        self.cell_states[pos] = CellState.NEED_WATER
-                    elif attrs['growth_progress'] > 50 and new_water_level > 0.5:
-                        # Transition to healthy
-                        self.cell_states[pos] = CellState.HEALTHY
-                
-                elif state == CellState.HEALTHY:
-                    if new_water_level < 0.3:
-                        # Needs water
-                        self.cell_states[pos] = CellState.NEED_WATER
-                    elif attrs['growth_progress'] >= 100:
-                        # Ready to harvest
-                        self.cell_states[pos] = CellState.READY_TO_HARVEST
+        # Only growing and healthy cells are updated, working in place on
+        # gathered copies of their values
+        idxs = np.flatnonzero(_ACTIVE_GROWTH_STATE_LUT[self.cell_state_arr])
+        if not idxs.size:
+            return
+        states = self.cell_state_arr[idxs]
+        
+        # Decrease water level over time
+        water = self.water_level[idxs]
+        water -= 0.05
+        np.maximum(water, 0.0, out=water)
+        
+        # Increase growth progress if sufficient water
+        growth = self.growth_progress_arr[idxs]
+        watered = water > 0.3
+        np.add(growth, 2, out=growth, where=watered)
+        np.minimum(growth, 100, out=growth, where=watered)
+        
+        # State transitions: both states need water below 0.3; otherwise
+        # GROWING turns HEALTHY past 50% growth with water over 0.5, and
+        # HEALTHY is ready to harvest at full growth
+        growing = states == CellState.GROWING.value
+        states[growing & (growth > 50) & (water > 0.5)] = CellState.HEALTHY.value
+        states[~growing & (growth >= 100)] = CellState.READY_TO_HARVEST.value
+        states[water < 0.3] = CellState.NEED_WATER.value
+        
+        # Disease probability is untouched, so only the water level needs
+        # re-encoding
+        water_raw = np.rint(np.clip(water, 0.0, 1.0) * UNIT_SCALE)
+        
+        # Carry a computed crop summary over the step by swapping these
+        # cells' share of it: all were growing crops before, and those now
+        # ready to harvest have left the crops
+        summary = self._crop_summary
+        if summary is not None:
+            old_water = self.water_level[idxs]
+            crops = states != CellState.READY_TO_HARVEST.value
+            new_water = water[crops]
+            summary = (
+                summary[0] - int(self.growth_progress_arr[idxs].sum()) + int(growth[crops].sum()),
+                summary[1] - int(np.count_nonzero(old_water < 0.3))
+                + int(np.count_nonzero(new_water < 0.3)),
+                summary[2] - int(np.count_nonzero(old_water < 0.5))
+                + int(np.count_nonzero(new_water < 0.5))
+            )
+        
+        self._write_states(idxs, states)
+        self.water_level[idxs] = water
+        self.growth_progress_arr[idxs] = growth
+        self.water_level_arr[idxs] = water_raw
+        self.dirty_cells[idxs] = True
+        self._crop_summary = summary
+    
+    def register_periodic(self, interval: int, callback: Callable[[], None]):
+        """
+        Register a callback to run every interval steps.
+        
+        Callbacks run after all agents have stepped, on steps whose count
+        is a multiple of the interval.
+        
+        Args:
+            interval: Number of steps between calls
+            callback: Function called with no arguments
+        """
+        self._periodic.append((interval, callback))
     
     def step(self):
         """
@@ -408,5 +724,17 @@ class FarmModel(Model):
         # Execute all agent steps
         self.schedule.step()
         
+        # Run periodic callbacks that are due this step
+        step = self.step_count
+        for interval, callback in self._periodic:
+            if step % interval == 0:
+                callback()
+        
+        # Publish this step's task completions in one batch
+        if self.completed_task_messages:
+            self.message_bus.publish_batch(TOPIC_TASK_COMPLETED, self.completed_task_messages)
+            self.completed_task_messages = []
+        
         # Collect data
+        self.update_metrics()
         self.datacollector.collect(self)
@@ -5,11 +5,6 @@ This module configures the Mesa visualization server including grid rendering,
 agent portrayal, charts, and the web interface.
 """
 
-import sys
-import os
-
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from mesa.visualization.modules import CanvasGrid, ChartModule
 from mesa.visualization.ModularVisualization import ModularServer
 from model.farm_model import FarmModel
@@ -96,43 +91,6 @@ def get_cell_color(model, x, y):
     return CELL_COLORS.get(cell_state, "#FFFFFF")
 
 
-# Custom JavaScript for cell coloring
-def create_grid_with_colors():
-    """
-    Create a CanvasGrid with custom cell coloring.
-    
-    Returns:
-        Configured CanvasGrid instance
-    """
-    grid = CanvasGrid(agent_portrayal, 20, 20, 500, 500)
-    
-    # Override the render method to include cell background colors
-    original_render = grid.render
-    
-    def render_with_colors(model):
-        # Get the standard rendering
-        grid_state = original_render(model)
-        
-        # Add cell colors
-        for x in range(model.width):
-            for y in range(model.height):
-                cell_state = model.get_cell_state((x, y))
-                color = CELL_COLORS.get(cell_state, "#FFFFFF")
-                
-                # Add color information to grid state
-                if "layers" not in grid_state:
-                    grid_state["layers"] = []
-                
-                # Create a background layer for cell colors
-                grid_state.setdefault("cell_colors", {})
-                grid_state["cell_colors"][f"{x},{y}"] = color
-        
-        return grid_state
-    
-    grid.render = render_with_colors
-    return grid
-
-
 def create_server():
     """
     Create and configure the Mesa visualization server.
@@ -51,7 +51,7 @@ goto menu
 
 :train
 echo Training ML disease classifier...
-python ml/disease_classifier.py
+python -m ml.disease_classifier
 echo.
 pause
 goto menu
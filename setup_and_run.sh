@@ -31,7 +31,7 @@ run_tests() {
 # Function to train ML model
 train_ml() {
     echo "Training ML disease classifier..."
-    python ml/disease_classifier.py
+    python -m ml.disease_classifier
     echo ""
 }
 
@@ -0,0 +1,74 @@
+"""
+Tests for the ML disease classifier.
+
+Checks the flattened random forest against sklearn's own predict_proba.
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.disease_classifier import DiseaseClassifier
+
+
+def _trained_classifier():
+    """A small random forest classifier trained on synthetic data."""
+    classifier = DiseaseClassifier(n_jobs=1)
+    classifier.model.set_params(n_estimators=20)
+    X, y = classifier.generate_synthetic_training_data(n_samples=2000)
+    classifier.train(X, y)
+    return classifier, X
+
+
+def test_flat_forest_matches_predict_proba():
+    """Test that _predict_proba matches model.predict_proba on random samples."""
+    classifier, X = _trained_classifier()
+    assert classifier._forest is not None
+
+    rng = np.random.default_rng(0)
+    low, high = X.min(axis=0), X.max(axis=0)
+    for size in (1, 7, classifier._FLAT_FOREST_MAX_ROWS):
+        samples = rng.uniform(low, high, size=(size, X.shape[1]))
+        # Include a training sample, which lies right next to split thresholds
+        samples[0] = X[rng.integers(len(X))]
+        np.testing.assert_allclose(
+            classifier._predict_proba(samples),
+            classifier.model.predict_proba(samples),
+            rtol=0, atol=1e-12
+        )
+
+    print(" Flattened forest equivalence test passed")
+
+
+def test_flat_forest_keeps_leaf_distributions():
+    """Test that the flattened forest stores one class distribution per leaf."""
+    classifier, _ = _trained_classifier()
+    _, _, _, _, value, leaf_row, roots, _ = classifier._forest
+
+    trees = [estimator.tree_ for estimator in classifier.model.estimators_]
+    assert len(value) == sum(int((tree.children_left < 0).sum()) for tree in trees)
+    for tree, root in zip(trees, roots.tolist()):
+        leaves = np.flatnonzero(tree.children_left < 0)
+        counts = tree.value[leaves, 0, :]
+        np.testing.assert_allclose(
+            value[leaf_row[root + leaves]],
+            counts / counts.sum(axis=1, keepdims=True),
+            rtol=0, atol=1e-12
+        )
+
+    print(" Flattened forest leaf table test passed")
+
+
+def run_all_tests():
+    """Run all disease classifier tests."""
+    test_flat_forest_matches_predict_proba()
+    test_flat_forest_keeps_leaf_distributions()
+    print("All disease classifier tests passed!")
+
+
+if __name__ == "__main__":
+    run_all_tests()
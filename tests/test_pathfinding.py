@@ -0,0 +1,160 @@
+"""
+Tests for grid pathfinding.
+
+Checks the A* search, the cached path lookup and the L-shaped path
+shortcut against a breadth-first reference and plain A* on random
+obstacle masks.
+"""
+
+import sys
+import os
+import threading
+from collections import deque
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pathfinding import _astar_core, _find_path, calculate_path
+
+
+def _bfs_distance(start_idx, goal_idx, width, height, blocked):
+    """Number of moves on a shortest path, or None if the goal is unreachable."""
+    distance = {start_idx: 0}
+    queue = deque([start_idx])
+    while queue:
+        current = queue.popleft()
+        if current == goal_idx:
+            return distance[current]
+        x, y = current % width, current // width
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            neighbor = ny * width + nx
+            if 0 <= nx < width and 0 <= ny < height and not blocked[neighbor] and neighbor not in distance:
+                distance[neighbor] = distance[current] + 1
+                queue.append(neighbor)
+    return None
+
+
+def _random_search(rng):
+    """Random grid size, obstacle mask, and start and goal cells."""
+    width, height = (int(n) for n in rng.integers(1, 12, size=2))
+    grid = (rng.random(width * height) < rng.random() * 0.4).astype(np.uint8)
+    start_idx, goal_idx = (int(n) for n in rng.integers(0, width * height, size=2))
+    return width, height, grid, start_idx, goal_idx
+
+
+def _assert_shortest_path(path, start_idx, goal_idx, width, height, grid):
+    """Check a path is a shortest obstacle-free path, or empty if none exists."""
+    distance = _bfs_distance(start_idx, goal_idx, width, height, grid)
+    if distance is None:
+        assert path == []
+        return
+    assert path[0] == start_idx and path[-1] == goal_idx
+    assert len(path) == distance + 1
+    assert not any(grid[i] for i in path)
+    for a, b in zip(path, path[1:]):
+        assert abs(a % width - b % width) + abs(a // width - b // width) == 1
+
+
+def test_astar_finds_shortest_paths():
+    """Test that A* finds a shortest path on random obstacle masks."""
+    rng = np.random.default_rng(0)
+    for _ in range(2000):
+        width, height, grid, start_idx, goal_idx = _random_search(rng)
+        grid[start_idx] = grid[goal_idx] = 0
+        path = _astar_core(start_idx, goal_idx, width, height, grid.tobytes())
+        _assert_shortest_path(path, start_idx, goal_idx, width, height, grid)
+
+    print(" A* shortest path test passed")
+
+
+def test_cached_paths_follow_obstacle_mask():
+    """Test that cached lookups return the same valid path for each mask."""
+    rng = np.random.default_rng(1)
+    searches = [_random_search(rng) for _ in range(500)]
+    first = [_find_path((s % w, s // w), (g % w, g // w), w, h, grid) for w, h, grid, s, g in searches]
+
+    # Again, switching masks on every search, and with obstacles as sets
+    for (width, height, grid, start_idx, goal_idx), path in zip(searches, first):
+        start = (start_idx % width, start_idx // width)
+        goal = (goal_idx % width, goal_idx // width)
+        obstacle_set = {(int(i) % width, int(i) // width) for i in np.flatnonzero(grid)}
+        assert _find_path(start, goal, width, height, grid) == path
+        assert _find_path(start, goal, width, height, grid) == path
+        assert _find_path(start, goal, width, height, obstacle_set) == path
+        if grid[start_idx] or grid[goal_idx]:
+            assert path == []
+        else:
+            _assert_shortest_path(path, start_idx, goal_idx, width, height, grid)
+
+    print(" Path cache test passed")
+
+
+def test_path_cache_across_threads():
+    """Test that threads searching over different masks never get each other's paths."""
+    width = height = 12
+    rng = np.random.default_rng(2)
+    grids = [(rng.random(width * height) < 0.3).astype(np.uint8) for _ in range(4)]
+    errors = []
+
+    def search(grid, seed):
+        local_rng = np.random.default_rng(seed)
+        try:
+            for _ in range(300):
+                start_idx, goal_idx = (int(n) for n in local_rng.choice(np.flatnonzero(grid == 0), 2))
+                path = _find_path(
+                    (start_idx % width, start_idx // width),
+                    (goal_idx % width, goal_idx // width),
+                    width, height, grid
+                )
+                _assert_shortest_path(path, start_idx, goal_idx, width, height, grid)
+        except Exception as e:  # reported from the main thread
+            errors.append(e)
+
+    threads = [threading.Thread(target=search, args=(grid, i)) for i, grid in enumerate(grids)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+
+    print(" Threaded path cache test passed")
+
+
+def test_find_path_matches_astar():
+    """Test that _find_path, L-path shortcut included, returns A*'s path."""
+    rng = np.random.default_rng(3)
+    for _ in range(2000):
+        width, height, grid, start_idx, goal_idx = _random_search(rng)
+        start = (start_idx % width, start_idx // width)
+        goal = (goal_idx % width, goal_idx // width)
+        path = _find_path(start, goal, width, height, grid)
+        if grid[start_idx] or grid[goal_idx]:
+            assert path == []
+        else:
+            assert path == _astar_core(start_idx, goal_idx, width, height, grid.tobytes())
+
+    print(" L-path shortcut equivalence test passed")
+
+
+def test_calculate_path_without_obstacles():
+    """Test the obstacle-free path runs along the start column, then the goal row."""
+    assert calculate_path((1, 3), (4, 0), 5, 5) == [(1, 3), (1, 2), (1, 1), (1, 0), (2, 0), (3, 0), (4, 0)]
+    assert calculate_path((2, 2), (2, 2), 5, 5) == [(2, 2)]
+
+    print(" Obstacle-free path test passed")
+
+
+def run_all_tests():
+    """Run all pathfinding tests."""
+    test_astar_finds_shortest_paths()
+    test_cached_paths_follow_obstacle_mask()
+    test_path_cache_across_threads()
+    test_find_path_matches_astar()
+    test_calculate_path_without_obstacles()
+    print("All pathfinding tests passed!")
+
+
+if __name__ == "__main__":
+    run_all_tests()
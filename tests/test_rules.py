@@ -0,0 +1,223 @@
+"""
+Tests for the rule-based reasoning engine.
+
+Checks the compiled rule network against plain forward chaining, the
+diagnosis cache against cold runs, and the vectorized batch diagnosis
+against per-plot diagnosis, on random plots.
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kr.ontology import FarmOntology, Plot, SoilType
+from kr.rules import Condition, Rule, RuleEngine, SetFacts
+
+
+# Values for each fact the rules read, including every rule threshold
+_HUMIDITY = [60, 80, 85]
+_TEMPERATURE = [10, 15, 20, 25, 30, 35]
+_DETECTED = [False, True]
+_DISEASE_PROBABILITY = [0.2, 0.7, 0.9]
+_NUTRIENT = [10, 15, 20, 50]
+_MOISTURE = [0.1, 0.3, 0.5, 0.9, 0.95]
+_HEALTH = [0.5, 1.0]
+
+
+def _random_plots(rng, count):
+    """Random plots with random per-plot environmental data."""
+    crops = list(FarmOntology().crops.values())
+    plots = []
+    for i in range(count):
+        plot = Plot(
+            id=f"plot_{i}",
+            position=(i, 0),
+            area=100.0,
+            soil_type=SoilType.LOAM,
+            soil_moisture=float(rng.choice(_MOISTURE)),
+            soil_nutrients={},
+            is_ploughed=bool(rng.integers(2))
+        )
+        if rng.integers(2):
+            crop = crops[rng.integers(len(crops))]
+            plot.current_crop = type(crop)(
+                type=crop.type,
+                name=crop.name,
+                growth_duration=crop.growth_duration,
+                water_requirement=crop.water_requirement,
+                optimal_temperature=crop.optimal_temperature,
+                suitable_soil_types=list(crop.suitable_soil_types),
+                health_status=float(rng.choice(_HEALTH))
+            )
+        plots.append(plot)
+
+    environmental_data = {
+        'humidity': rng.choice(_HUMIDITY, count),
+        'temperature': rng.choice(_TEMPERATURE, count),
+        'leaf_spots_detected': rng.choice(_DETECTED, count),
+        'white_powder_detected': rng.choice(_DETECTED, count),
+        'wilting_detected': rng.choice(_DETECTED, count),
+        'disease_probability': rng.choice(_DISEASE_PROBABILITY, count),
+        'nitrogen': rng.choice(_NUTRIENT, count),
+        'phosphorus': rng.choice(_NUTRIENT, count),
+    }
+    return plots, environmental_data
+
+
+def _plot_environment(environmental_data, i):
+    """Environmental data of one plot as plain Python values."""
+    return {
+        key: values[i].item() if np.ndim(values) else values
+        for key, values in environmental_data.items()
+    }
+
+
+def _reference_forward_chain(rules, facts, max_iterations=100):
+    """Forward chaining by re-evaluating every rule each cycle."""
+    fired = []
+    fired_ids = set()
+    for _ in range(max_iterations):
+        fired_any = False
+        for rule in rules:
+            if rule.id in fired_ids or not rule.evaluate(facts):
+                continue
+            rule.execute(facts)
+            fired_ids.add(rule.id)
+            fired.append(rule.id)
+            fired_any = True
+        if not fired_any:
+            break
+    return fired
+
+
+def _add_chained_rules(engine):
+    """Add rules reading derived facts, with plain predicates and actions."""
+    engine.add_rule(Rule(
+        id="escalate", name="Escalate high risk",
+        conditions=[Condition(('disease_risk',), lambda risk: risk == 'high', ('low',))],
+        actions=[SetFacts({'priority': 99})],
+        priority=5
+    ))
+    engine.add_rule(Rule(
+        id="alert", name="Alert on urgent priority",
+        conditions=[lambda facts: facts.get('priority', 50) >= 90],
+        actions=[SetFacts({'alerted': True})],
+        priority=100
+    ))
+    engine.add_rule(Rule(
+        id="log", name="Log alerts",
+        conditions=[Condition(('alerted',), bool, (False,))],
+        actions=[lambda facts: facts.update(logged=facts.get('priority'))],
+        priority=1
+    ))
+
+
+def test_network_matches_forward_chaining():
+    """Test that the compiled network fires what plain forward chaining fires."""
+    rng = np.random.default_rng(2)
+    engine = RuleEngine()
+    _add_chained_rules(engine)
+
+    plots, environmental_data = _random_plots(rng, 200)
+    for i, plot in enumerate(plots):
+        facts = {'water_level': plot.soil_moisture, 'soil_ploughed': plot.is_ploughed}
+        if plot.current_crop:
+            facts['crop_growing'] = True
+            facts['growth_progress'] = plot.current_crop.health_status * 100
+        facts.update(_plot_environment(environmental_data, i))
+
+        engine.reset()
+        for key, value in facts.items():
+            engine.add_fact(key, value)
+        fired = engine.forward_chain()
+
+        expected_facts = dict(facts)
+        assert fired == _reference_forward_chain(engine.rules, expected_facts)
+        assert engine.facts == expected_facts
+        assert engine.fired_rules == set(fired)
+
+    print(" Rule network equivalence test passed")
+
+
+def test_cached_diagnosis_matches_cold_run():
+    """Test that a diagnosis cache hit leaves the same state as a cold run."""
+    rng = np.random.default_rng(3)
+    plots, environmental_data = _random_plots(rng, 100)
+    environments = [_plot_environment(environmental_data, i) for i in range(len(plots))]
+
+    engine = RuleEngine()
+    for plot, environment in zip(plots, environments):
+        engine.diagnose_plot(plot, environment)
+
+    # Every plot again, in a different order, now mostly from the cache
+    for i in rng.permutation(len(plots)):
+        cached = engine.diagnose_plot(plots[i], environments[i])
+        cold_engine = RuleEngine()
+        cold = cold_engine.diagnose_plot(plots[i], environments[i])
+
+        assert cached == cold
+        assert engine.facts == cold_engine.facts
+        assert engine.fired_rules == cold_engine.fired_rules
+
+    print(" Diagnosis cache test passed")
+
+
+def test_batch_matches_diagnose_plot():
+    """Test that batch diagnosis gives each plot's diagnose_plot result."""
+    rng = np.random.default_rng(0)
+    engine = RuleEngine()
+    assert engine._batchable()
+
+    for _ in range(20):
+        plots, environmental_data = _random_plots(rng, 50)
+        batch = engine.diagnose_plots_batch(plots, environmental_data)
+
+        for i, plot in enumerate(plots):
+            diagnosis = RuleEngine().diagnose_plot(plot, _plot_environment(environmental_data, i))
+            for key, values in batch.items():
+                assert values[i] == diagnosis[key], (key, i)
+
+    print(" Batch diagnosis equivalence test passed")
+
+
+def test_batch_keeps_supplied_recommendations():
+    """Test that recommendations given as environmental facts stand unless a rule fires."""
+    rng = np.random.default_rng(1)
+    engine = RuleEngine()
+    plots, environmental_data = _random_plots(rng, 50)
+    environmental_data['priority'] = rng.choice([10, 90], 50)
+    environmental_data['action_required'] = rng.choice(['inspect', 'none'], 50)
+    environmental_data['disease_risk'] = 'medium'
+
+    batch = engine.diagnose_plots_batch(plots, environmental_data)
+    for i, plot in enumerate(plots):
+        environment = _plot_environment(environmental_data, i)
+        diagnosis = RuleEngine().diagnose_plot(plot, environment)
+        for key, values in batch.items():
+            assert values[i] == diagnosis[key], (key, i)
+
+    # With no rule firing, the supplied values come back unchanged
+    plot = Plot(id="idle", position=(0, 0), area=100.0, soil_type=SoilType.LOAM,
+                soil_moisture=0.5, soil_nutrients={})
+    batch = engine.diagnose_plots_batch([plot], {'priority': 10, 'action_required': 'x'})
+    assert batch['priority'][0] == 10
+    assert batch['action_required'][0] == 'x'
+
+    print(" Supplied recommendations test passed")
+
+
+def run_all_tests():
+    """Run all rule engine tests."""
+    test_network_matches_forward_chaining()
+    test_cached_diagnosis_matches_cold_run()
+    test_batch_matches_diagnose_plot()
+    test_batch_keeps_supplied_recommendations()
+    print("All rule engine tests passed!")
+
+
+if __name__ == "__main__":
+    run_all_tests()
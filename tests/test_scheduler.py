@@ -0,0 +1,100 @@
+"""
+Tests for the CSP task scheduler.
+
+Covers greedy scheduling and, when OR-Tools is installed, the opt-in
+CP-SAT path for large task batches.
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from csp.scheduler import CSPScheduler, ResourceType, cp_model, _CP_SAT_MIN_TASKS
+
+
+def _priority_tasks():
+    """
+    Build a batch where one priority-100 task competes with two
+    priority-60 tasks for the same water, padded with monitoring tasks
+    up to the CP-SAT batch size.
+    """
+    tasks = [
+        {'task_id': 'high', 'task_type': 'WATER', 'target_cell': (0, 0),
+         'priority': 100, 'resources': {ResourceType.WATER: 60.0}},
+        {'task_id': 'mid_a', 'task_type': 'WATER', 'target_cell': (0, 1),
+         'priority': 60, 'resources': {ResourceType.WATER: 50.0}},
+        {'task_id': 'mid_b', 'task_type': 'WATER', 'target_cell': (0, 2),
+         'priority': 60, 'resources': {ResourceType.WATER: 50.0}},
+    ]
+    tasks.extend(
+        {'task_id': f'monitor_{n}', 'task_type': 'MONITOR', 'target_cell': (1, n),
+         'priority': 10}
+        for n in range(_CP_SAT_MIN_TASKS)
+    )
+    agents = {'watering': [0, 1, 2], 'drone': [3, 4]}
+    return tasks, agents
+
+
+def _new_scheduler(use_cp_sat):
+    """Scheduler with 100 units of water."""
+    scheduler = CSPScheduler(time_horizon=50, use_cp_sat=use_cp_sat)
+    scheduler.add_resource(ResourceType.WATER, 100.0)
+    return scheduler
+
+
+def test_greedy_keeps_highest_priority():
+    """Test that greedy scheduling is the default and favours priority."""
+    tasks, agents = _priority_tasks()
+    scheduler = _new_scheduler(use_cp_sat=False)
+    assert not CSPScheduler().use_cp_sat
+
+    scheduled = {a.task_id for a in scheduler.schedule_tasks(tasks, agents)}
+
+    assert 'high' in scheduled
+    assert 'mid_a' not in scheduled and 'mid_b' not in scheduled
+    assert sum(task_id.startswith('monitor_') for task_id in scheduled) == _CP_SAT_MIN_TASKS
+
+    print(" Greedy scheduling test passed")
+
+
+def test_cp_sat_matches_greedy_priorities():
+    """Test that CP-SAT never drops a higher-priority task and is repeatable."""
+    if cp_model is None:
+        print(" CP-SAT test skipped (OR-Tools not installed)")
+        return
+
+    tasks, agents = _priority_tasks()
+    runs = []
+    for _ in range(2):
+        scheduler = _new_scheduler(use_cp_sat=True)
+        assignments = scheduler.schedule_tasks(tasks, agents)
+        runs.append([(a.task_id, a.agent_id, a.time_slot) for a in assignments])
+
+    scheduled = {task_id for task_id, _, _ in runs[0]}
+    assert 'high' in scheduled
+    assert 'mid_a' not in scheduled and 'mid_b' not in scheduled
+    assert sum(task_id.startswith('monitor_') for task_id in scheduled) == _CP_SAT_MIN_TASKS
+    assert runs[0] == runs[1]
+
+    # An exact resource fit is accepted, as it is by greedy scheduling;
+    # 1.001 scales to just under 1001 in floating point
+    tasks[0]['resources'] = {ResourceType.WATER: 1.001}
+    scheduler = _new_scheduler(use_cp_sat=True)
+    scheduler.add_resource(ResourceType.WATER, 1.001)
+    scheduled = {a.task_id for a in scheduler.schedule_tasks(tasks, agents)}
+    assert 'high' in scheduled
+
+    print(" CP-SAT scheduling test passed")
+
+
+def run_all_tests():
+    """Run all scheduler tests."""
+    test_greedy_keeps_highest_priority()
+    test_cp_sat_matches_greedy_priorities()
+    print("All scheduler tests passed!")
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -57,6 +57,42 @@ def test_cell_state_transitions():
     print(" Cell state transition test passed")
 
 
+def test_master_knowledge_sync():
+    """Test that the master agent's knowledge arrays mirror the model grid."""
+    model = FarmModel(width=6, height=4, num_workers=6)
+    master = model.master_agent
+    
+    test_pos = (5, 3)
+    model.set_cell_state(test_pos, CellState.GROWING)
+    model.update_cell_attributes(test_pos, water_level=0.75, growth_progress=40)
+    master.update_knowledge()
+    
+    knowledge = master.get_cell_knowledge(test_pos)
+    assert knowledge.state == CellState.GROWING
+    # Water level is stored as uint8 fixed point
+    assert abs(knowledge.water_level - 0.75) <= 0.5 / 255
+    assert knowledge.growth_progress == 40
+    assert master.kb_state[3 * 6 + 5] == CellState.GROWING.value
+    
+    print(" Master knowledge sync test passed")
+
+
+def test_stress_indicator_thresholds():
+    """Test that water stress starts strictly below a water level of 0.3."""
+    model = FarmModel(width=6, height=4, num_workers=6)
+    
+    model.set_cell_state((1, 1), CellState.GROWING)
+    model.update_cell_attributes((1, 1), water_level=0.3)
+    stress = model.get_stress_indicators()
+    assert stress['water_stressed_count'] == 0
+    assert stress['overall_health_score'] == 100.0
+    
+    model.update_cell_attributes((1, 1), water_level=0.29)
+    assert model.get_stress_indicators()['water_stressed_count'] == 1
+    
+    print(" Stress indicator threshold test passed")
+
+
 def test_message_bus_communication():
     """Test that message bus delivers messages correctly."""
     model = FarmModel(width=5, height=5, num_workers=6)
@@ -114,14 +150,16 @@ def test_full_simulation_cycle():
         CellState.READY_TO_HARVEST: 0
     }
     
+    # Print progress every 100 steps only when FAI_VERBOSE is set
+    verbose = bool(os.environ.get("FAI_VERBOSE"))
+    
     # Run simulation for 500 steps
     exception_occurred = False
     try:
         for step in range(500):
             model.step()
             
-            # Print progress every 100 steps
-            if (step + 1) % 100 == 0:
+            if verbose and (step + 1) % 100 == 0:
                 ploughed = model.count_cells_by_state(CellState.PLOUGHED)
                 sown = model.count_cells_by_state(CellState.SOWN)
                 growing = model.count_cells_by_state(CellState.GROWING)
@@ -191,6 +229,8 @@ def run_all_tests():
     try:
         test_model_initialization()
         test_cell_state_transitions()
+        test_master_knowledge_sync()
+        test_stress_indicator_thresholds()
         test_message_bus_communication()
         test_agent_task_execution()
         test_full_simulation_cycle()
@@ -5,19 +5,38 @@ This module provides a publish-subscribe message bus that enables asynchronous
 communication between agents in the simulation.
 """
 
-from queue import Queue
-from typing import Dict, List, Callable
-from collections import defaultdict
+from typing import Dict, Callable, Sequence, Tuple
+from collections import deque
+
+from model.cell_state import Message
 
 
 # Message topic constants
 TOPIC_TASK_ASSIGNED = "task.assigned"
+TOPIC_TASK_ASSIGNED_BATCH = "task.assigned.batch"
 TOPIC_STATUS_UPDATE = "status.update"
 TOPIC_ALERT_DISEASE = "alert.disease"
 TOPIC_ALERT_OBSTACLE = "alert.obstacle"
 TOPIC_TASK_COMPLETED = "task.completed"
 
 
+def worker_topic(topic: str, worker_type: str) -> str:
+    """
+    Build the per-worker-type variant of a topic.
+    
+    Publishing to a narrowed topic only reaches workers of that type
+    instead of broadcasting to every worker.
+    
+    Args:
+        topic: Base topic, e.g. TOPIC_TASK_ASSIGNED
+        worker_type: Worker type, e.g. "watering"
+    
+    Returns:
+        Topic string of the form "<topic>.<worker_type>"
+    """
+    return f"{topic}.{worker_type}"
+
+
 class MessageBus:
     """
     Publish-subscribe message bus for agent communication.
@@ -29,8 +48,12 @@ class MessageBus:
     
     def __init__(self):
         """Initialize the message bus with empty subscribers and message queue."""
-        self.subscribers: Dict[str, List[Callable]] = defaultdict(list)
-        self.message_queue: Queue = Queue()
+        # Callbacks per topic, as tuples rebuilt on the rare (un)subscribe
+        # so delivery iterates a fixed snapshot
+        self.subscribers: Dict[str, Tuple[Callable, ...]] = {}
+        # Publishing and delivery both run on the simulation thread, so a
+        # plain deque serves as the queue without per-operation locking
+        self.message_queue: deque = deque()
     
     def publish(self, topic: str, message):
         """
@@ -43,7 +66,44 @@ class MessageBus:
             topic: The topic/channel to publish to
             message: The Message object to publish
         """
-        self.message_queue.put((topic, message))
+        self.message_queue.append((topic, (message,)))
+    
+    def publish_batch(self, topic: str, messages: Sequence):
+        """
+        Publish several messages to a topic as a single queue entry.
+        
+        The batch costs one queue operation and one subscriber lookup at
+        delivery; messages are delivered in order.
+        
+        Args:
+            topic: The topic/channel to publish to
+            messages: The Message objects to publish
+        """
+        if messages:
+            self.message_queue.append((topic, messages))
+    
+    def publish_payload(self, topic: str, sender_id: int, timestamp: int, payload: dict):
+        """
+        Build and publish a message only if the topic has subscribers.
+        
+        Messages published to a topic nobody listens on are dropped during
+        delivery anyway, so skipping the Message construction and queueing
+        saves an allocation per send on hot paths.
+        
+        Args:
+            topic: The topic/channel to publish to
+            sender_id: ID of the publishing agent
+            timestamp: Simulation step of the message
+            payload: Message payload dictionary
+        """
+        if not self.subscribers.get(topic):
+            return
+        self.message_queue.append((topic, (Message(
+            topic=topic,
+            sender_id=sender_id,
+            timestamp=timestamp,
+            payload=payload
+        ),)))
     
     def subscribe(self, topic: str, callback: Callable):
         """
@@ -56,8 +116,9 @@ class MessageBus:
             topic: The topic/channel to subscribe to
             callback: Function to call when messages arrive (receives message as argument)
         """
-        if callback not in self.subscribers[topic]:
-            self.subscribers[topic].append(callback)
+        callbacks = self.subscribers.get(topic, ())
+        if callback not in callbacks:
+            self.subscribers[topic] = callbacks + (callback,)
     
     def unsubscribe(self, topic: str, callback: Callable):
         """
@@ -67,8 +128,10 @@ class MessageBus:
             topic: The topic/channel to unsubscribe from
             callback: The callback function to remove
         """
-        if callback in self.subscribers[topic]:
-            self.subscribers[topic].remove(callback)
+        callbacks = self.subscribers.get(topic, ())
+        if callback in callbacks:
+            index = callbacks.index(callback)
+            self.subscribers[topic] = callbacks[:index] + callbacks[index + 1:]
     
     def process_messages(self):
         """
@@ -78,12 +141,17 @@ class MessageBus:
         all pending messages to their subscribers. Messages are delivered
         synchronously within this call but were queued asynchronously.
         """
-        while not self.message_queue.empty():
-            topic, message = self.message_queue.get()
+        queue = self.message_queue
+        get_callbacks = self.subscribers.get
+        while queue:
+            topic, messages = queue.popleft()
             
-            # Deliver message to all subscribers of this topic
-            if topic in self.subscribers:
-                for callback in self.subscribers[topic]:
+            # Deliver each message to all subscribers of this topic
+            callbacks = get_callbacks(topic)
+            if not callbacks:
+                continue
+            for message in messages:
+                for callback in callbacks:
                     try:
                         callback(message)
                     except Exception as e:
@@ -93,5 +161,4 @@ class MessageBus:
     def clear(self):
         """Clear all subscribers and pending messages."""
         self.subscribers.clear()
-        while not self.message_queue.empty():
-            self.message_queue.get()
+        self.message_queue.clear()
@@ -5,8 +5,22 @@ This module implements A* pathfinding algorithm for grid-based navigation,
 allowing agents to find optimal paths while avoiding obstacles.
 """
 
-import heapq
-from typing import List, Tuple, Set, Optional
+from collections import deque
+import threading
+import numpy as np
+from typing import Dict, List, Tuple, Set, Optional, Union
+
+
+# Maximum number of searches whose path is remembered
+_PATH_CACHE_SIZE = 4096
+
+# Paths found over the obstacle mask _path_cache_mask, as flat indices
+# keyed by (start index, goal index, width, height), least recently used
+# first. Obstacles rarely change, so a new mask simply clears the cache.
+# Models can step on different threads, so both are guarded by the lock
+_path_cache: Dict[Tuple[int, int, int, int], List[int]] = {}
+_path_cache_mask: Optional[bytes] = None
+_path_cache_lock = threading.Lock()
 
 
 def get_neighbors(pos: Tuple[int, int], width: int, height: int) -> List[Tuple[int, int]]:
@@ -50,103 +64,267 @@ def heuristic(pos1: Tuple[int, int], pos2: Tuple[int, int]) -> float:
     return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
 
 
-def calculate_path(
-    start: Tuple[int, int],
-    goal: Tuple[int, int],
+def _astar_core(
+    start_idx: int,
+    goal_idx: int,
     width: int,
     height: int,
-    obstacles: Optional[Set[Tuple[int, int]]] = None
-) -> List[Tuple[int, int]]:
+    blocked
+) -> List[int]:
     """
-    Calculate optimal path from start to goal using A* algorithm.
+    A* search over flat cell indices (y * width + x).
     
-    Finds the shortest path on a grid while avoiding obstacles. Uses
-    Manhattan distance as the heuristic function.
+    Works purely on integers so no tuples or sets are built per node, and
+    records parent pointers instead of copying a path for every push. The
+    open set is a pair of FIFO queues rather than a binary heap.
     
     Args:
-        start: Starting position (x, y)
-        goal: Goal position (x, y)
+        start_idx: Flat index of the starting cell
+        goal_idx: Flat index of the goal cell
         width: Grid width
         height: Grid height
-        obstacles: Set of positions that cannot be traversed
+        blocked: Indexable of length width * height, non-zero for obstacles
     
     Returns:
-        List of positions from start to goal (inclusive), or empty list if no path exists
+        Flat indices from start to goal (inclusive), or empty list if no path exists
     """
-    if obstacles is None:
-        obstacles = set()
+    goal_x = goal_idx % width
+    goal_y = goal_idx // width
+    num_cells = width * height
     
-    # If start or goal is an obstacle, no path exists
-    if start in obstacles or goal in obstacles:
-        return []
+    g_scores = [-1] * num_cells
+    parents = [-1] * num_cells
+    closed = bytearray(num_cells)
     
-    # If already at goal, return single-element path
-    if start == goal:
-        return [start]
+    # Each move changes g by 1 and the Manhattan heuristic by exactly 1, so
+    # a neighbor's f score is the current f or f + 2. Two FIFO queues then
+    # pop nodes in (f_score, push order), as a heap would, in O(1):
+    # frontier holds nodes at f_score, deferred those at f_score + 2
+    f_score = abs(start_idx % width - goal_x) + abs(start_idx // width - goal_y)
+    frontier = deque([start_idx])
+    deferred = deque()
+    g_scores[start_idx] = 0
     
-    # Priority queue: (f_score, counter, position, path)
-    # counter ensures stable sorting when f_scores are equal
-    counter = 0
-    open_set = [(0, counter, start, [start])]
-    closed_set = set()
-    
-    # Track best g_score for each position
-    g_scores = {start: 0}
-    
-    while open_set:
-        f_score, _, current, path = heapq.heappop(open_set)
+    while frontier or deferred:
+        if not frontier:
+            frontier, deferred = deferred, frontier
+            f_score += 2
+        current = frontier.popleft()
         
         # Skip if already processed
-        if current in closed_set:
+        if closed[current]:
             continue
         
         # Check if we reached the goal
-        if current == goal:
+        if current == goal_idx:
+            # The path has g + 1 cells; fill it from the goal backwards
+            steps = g_scores[current]
+            path = [start_idx] * (steps + 1)
+            for i in range(steps, 0, -1):
+                path[i] = current
+                current = parents[current]
             return path
         
-        closed_set.add(current)
-        current_g = g_scores[current]
+        closed[current] = 1
+        tentative_g = g_scores[current] + 1
+        y, x = divmod(current, width)
+        hx = abs(x - goal_x)
+        hy = abs(y - goal_y)
+        
+        # Explore 4-connected neighbors, unrolled so an edge builds no
+        # tuples. Each skips obstacles and already processed nodes, and
+        # takes this path if it is better than any previous one
+        
+        # Up
+        if y + 1 < height:
+            neighbor = current + width
+            if not blocked[neighbor] and not closed[neighbor]:
+                neighbor_g = g_scores[neighbor]
+                if neighbor_g < 0 or tentative_g < neighbor_g:
+                    g_scores[neighbor] = tentative_g
+                    parents[neighbor] = current
+                    if tentative_g + hx + abs(y + 1 - goal_y) == f_score:
+                        frontier.append(neighbor)
+                    else:
+                        deferred.append(neighbor)
         
-        # Explore neighbors
-        for neighbor in get_neighbors(current, width, height):
-            # Skip obstacles and already processed nodes
-            if neighbor in obstacles or neighbor in closed_set:
-                continue
-            
-            # Calculate tentative g_score (cost from start to neighbor)
-            tentative_g = current_g + 1
-            
-            # If this path to neighbor is better than any previous one
-            if neighbor not in g_scores or tentative_g < g_scores[neighbor]:
-                g_scores[neighbor] = tentative_g
-                f_score = tentative_g + heuristic(neighbor, goal)
-                counter += 1
-                new_path = path + [neighbor]
-                heapq.heappush(open_set, (f_score, counter, neighbor, new_path))
+        # Down
+        if y:
+            neighbor = current - width
+            if not blocked[neighbor] and not closed[neighbor]:
+                neighbor_g = g_scores[neighbor]
+                if neighbor_g < 0 or tentative_g < neighbor_g:
+                    g_scores[neighbor] = tentative_g
+                    parents[neighbor] = current
+                    if tentative_g + hx + abs(y - 1 - goal_y) == f_score:
+                        frontier.append(neighbor)
+                    else:
+                        deferred.append(neighbor)
+        
+        # Right
+        if x + 1 < width:
+            neighbor = current + 1
+            if not blocked[neighbor] and not closed[neighbor]:
+                neighbor_g = g_scores[neighbor]
+                if neighbor_g < 0 or tentative_g < neighbor_g:
+                    g_scores[neighbor] = tentative_g
+                    parents[neighbor] = current
+                    if tentative_g + abs(x + 1 - goal_x) + hy == f_score:
+                        frontier.append(neighbor)
+                    else:
+                        deferred.append(neighbor)
+        
+        # Left
+        if x:
+            neighbor = current - 1
+            if not blocked[neighbor] and not closed[neighbor]:
+                neighbor_g = g_scores[neighbor]
+                if neighbor_g < 0 or tentative_g < neighbor_g:
+                    g_scores[neighbor] = tentative_g
+                    parents[neighbor] = current
+                    if tentative_g + abs(x - 1 - goal_x) + hy == f_score:
+                        frontier.append(neighbor)
+                    else:
+                        deferred.append(neighbor)
     
     # No path found
     return []
 
 
+def _find_path(
+    start: Tuple[int, int],
+    goal: Tuple[int, int],
+    width: int,
+    height: int,
+    obstacles: Optional[Union[Set[Tuple[int, int]], np.ndarray]]
+) -> List[int]:
+    """
+    Find the path from start to goal as flat indices, through the cache.
+    
+    Args:
+        start: Starting position (x, y)
+        goal: Goal position (x, y)
+        width: Grid width
+        height: Grid height
+        obstacles: Obstacles as accepted by calculate_path
+    
+    Returns:
+        Flat indices from start to goal (inclusive), or empty list if no
+        path exists; shared with the cache, so not to be modified
+    """
+    start_idx = start[1] * width + start[0]
+    goal_idx = goal[1] * width + goal[0]
+    
+    # Along the start's column to the goal's row, then along that row, is
+    # a shortest path, and the one A* settles on whenever it is clear
+    corner = goal[1] * width + start[0]
+    column = range(start_idx, corner, width if goal_idx > start_idx else -width)
+    row = range(corner, goal_idx + 1, 1) if goal_idx >= corner else range(corner, goal_idx - 1, -1)
+    
+    if obstacles is None:
+        return [*column, *row]
+    
+    if isinstance(obstacles, np.ndarray):
+        # Check the L-shaped path on the array itself so the common case
+        # never copies the grid; both legs are evenly strided slices
+        if goal_idx > start_idx:
+            column_cells = obstacles[start_idx:corner:width]
+        else:
+            column_cells = obstacles[corner + width:start_idx + 1:width]
+        row_cells = obstacles[min(corner, goal_idx):max(corner, goal_idx) + 1]
+        if not column_cells.any() and not row_cells.any():
+            return [*column, *row]
+        blocked = obstacles.tobytes()
+    else:
+        mask = bytearray(width * height)
+        for ox, oy in obstacles:
+            if 0 <= ox < width and 0 <= oy < height:
+                mask[oy * width + ox] = 1
+        blocked = bytes(mask)
+        if not any(map(blocked.__getitem__, column)) and not any(map(blocked.__getitem__, row)):
+            return [*column, *row]
+    
+    # The L-shaped path is blocked somewhere; if the start or goal itself is
+    # an obstacle, no path exists
+    if blocked[start_idx] or blocked[goal_idx]:
+        return []
+    
+    global _path_cache_mask
+    key = (start_idx, goal_idx, width, height)
+    with _path_cache_lock:
+        if blocked != _path_cache_mask:
+            _path_cache.clear()
+            _path_cache_mask = blocked
+        
+        # Look up the search, marking it most recently used
+        path = _path_cache.pop(key, None)
+        if path is not None:
+            _path_cache[key] = path
+            return path
+    
+    path = _astar_core(start_idx, goal_idx, width, height, blocked)
+    
+    with _path_cache_lock:
+        # Another thread may have switched the cache to a different mask
+        # while the search ran; the path only belongs under this one
+        if blocked == _path_cache_mask:
+            if key not in _path_cache and len(_path_cache) >= _PATH_CACHE_SIZE:
+                del _path_cache[next(iter(_path_cache))]
+            _path_cache[key] = path
+    return path
+
+
+def calculate_path(
+    start: Tuple[int, int],
+    goal: Tuple[int, int],
+    width: int,
+    height: int,
+    obstacles: Optional[Union[Set[Tuple[int, int]], np.ndarray]] = None
+) -> List[Tuple[int, int]]:
+    """
+    Calculate optimal path from start to goal using A* algorithm.
+    
+    Finds the shortest path on a grid while avoiding obstacles. Uses
+    Manhattan distance as the heuristic function. Results are cached, so
+    repeating a search over unchanged obstacles costs a dict lookup.
+    
+    Args:
+        start: Starting position (x, y)
+        goal: Goal position (x, y)
+        width: Grid width
+        height: Grid height
+        obstacles: Set of positions that cannot be traversed, or a flat
+            uint8 array of length width * height (non-zero = obstacle)
+    
+    Returns:
+        List of positions from start to goal (inclusive), or empty list if no path exists
+    """
+    path = _find_path(start, goal, width, height, obstacles)
+    return [(idx % width, idx // width) for idx in path]
+
+
 def is_path_clear(
     start: Tuple[int, int],
     goal: Tuple[int, int],
     width: int,
     height: int,
-    obstacles: Optional[Set[Tuple[int, int]]] = None
+    obstacles: Optional[Union[Set[Tuple[int, int]], np.ndarray]] = None
 ) -> bool:
     """
     Check if a clear path exists between start and goal.
     
+    Shares calculate_path's search and cache, but never builds the list
+    of positions.
+    
     Args:
         start: Starting position (x, y)
         goal: Goal position (x, y)
         width: Grid width
         height: Grid height
-        obstacles: Set of positions that cannot be traversed
+        obstacles: Set of positions that cannot be traversed, or a flat
+            uint8 array of length width * height (non-zero = obstacle)
     
     Returns:
         True if a path exists, False otherwise
     """
-    path = calculate_path(start, goal, width, height, obstacles)
-    return len(path) > 0
+    return len(_find_path(start, goal, width, height, obstacles)) > 0